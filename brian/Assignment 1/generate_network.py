@@ -14,11 +14,13 @@ while True:
 # Saving as an edge list (TSV) file
 nx.write_edgelist(graph_result, "network.edgelist.tsv", delimiter="\t")
 
-# Saving as a METIS file
+# Saving as a METIS file: the header, then one line per node listing its
+# neighbors, numbered from 1
 with open("network.metis", "w") as graph_metis_file:
-    graph_metis_file.write(f"{nodes_num} {edges_num}\n")
-    for u, v in graph_result.edges():
-        graph_metis_file.write(f"{u + 1} {v + 1}\n")
+    graph_metis_file.write(f"{nodes_num} {nx.number_of_edges(graph_result)}\n")
+    for u in range(nodes_num):
+        neighbors = sorted(graph_result.neighbors(u))
+        graph_metis_file.write(" ".join(str(v + 1) for v in neighbors) + "\n")
 
 # Saving as a GraphML file
 nx.write_graphml(graph_result, "network.graphml")
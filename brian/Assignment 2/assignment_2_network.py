@@ -2,7 +2,6 @@ import networkx as nx
 import matplotlib.pyplot as plt
 import pandas as pd
 import numpy as np
-import statistics as stat
 from pandas.plotting import table
 
 # Using pandas to create a dataframe to create a network.
@@ -14,20 +13,29 @@ doi_graph = nx.Graph()
 doi_graph.add_nodes_from(doi_df['citing_iid'])
 doi_graph.add_nodes_from(doi_df['cited_iid'])
 
-edges = [(row['citing_iid'], row['cited_iid']) for index, 
-         row in doi_df.iterrows()]
+# Pairing the two id columns as whole arrays instead of row by row
+edges = zip(doi_df['citing_iid'].tolist(), doi_df['cited_iid'].tolist())
 
 # Adding the edges created above into the graph
 doi_graph.add_edges_from(edges)
 
-# Creating a log-log scale graph image of the degree frequency in the network
-degree_freq = nx.degree_histogram(doi_graph)
-degrees = range(len(degree_freq))
+# Getting the degree of every node as one array, the degree statistics below
+# are all read off its histogram instead of making a pass each
+doi_degrees = np.fromiter((d for n, d in doi_graph.degree()), dtype=np.int64,
+                          count=doi_graph.number_of_nodes())
+degree_freq = np.bincount(doi_degrees)
+
+# Creating a log-log scale graph image of the degree frequency in the network,
+# averaged over logarithmically growing bins so the tail isn't lost in noise
+bin_edges = np.unique(np.logspace(0, np.log10(len(degree_freq)), 30).astype(np.int64))
+bin_edges = np.append(bin_edges[bin_edges < len(degree_freq)], len(degree_freq))
+binned_freq = np.add.reduceat(degree_freq, bin_edges[:-1]) / np.diff(bin_edges)
+bin_centers = np.sqrt(bin_edges[:-1] * (bin_edges[1:] - 1))
 plt.figure(figsize=(12, 8)) 
-plt.loglog(degrees, degree_freq, 'go-') 
+plt.loglog(bin_centers[binned_freq > 0], binned_freq[binned_freq > 0], 'go-') 
 plt.title("Degree Distribution of Pubmed DOI Results")
 plt.xlabel('Degree')
-plt.ylabel('Frequency of Each Degree')
+plt.ylabel('Average Frequency of Each Degree')
 plt.savefig('doi_degree_distribution.png')
 
 # Setting up the figure for the image of the network
@@ -52,30 +60,28 @@ nx.draw(
 plt.savefig("doi_network.png", dpi=300, bbox_inches='tight')
 plt.show()
 
-# Getting the number of isolated nodes
-isolated_nodes = list(nx.isolates(doi_graph))
-isolated_nodes_num = len(isolated_nodes)
+# Getting the number of isolated nodes, the nodes of degree 0
+isolated_nodes_num = degree_freq[0]
 
 # Getting the number of connected components
 connected_components_num = nx.number_connected_components(doi_graph)
 
-# Geting the degrees of each node
-doi_degrees = [d for n, d in doi_graph.degree()]
-
-# Finding the minimum degree
-min_doi_degree = np.min(doi_degrees)
-
-# Finding the maximum degree
-max_doi_degree = np.max(doi_degrees)
+# Finding the minimum and maximum degree, the first and last degree that occurs
+present_degrees = np.flatnonzero(degree_freq)
+min_doi_degree = present_degrees[0]
+max_doi_degree = present_degrees[-1]
 
 # Calculating the mean of the degrees in the network
-mean_doi_degree = np.mean(doi_degrees)
+mean_doi_degree = np.dot(np.arange(len(degree_freq)), degree_freq) / len(doi_degrees)
 
-# Calculating the median of the degrees in the network
-median_doi_degree = np.median(doi_degrees)
+# Calculating the median of the degrees in the network, the average of the
+# two middle positions in sorted order
+cumulative_freq = np.cumsum(degree_freq)
+middle = [(len(doi_degrees) - 1) // 2, len(doi_degrees) // 2]
+median_doi_degree = np.searchsorted(cumulative_freq, middle, side='right').mean()
 
-# Calculating the mode of the degrees in the network
-mode_doi_degree = stat.mode(doi_degrees)
+# Calculating the mode of the degrees in the network, the most frequent degree
+mode_doi_degree = np.argmax(degree_freq)
 
 # Creating a pandas table for the characteristics of the network
 doi_data = {
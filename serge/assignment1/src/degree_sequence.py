@@ -0,0 +1,138 @@
+from typing import Optional
+
+import numpy as np
+
+
+def min_max_normalize(
+    distribution: np.ndarray, new_min: int, new_max: int
+) -> np.ndarray:
+    """
+    Helper function that normalizes a given distribution using provided
+    new minimum and maximum values, all values at once. Values are truncated
+    to ints, so only the maximum maps to new_max. A constant distribution
+    maps to new_min.
+
+    Params:
+        distribution: values of any distribution, e.g. pareto samples
+        new_min: desired new minimum value the distribution will have
+        new_max: desired new maximum value the distribution will have
+
+    Returns:
+        A min-max normalized array of int64 values
+    """
+    distribution = np.asarray(distribution, dtype=np.float64)
+    if not len(distribution):
+        return np.zeros(0, dtype=np.int64)
+
+    old_min = distribution.min()
+    old_range = distribution.max() - old_min
+    if old_range == 0:
+        return np.full(len(distribution), new_min, dtype=np.int64)
+
+    scaled = new_min + (distribution - old_min) * ((new_max - new_min) / old_range)
+    return np.trunc(scaled).astype(np.int64)
+
+
+def clip_degrees(degrees: np.ndarray, max_degree: Optional[int] = None) -> np.ndarray:
+    """
+    Helper function that caps every degree, no node of a simple graph can
+    have more than n - 1 neighbors
+
+    Params:
+        degrees: one degree per node
+        max_degree: the cap, n - 1 by default
+
+    Returns:
+        a new array with every degree at most max_degree
+    """
+    degrees = np.asarray(degrees, dtype=np.int64)
+    if max_degree is None:
+        max_degree = max(len(degrees) - 1, 0)
+    return np.minimum(degrees, max_degree)
+
+
+def fix_parity(degrees: np.ndarray) -> np.ndarray:
+    """
+    Helper function that makes the degree sum even, as every edge has two
+    ends. When the sum is odd one stub is taken from the first node of
+    highest degree, which is at least 1, so no degree goes negative or past
+    a cap and the same sequence is always repaired the same way.
+
+    Params:
+        degrees: one degree per node
+
+    Returns:
+        a new array whose sum is even
+    """
+    degrees = np.array(degrees, dtype=np.int64)
+    if degrees.sum() % 2:
+        degrees[np.argmax(degrees)] -= 1
+    return degrees
+
+
+def is_graphical(degrees: np.ndarray) -> bool:
+    """
+    Checks the Erdős–Gallai conditions: a sequence d_1 >= ... >= d_n is the
+    degree sequence of a simple graph iff its sum is even and for every k
+
+        d_1 + ... + d_k <= k(k - 1) + min(d_(k+1), k) + ... + min(d_n, k)
+
+    Degrees are at most n - 1, so they are sorted by counting and every
+    right-hand side comes from prefix sums and the number of degrees >= k,
+    O(n) in all rather than O(n^2).
+
+    Params:
+        degrees: one degree per node, in any order
+
+    Returns:
+        True if a simple graph has these degrees
+    """
+    degrees = np.asarray(degrees, dtype=np.int64)
+    n = len(degrees)
+    if n == 0:
+        return True
+    if degrees.min() < 0 or degrees.max() > n - 1 or degrees.sum() % 2:
+        return False
+
+    # counting sort, highest degree first
+    counts = np.bincount(degrees, minlength=n)
+    ordered = np.repeat(np.arange(n - 1, -1, -1), counts[::-1])
+    prefix = np.concatenate([[0], np.cumsum(ordered)])
+
+    k = np.arange(1, n + 1)
+    # at_least[k - 1] is the number of degrees >= k, those are ordered first
+    at_least = n - np.cumsum(counts)[:n]
+    # past position k the degrees >= k add k each and the rest add themselves
+    capped = np.maximum(at_least - k, 0)
+    small = np.maximum(at_least, k)
+    right = k * (k - 1) + k * capped + prefix[n] - prefix[small]
+    return bool(np.all(prefix[1:] <= right))
+
+
+def pareto_degrees(
+    rng: np.random.Generator,
+    num_nodes: int,
+    alpha: float,
+    mode: float,
+    min_degree: int,
+    max_degree: int,
+) -> np.ndarray:
+    """
+    Draws a pareto degree sequence, normalizes it to [min_degree,
+    max_degree], caps it at n - 1 and repairs its parity, so its sum is
+    always even.
+
+    Params:
+        rng: the random generator
+        num_nodes: length of the sequence
+        alpha: the shape of the probability density function
+        mode: the scale of the probability density function
+        min_degree: the lowest degree
+        max_degree: the highest degree
+
+    Returns:
+        one degree per node
+    """
+    data = rng.pareto(alpha, num_nodes) * mode + min_degree
+    degrees = min_max_normalize(data, min_degree, max_degree)
+    return fix_parity(clip_degrees(degrees))
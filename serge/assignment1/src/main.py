@@ -1,6 +1,13 @@
-import matplotlib.pyplot as plt
-import networkx as nx
-import numpy as np
+import matplotlib
+
+# draw off screen, figures are written to the output directory
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+import networkx as nx  # noqa: E402
+import numpy as np  # noqa: E402
+
+from degree_sequence import is_graphical, min_max_normalize, pareto_degrees  # noqa: E402
 
 SEED = 51187
 REDS = [
@@ -91,7 +98,7 @@ def plot_degree_bars() -> None:
 
     fig.suptitle("Synthetic Network Degree Distribution")
     plt.tight_layout()
-    plt.show()
+    save_figure("degree_bars")
 
 
 def plot_shape_bars() -> None:
@@ -165,7 +172,7 @@ def plot_shape_bars() -> None:
 
     fig.suptitle("Synthetic Network Degree Distribution")
     plt.tight_layout()
-    plt.show()
+    save_figure("shape_bars")
 
 
 def plot_alpha_bars() -> None:
@@ -241,7 +248,7 @@ def plot_alpha_bars() -> None:
 
     fig.suptitle("Synthetic Network Degree Distribution")
     plt.tight_layout()
-    plt.show()
+    save_figure("alpha_bars")
 
 
 def generate_pdf_figures() -> None:
@@ -279,43 +286,29 @@ def generate_pdf_figures() -> None:
         ax.yaxis.set_major_formatter(plt.FuncFormatter(lambda y, _: "{:.2f}".format(y)))
 
     plt.tight_layout()
-    plt.show()
+    save_figure("pdf_figures")
 
 
-def min_max_normalize(
-    pareto_distribution: list[float], new_min: int, new_max: int
-) -> list[int]:
+def save_figure(name: str) -> None:
     """
-    Helper function that normalizes a given distribution using provided
-    new minimum and maximum values
+    Helper function that writes the current figure to the 'output'
+    directory as a PNG and closes it
 
     Params:
-        pareto_distribution: a type of power distribution
-        new_min: desired new minimum value the distribution will have
-        new_max: desired new maximum value the distribution will have
-
-    Returns:
-        A min-max normalized pareto distribution of int values
+        name: file name, without the extension
     """
-
-    old_min = min(pareto_distribution)
-    old_max = max(pareto_distribution)
-    old_range = old_max - old_min
-    new_range = new_max - new_min
-
-    feature_scale = lambda i: int(new_min + (i - old_min) * new_range / old_range)  # noqa: E731
-
-    return [feature_scale(i) for i in pareto_distribution]
+    plt.savefig(f"./output/{name}.png", dpi=150)
+    plt.close()
 
 
-def draw_graph(degree_sequence: list[int]) -> None:
+def draw_graph(degree_sequence: np.ndarray) -> None:
     """
     Draws graph object, saves data to 'output' directory
 
     Params:
         degree_sequence: a list of degrees, one per node in the graph
     """
-    G = nx.configuration_model(degree_sequence)
+    G = nx.configuration_model(degree_sequence.tolist())
     G = nx.Graph(G)  # Converts to simple graph
     G.remove_edges_from(nx.selfloop_edges(G))
 
@@ -329,10 +322,10 @@ def draw_graph(degree_sequence: list[int]) -> None:
     plt.figure(figsize=(8, 8))
     pos = nx.spring_layout(G)
     nx.draw(G, pos, node_size=10, with_labels=False)
-    plt.show()
+    save_figure("graph1")
 
 
-def synthetic_data(alpha: float, mode: float, min_degree) -> list[int] | int:
+def synthetic_data(alpha: float, mode: float, min_degree: int) -> np.ndarray:
     """
     Use to source synthetic, normalized data
 
@@ -340,24 +333,14 @@ def synthetic_data(alpha: float, mode: float, min_degree) -> list[int] | int:
         alpha: the shape of the probability density function
         mode: the scale of the probability density function
         min_degree: a scaler to shift the probability density function up
+
+    Returns:
+        a degree sequence with an even sum, one degree per node
     """
     num_nodes = 1000
 
     rng = np.random.default_rng()
-
-    # it's super likely that we succeed in generating a figure
-    # within 10 attempts, if this doesn't work I'd recommend
-    # you try again, we use the '-1' for basic error handling
-
-    for _ in range(10):
-        data = rng.pareto(alpha, num_nodes) * mode + min_degree
-        data = min_max_normalize(data, min_degree, min_degree + 100)
-
-        # aggregate degree list must be even
-        if sum(data) % 2 == 0:
-            return data
-
-    return -1
+    return pareto_degrees(rng, num_nodes, alpha, mode, min_degree, min_degree + 100)
 
 
 def write_metis(G: nx.Graph, path: str) -> None:
@@ -368,14 +351,19 @@ def write_metis(G: nx.Graph, path: str) -> None:
         G: The input graph
         path: The output file path
     """
+    # METIS numbers nodes from 1 in sorted order, the adjacency matrix gives
+    # every node's neighbors as sorted column positions in one pass
+    nodes = sorted(G.nodes())
+    adjacency = nx.to_scipy_sparse_array(G, nodelist=nodes, format="csr")
+    adjacency.sort_indices()
+    rows = np.split(adjacency.indices + 1, adjacency.indptr[1:-1])
+
     with open(path, "w") as f:
         # Write the number of nodes and edges
-        f.write(f"{G.number_of_nodes()} {G.number_of_edges()}\n")
+        f.write(f"{len(nodes)} {G.number_of_edges()}\n")
 
         # Write each node's neighbors
-        for node in sorted(G.nodes()):
-            neighbors = " ".join(map(str, sorted(G.neighbors(node))))
-            f.write(f"{neighbors}\n")
+        f.writelines(" ".join(map(str, row)) + "\n" for row in rows)
 
 
 def main():
@@ -388,12 +376,13 @@ def main():
     generate_pdf_figures()
 
     # throw together some data
-    # data = synthetic_data(alpha=3.0, mode=3.0, min=0)
-    data = synthetic_data(alpha=2.0, mode=3.0, min=2)
+    # data = synthetic_data(alpha=3.0, mode=3.0, min_degree=0)
+    data = synthetic_data(alpha=2.0, mode=3.0, min_degree=2)
 
-    # basic error handling
-    if data == -1:
-        return
+    # the configuration model takes any even sequence, but only a graphical
+    # one can come out simple without losing edges
+    if not is_graphical(data):
+        print("Degree sequence is not graphical, some edges will be dropped.")
 
     draw_graph(data)
 
@@ -406,12 +395,12 @@ def main():
 
     # Optionally, draw the graph (for a large graph like this, visualization might be cluttered)
     plt.figure(figsize=(8, 8))
-    pos = nx.spring_layout(G, SEED=42)
+    pos = nx.spring_layout(G, seed=42)
     nx.draw(G, pos, node_size=10, with_labels=False, alpha=0.6)
-    plt.show()
+    save_figure("random_graph")
 
     # Save the graph to a METIS file
-    nx.write_metis(G, "graph.metis")
+    write_metis(G, "./output/graph.metis")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,243 @@
+import logging
+import math
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import networkit as nk
+import numpy as np
+
+
+MODES = ("exact", "sample", "adaptive", "topk")
+
+# sources used to time one shortest path pass before committing to a plan
+PROBE_SAMPLES = 16
+
+
+@dataclass
+class BetweennessResult:
+    """
+    Normalized betweenness scores with the guarantee they were computed
+    under: with probability at least 1 - delta, every score is within
+    epsilon of the exact normalized betweenness.
+    """
+
+    scores: np.ndarray
+    mode: str
+    epsilon: float
+    delta: float
+    samples: int
+    elapsed: float
+    ranking: Optional[np.ndarray] = None  # node indices, best first (topk)
+
+
+def betweenness(
+    G: nk.Graph,
+    mode: str = "exact",
+    samples: int = 1000,
+    epsilon: float = 0.01,
+    delta: float = 0.1,
+    k: int = 10,
+    threads: Optional[int] = None,
+    time_budget: Optional[float] = None,
+) -> BetweennessResult:
+    """
+    Computes betweenness centrality exactly or by sampling.
+
+    Modes:
+        exact: Brandes, O(nm). With a time_budget, a short probe projects
+            the run time and the run falls back to sampling if it won't fit
+        sample: a fixed number of uniformly sampled sources, run in batches
+            so a time_budget can stop it early
+        adaptive: samples until the (epsilon, delta) guarantee is met, using
+            KADABRA on undirected graphs and ApproxBetweenness on directed
+        topk: KADABRA ranking of the k most central nodes, on directed
+            graphs the top k of the adaptive scores
+
+    Params:
+        G: the graph
+        mode: one of exact, sample, adaptive or topk
+        samples: number of sources for sample mode
+        epsilon: target additive error for adaptive and topk modes
+        delta: probability the error bound may fail
+        k: number of nodes to rank in topk mode
+        threads: worker threads, defaults to networkit's setting
+        time_budget: seconds to spend, honored by exact and sample modes
+
+    Returns:
+        a BetweennessResult, scores are normalized to [0, 1]
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown betweenness mode {mode!r}, expected one of {MODES}")
+
+    previous_threads = nk.getCurrentNumberOfThreads()
+    if threads:
+        nk.setNumberOfThreads(threads)
+    start = time.perf_counter()
+
+    try:
+        if mode == "exact" and time_budget is not None:
+            mode, samples = _plan_exact(G, time_budget)
+        if mode == "exact":
+            algorithm = nk.centrality.Betweenness(G, normalized=True)
+            algorithm.run()
+            return BetweennessResult(
+                np.asarray(algorithm.scores()),
+                "exact",
+                0.0,
+                0.0,
+                0,
+                time.perf_counter() - start,
+            )
+
+        if mode == "sample":
+            budget = (
+                None
+                if time_budget is None
+                else time_budget - (time.perf_counter() - start)
+            )
+            scores, taken = _sample(G, samples, budget)
+            return BetweennessResult(
+                scores,
+                "sample",
+                sampling_error(G.numberOfNodes(), taken, delta),
+                delta,
+                taken,
+                time.perf_counter() - start,
+            )
+
+        if time_budget is not None:
+            logging.info(f"{mode} betweenness stops at its error bound, not a budget.")
+
+        if G.isDirected():
+            # KADABRA needs the diameter, which networkit only has for
+            # undirected graphs
+            algorithm = nk.centrality.ApproxBetweenness(G, epsilon, delta)
+            algorithm.run()
+            scores = np.asarray(algorithm.scores())
+            ranking = np.argsort(-scores, kind="stable")[:k] if mode == "topk" else None
+            return BetweennessResult(
+                scores,
+                mode,
+                epsilon,
+                delta,
+                algorithm.numberOfSamples(),
+                time.perf_counter() - start,
+                ranking,
+            )
+
+        algorithm = nk.centrality.KadabraBetweenness(
+            G, epsilon, delta, False, k if mode == "topk" else 0
+        )
+        algorithm.run()
+        scale = _kadabra_scale(G.numberOfNodes())
+        if mode == "topk":
+            ranking = np.asarray(algorithm.topkNodesList(), dtype=np.int64)
+            scores = np.zeros(G.numberOfNodes())
+            scores[ranking] = np.asarray(algorithm.topkScoresList()) * scale
+        else:
+            ranking = None
+            scores = np.asarray(algorithm.scores()) * scale
+        return BetweennessResult(
+            scores,
+            mode,
+            epsilon * scale,
+            delta,
+            algorithm.getNumberOfIterations(),
+            time.perf_counter() - start,
+            ranking,
+        )
+    finally:
+        nk.setNumberOfThreads(previous_threads)
+
+
+def sampling_error(num_nodes: int, samples: int, delta: float) -> float:
+    """
+    Additive error bound for betweenness estimated from uniformly sampled
+    sources. Each source contributes a value in [0, 1] to a node's normalized
+    score, so Hoeffding's inequality with a union bound over all nodes gives
+    the error that holds for every node at once with probability 1 - delta.
+
+    Params:
+        num_nodes: nodes in the graph
+        samples: sources sampled
+        delta: probability the bound may fail
+
+    Returns:
+        the bound epsilon
+    """
+    return math.sqrt(math.log(2 * num_nodes / delta) / (2 * max(samples, 1)))
+
+
+def _kadabra_scale(num_nodes: int) -> float:
+    """
+    Helper method gives the factor that brings KADABRA's undirected scores
+    to networkit's normalized betweenness. KADABRA estimates the share of
+    the n(n - 1) ordered pairs whose shortest path runs through a node and
+    counts each undirected path from both ends, Betweenness divides the
+    same counts by (n - 1)(n - 2), so KADABRA comes out 2(n - 2) / n times
+    larger. Its error bound scales with it.
+    """
+    if num_nodes <= 2:
+        return 1.0
+    return num_nodes / (2 * (num_nodes - 2))
+
+
+def _plan_exact(G: nk.Graph, time_budget: float) -> tuple[str, int]:
+    """
+    Helper method times a few shortest path passes and decides whether the
+    exact run fits in the budget, if not, how many samples do
+    """
+    n = G.numberOfNodes()
+    probe = min(PROBE_SAMPLES, n)
+    start = time.perf_counter()
+    nk.centrality.EstimateBetweenness(G, probe, True, True).run()
+    per_source = (time.perf_counter() - start) / max(probe, 1)
+
+    projected = per_source * n
+    if projected <= time_budget:
+        return "exact", n
+
+    samples = max(int(time_budget / max(per_source, 1e-9)), probe)
+    logging.warning(
+        f"Exact betweenness projected at {projected:.0f}s, over the {time_budget:.0f}s "
+        f"budget, sampling {samples} sources instead."
+    )
+    return "sample", samples
+
+
+def _sample(
+    G: nk.Graph, samples: int, budget: Optional[float]
+) -> tuple[np.ndarray, int]:
+    """
+    Helper method runs source sampling in batches and combines the
+    extrapolated batch estimates weighted by batch size, so the run can
+    stop between batches when the budget is spent
+
+    Returns:
+        the scores and the number of sources actually sampled
+    """
+    n = G.numberOfNodes()
+    samples = min(samples, n)
+    batch = (
+        samples if budget is None else max(min(samples, PROBE_SAMPLES), samples // 20)
+    )
+    total = np.zeros(n)
+    taken = 0
+    start = time.perf_counter()
+
+    while taken < samples:
+        size = min(batch, samples - taken)
+        algorithm = nk.centrality.EstimateBetweenness(G, size, True, True)
+        algorithm.run()
+        total += np.asarray(algorithm.scores()) * size
+        taken += size
+
+        if budget is not None:
+            elapsed = time.perf_counter() - start
+            if elapsed + elapsed / taken * min(batch, samples - taken) > budget:
+                break
+
+    if taken < samples:
+        logging.warning(f"Time budget reached after {taken} of {samples} samples.")
+    return total / max(taken, 1), taken
@@ -0,0 +1,102 @@
+import numpy as np
+from scipy.sparse.csgraph import connected_components
+
+from csr_graph import CSRGraph
+from graph_bridge import to_scipy
+
+
+def weak_components(graph: CSRGraph) -> tuple[int, np.ndarray]:
+    """
+    Weakly connected components, edges followed in either direction. On an
+    undirected graph these are its connected components.
+
+    Params:
+        graph: the graph
+
+    Returns:
+        (number of components, component label of every node)
+    """
+    return connected_components(
+        to_scipy(graph), directed=graph.directed, connection="weak"
+    )
+
+
+def strong_components(graph: CSRGraph) -> tuple[int, np.ndarray]:
+    """
+    Strongly connected components, nodes that reach each other along edge
+    directions. A nearly acyclic graph, like a citation network, has almost
+    one component per node.
+
+    Params:
+        graph: the graph
+
+    Returns:
+        (number of components, component label of every node)
+    """
+    return connected_components(
+        to_scipy(graph), directed=graph.directed, connection="strong"
+    )
+
+
+def component_sizes(labels: np.ndarray) -> np.ndarray:
+    """
+    Params:
+        labels: component label of every node, numbered from 0
+
+    Returns:
+        the size of every component, indexed by label
+    """
+    return np.bincount(labels)
+
+
+def size_histogram(labels: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Params:
+        labels: component label of every node, numbered from 0
+
+    Returns:
+        (component sizes that occur, number of components of each size)
+    """
+    counts = np.bincount(component_sizes(labels))
+    sizes = np.flatnonzero(counts)
+    return sizes, counts[sizes]
+
+
+def condensation(graph: CSRGraph, labels: np.ndarray, num_components: int) -> CSRGraph:
+    """
+    Collapses every strongly connected component to one node, leaving a DAG
+    with an edge wherever some edge joins two components.
+
+    Params:
+        graph: a directed graph
+        labels: strong component labels, see strong_components
+        num_components: number of components
+
+    Returns:
+        the condensation, node i is component i
+    """
+    src, dst = graph.edges()
+    src, dst = labels[src], labels[dst]
+    between = src != dst
+    pairs = np.unique(src[between].astype(np.int64) * num_components + dst[between])
+    return CSRGraph.from_edges(
+        pairs // num_components, pairs % num_components, num_components, True
+    )
+
+
+def largest_component(graph: CSRGraph, labels: np.ndarray) -> CSRGraph:
+    """
+    Extracts the largest component as a compact subgraph, for metrics that
+    only mean something, or only finish, on the connected core.
+
+    Params:
+        graph: the graph
+        labels: component label of every node, see weak_components
+
+    Returns:
+        the component's induced subgraph, node ids carried over
+    """
+    if not len(labels):
+        return graph
+    largest = np.argmax(component_sizes(labels))
+    return graph.subgraph(np.flatnonzero(labels == largest))
@@ -0,0 +1,449 @@
+import argparse
+import logging
+import os
+import tempfile
+from typing import Callable, Iterator, Optional, Sequence, Union
+
+import numpy as np
+
+from csr_graph import CSRGraph
+from graph_io import (
+    CHUNK,
+    iter_binary_pairs,
+    iter_parquet_pairs,
+    iter_text_pairs,
+    labeled_edge_chunks,
+    read_binary_edges,
+    read_binary_header,
+    read_metis,
+    write_binary_edges,
+    write_metis,
+    write_parquet_pairs,
+    write_text_pairs,
+)
+from graph_snapshot import open_snapshot, source_info, write_snapshot
+from graphml_io import read_graphml, write_graphml
+from node_map import NodeMap
+
+
+# file extensions and the formats they hold
+FORMATS = {
+    ".csv": "csv",
+    ".tsv": "tsv",
+    ".txt": "edges",
+    ".edges": "edges",
+    ".edgelist": "edges",
+    ".metis": "metis",
+    ".graph": "metis",
+    ".graphml": "graphml",
+    ".csr": "snapshot",
+    ".parquet": "parquet",
+    ".edgebin": "binary",
+}
+
+# delimited text formats and their field separators
+DELIMITERS = {"csv": ",", "tsv": "\t", "edges": " "}
+
+# formats that are a plain list of edges by node id, which can be read and
+# written a chunk at a time without knowing the whole graph
+PAIR_FORMATS = ("csv", "tsv", "edges", "parquet")
+
+Pairs = Callable[[], Iterator[tuple[np.ndarray, np.ndarray]]]
+
+
+def guess_format(path: str, sniff: bool = False) -> str:
+    """
+    Params:
+        path: a graph file
+        sniff: for an existing text edge list, tell CSV, TSV and space
+            separated apart by the first line rather than the extension,
+            e.g. networkx's write_edgelist writes spaces whatever the name
+
+    Returns:
+        the format its extension stands for, see FORMATS
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(
+            f"Can't tell the format of {path}, expected an extension in "
+            f"{list(FORMATS)} or an explicit format"
+        )
+    format = FORMATS[extension]
+    if sniff and format in DELIMITERS and os.path.exists(path):
+        format = _sniff_delimiter(path) or format
+    return format
+
+
+def convert(
+    source: str,
+    target: str,
+    source_format: Optional[str] = None,
+    target_format: Optional[str] = None,
+    directed: bool = True,
+    header: Optional[bool] = None,
+    columns: Sequence[Union[str, int]] = (0, 1),
+    chunk: int = CHUNK,
+    scratch_dir: Optional[str] = None,
+) -> None:
+    """
+    Converts a graph file between CSV/TSV/space separated edge lists,
+    Parquet edge tables, binary edge lists, METIS, GraphML and CSR
+    snapshots. Between edge list formats the edges stream through a chunk
+    at a time. METIS, GraphML, snapshots and binary edge lists need every
+    node up front, so edges from an edge list are first put into CSR form
+    on disk by build_csr, in memory proportional to the nodes, not the
+    edges.
+
+    Params:
+        source: input file
+        target: output file
+        source_format: format of source, guessed from the extension by
+            default
+        target_format: format of target, likewise
+        directed: whether the edges of an edge list are directed, other
+            formats say so themselves
+        header: whether a text edge list has a header line, by default
+            CSV does and the others don't
+        columns: source and target column of an edge list, names or
+            0-based positions
+        chunk: edges handled at a time
+        scratch_dir: where build_csr keeps its arrays, the system temporary
+            directory by default
+    """
+    source_format = source_format or guess_format(source, sniff=True)
+    target_format = target_format or guess_format(target)
+    for name in (source_format, target_format):
+        if name not in FORMATS.values():
+            raise ValueError(
+                f"Unknown format {name!r}, expected one of {sorted(set(FORMATS.values()))}"
+            )
+
+    graph = None
+    if source_format in PAIR_FORMATS:
+        pairs = _pair_reader(source, source_format, header, columns, chunk)
+    elif source_format == "binary":
+        directed = read_binary_header(source)["directed"]
+        pairs = lambda: iter_binary_pairs(source, chunk=chunk)  # noqa: E731
+    else:
+        graph = _read_graph(source, source_format)
+        directed = graph.directed
+        pairs = lambda: labeled_edge_chunks(graph, chunk=chunk)  # noqa: E731
+
+    if target_format in PAIR_FORMATS:
+        if target_format == "parquet":
+            written = write_parquet_pairs(pairs(), target)
+        else:
+            names = ("source", "target") if target_format == "csv" else None
+            written = write_text_pairs(
+                pairs(), target, DELIMITERS[target_format], names
+            )
+        logging.info(f"Streamed {written} edges from {source} to {target}.")
+        return
+
+    if source_format == "binary":
+        # the file knows its nodes, isolated ones included
+        graph = read_binary_edges(source)
+    elif graph is None:
+        simple = target_format == "metis"
+        graph = build_csr(pairs, directed, simple, chunk, scratch_dir)
+
+    if target_format == "metis":
+        write_metis(graph, target, chunk)
+    elif target_format == "graphml":
+        write_graphml(graph, target)
+    elif target_format == "binary":
+        write_binary_edges(graph, target, chunk)
+    else:
+        write_snapshot(graph, target, source_info(source))
+    logging.info(
+        f"Converted {graph.num_nodes} nodes and {graph.num_edges} edges from "
+        f"{source} to {target}."
+    )
+
+
+def build_csr(
+    pairs: Pairs,
+    directed: bool = True,
+    simple: bool = False,
+    chunk: int = CHUNK,
+    scratch_dir: Optional[str] = None,
+) -> CSRGraph:
+    """
+    Builds a CSR graph from a stream of edges by node id without holding
+    the edges in memory, as an external counting sort: one pass over the
+    stream collects the node ids and another stores the edges as indices
+    in a file-backed array. From there one pass counts degrees, one
+    scatters every edge into its row of a file-backed index array and a
+    last one sorts the rows a block at a time. Memory is proportional to
+    the nodes plus one chunk.
+
+    Params:
+        pairs: opens the edge stream, called twice
+        directed: treat edges as directed
+        simple: build the undirected simple graph, as METIS wants it, with
+            both directions of every edge once and no self loops
+        chunk: edges sorted at a time in the last pass
+        scratch_dir: where the file-backed arrays go, the system
+            temporary directory by default
+
+    Returns:
+        the CSRGraph, its indices memory-mapped, with a node map back to the
+        ids
+    """
+    ids, num_edges = _node_ids(pairs, chunk)
+    node_map = NodeMap(ids)
+    n = len(node_map)
+    symmetric = simple or not directed
+    index_dtype = np.int32 if n <= np.iinfo(np.int32).max else np.int64
+    scratch_dir = scratch_dir or tempfile.gettempdir()
+
+    # look every edge up once and keep it by index on disk, the later passes
+    # read it from there rather than parsing the source again
+    mapped = _scratch(2 * num_edges, index_dtype, scratch_dir).reshape(-1, 2)
+    done = 0
+    for sources, targets in pairs():
+        mapped[done : done + len(sources), 0] = node_map.lookup(sources)
+        mapped[done : done + len(sources), 1] = node_map.lookup(targets)
+        done += len(sources)
+
+    def edges() -> Iterator[tuple[np.ndarray, np.ndarray]]:
+        for first in range(0, num_edges, chunk):
+            part = np.asarray(mapped[first : first + chunk], dtype=np.int64)
+            src, dst = part[:, 0], part[:, 1]
+            loops = src == dst
+            if simple:
+                src, dst = src[~loops], dst[~loops]
+                src, dst = np.concatenate([src, dst]), np.concatenate([dst, src])
+            elif symmetric:
+                # the reverse of a self loop is the loop itself, stored once
+                src, dst = (
+                    np.concatenate([src, dst[~loops]]),
+                    np.concatenate([dst, src[~loops]]),
+                )
+            yield src, dst
+
+    out_degree = np.zeros(n, dtype=np.int64)
+    in_degree = np.zeros(n, dtype=np.int64) if not symmetric else out_degree
+    for src, dst in edges():
+        np.add.at(out_degree, src, 1)
+        if not symmetric:
+            np.add.at(in_degree, dst, 1)
+
+    indptr = _pointers(out_degree)
+    indices = _scratch(int(indptr[-1]), index_dtype, scratch_dir)
+    if symmetric:
+        in_indptr, in_indices = indptr, indices
+    else:
+        in_indptr = _pointers(in_degree)
+        in_indices = _scratch(int(in_indptr[-1]), index_dtype, scratch_dir)
+
+    out_next = indptr[:-1].copy()
+    in_next = in_indptr[:-1].copy()
+    for src, dst in edges():
+        _scatter(src, dst, out_next, indices)
+        if not symmetric:
+            _scatter(dst, src, in_next, in_indices)
+
+    indptr, indices = _sort_rows(indptr, indices, simple, chunk)
+    if simple:
+        in_indptr, in_indices = indptr, indices
+        num_edges = len(indices) // 2
+    elif not symmetric:
+        in_indptr, in_indices = _sort_rows(in_indptr, in_indices, False, chunk)
+    return CSRGraph(
+        indptr,
+        indices,
+        in_indptr,
+        in_indices,
+        num_edges,
+        directed and not simple,
+        node_map,
+    )
+
+
+def _pair_reader(
+    path: str,
+    format: str,
+    header: Optional[bool],
+    columns: Sequence[Union[str, int]],
+    chunk: int,
+) -> Pairs:
+    """
+    Helper method opens an edge list format as a repeatable edge stream
+    """
+    if format == "parquet":
+        names = columns if all(isinstance(c, str) for c in columns) else None
+        return lambda: iter_parquet_pairs(path, names or ("source", "target"), chunk)
+    if header is None:
+        header = format == "csv"
+    return lambda: iter_text_pairs(path, DELIMITERS[format], header, columns, chunk)
+
+
+def _sniff_delimiter(path: str) -> Optional[str]:
+    """
+    Helper method names the text edge list format whose separator shows up
+    in the first line that isn't a comment, None for an empty file
+    """
+    with open(path, encoding="utf-8", errors="replace") as file:
+        for line in file:
+            if not line.strip() or line.startswith("#"):
+                continue
+            for format in ("tsv", "csv"):
+                if DELIMITERS[format] in line:
+                    return format
+            return "edges"
+    return None
+
+
+def _read_graph(path: str, format: str) -> CSRGraph:
+    """
+    Helper method opens a format that holds a whole graph
+    """
+    if format == "metis":
+        return read_metis(path)
+    if format == "graphml":
+        return read_graphml(path)[0]
+    return open_snapshot(path)
+
+
+def _node_ids(pairs: Pairs, chunk: int) -> tuple[np.ndarray, int]:
+    """
+    Helper method collects the distinct node ids of an edge stream, merging
+    the ids of several chunks at a time, and counts the edges
+    """
+    ids = np.empty(0, dtype=np.int64)
+    pending: list[np.ndarray] = []
+    size = 0
+    num_edges = 0
+    for sources, targets in pairs():
+        num_edges += len(sources)
+        pending.append(_distinct(np.concatenate([sources, targets])))
+        size += len(pending[-1])
+        if size > len(ids) + chunk:
+            ids = _distinct(np.concatenate([ids] + pending))
+            pending, size = [], 0
+    return _distinct(np.concatenate([ids] + pending)), num_edges
+
+
+def _distinct(values: np.ndarray) -> np.ndarray:
+    """
+    Helper method gives the sorted distinct values, by sorting, which beats
+    np.unique's hashing on large integer arrays
+    """
+    values = np.sort(values)
+    return (
+        values[np.concatenate([[True], values[1:] != values[:-1]])]
+        if len(values)
+        else values
+    )
+
+
+def _pointers(degree: np.ndarray) -> np.ndarray:
+    """
+    Helper method turns degrees into a row pointer array
+    """
+    indptr = np.zeros(len(degree) + 1, dtype=np.int64)
+    np.cumsum(degree, out=indptr[1:])
+    return indptr
+
+
+def _scratch(size: int, dtype: type, scratch_dir: str) -> np.ndarray:
+    """
+    Helper method maps a writable array onto a temporary file, which is
+    removed right away and lives as long as the mapping
+    """
+    if size == 0:
+        return np.empty(0, dtype=dtype)
+    fd, path = tempfile.mkstemp(suffix=".csr", dir=scratch_dir)
+    os.close(fd)
+    try:
+        return np.memmap(path, dtype=dtype, mode="w+", shape=(size,))
+    finally:
+        os.remove(path)
+
+
+def _scatter(
+    rows: np.ndarray, cols: np.ndarray, next_free: np.ndarray, out: np.ndarray
+) -> None:
+    """
+    Helper method writes a chunk of edges to the next free places of their
+    rows and advances those rows' positions
+    """
+    if not len(rows):
+        return
+    order = np.argsort(rows, kind="stable")
+    rows, cols = rows[order], cols[order]
+    starts = np.flatnonzero(np.concatenate([[True], rows[1:] != rows[:-1]]))
+    counts = np.diff(np.append(starts, len(rows)))
+    offset = np.arange(len(rows)) - np.repeat(starts, counts)
+    out[next_free[rows] + offset] = cols
+    next_free[rows[starts]] += counts
+
+
+def _sort_rows(
+    indptr: np.ndarray, indices: np.ndarray, simple: bool, chunk: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Helper method sorts every row's neighbors in place, a block of rows at a
+    time, and with simple drops repeated neighbors, closing the gaps
+    """
+    n = len(indptr) - 1
+    counts = np.diff(indptr)
+    written = 0
+    first = 0
+    while first < n:
+        last = int(np.searchsorted(indptr, indptr[first] + chunk, side="right"))
+        last = min(max(last - 1, first + 1), n)
+        lo, hi = int(indptr[first]), int(indptr[last])
+        rows = np.repeat(np.arange(last - first, dtype=np.int64), counts[first:last])
+        keys = np.sort(rows * max(n, 1) + np.asarray(indices[lo:hi], dtype=np.int64))
+        if simple and len(keys):
+            keys = keys[np.concatenate([[True], keys[1:] != keys[:-1]])]
+            counts[first:last] = np.bincount(keys // n, minlength=last - first)
+        indices[written : written + len(keys)] = keys % max(n, 1)
+        written += len(keys)
+        first = last
+    return _pointers(counts), indices[:written]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Convert a graph between edge lists (.csv, .tsv, .txt), "
+        "Parquet edge tables, binary edge lists (.edgebin), METIS (.metis), "
+        "GraphML (.graphml) and CSR snapshots (.csr)."
+    )
+    parser.add_argument("source")
+    parser.add_argument("target")
+    parser.add_argument("--from", dest="source_format", default=None)
+    parser.add_argument("--to", dest="target_format", default=None)
+    parser.add_argument(
+        "--undirected", action="store_true", help="edges of an edge list go both ways"
+    )
+    parser.add_argument("--header", action=argparse.BooleanOptionalAction, default=None)
+    parser.add_argument(
+        "--columns",
+        nargs=2,
+        default=["0", "1"],
+        help="source and target column of an edge list, names or positions",
+    )
+    parser.add_argument("--scratch-dir", default=None)
+    args = parser.parse_args()
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(levelname)s:%(message)s"
+    )
+
+    columns = [int(column) if column.isdigit() else column for column in args.columns]
+    convert(
+        args.source,
+        args.target,
+        args.source_format,
+        args.target_format,
+        directed=not args.undirected,
+        header=args.header,
+        columns=columns,
+        scratch_dir=args.scratch_dir,
+    )
+
+
+if __name__ == "__main__":
+    main()
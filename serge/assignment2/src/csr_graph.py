@@ -0,0 +1,168 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from graph_loader import to_networkit
+from node_map import NodeMap
+
+
+@dataclass
+class CSRGraph:
+    """
+    A graph stored as compressed sparse row arrays. indices[indptr[v] :
+    indptr[v + 1]] are the out-neighbors of node v, sorted ascending, and
+    in_indptr / in_indices hold the in-neighbors the same way. Undirected
+    graphs store every edge in both rows and share the in- and out-arrays.
+    """
+
+    indptr: np.ndarray
+    indices: np.ndarray
+    in_indptr: np.ndarray
+    in_indices: np.ndarray
+    num_edges: int
+    directed: bool = True
+    node_map: Optional[NodeMap] = None
+
+    @classmethod
+    def from_edges(
+        cls,
+        src: np.ndarray,
+        dst: np.ndarray,
+        num_nodes: int,
+        directed: bool = True,
+        node_map: Optional[NodeMap] = None,
+    ) -> "CSRGraph":
+        """
+        Builds the CSR arrays from an edge list with one sort per direction.
+
+        Params:
+            src: source index of each edge
+            dst: target index of each edge
+            num_nodes: number of nodes, including any without edges
+            directed: treat edges as directed
+            node_map: maps node indices back to original ids
+
+        Returns:
+            a new CSRGraph
+        """
+        src = np.asarray(src, dtype=np.int64)
+        dst = np.asarray(dst, dtype=np.int64)
+        num_edges = len(src)
+
+        if not directed:
+            # store both directions, self loops only once
+            loops = src == dst
+            src, dst = (
+                np.concatenate([src, dst[~loops]]),
+                np.concatenate([dst, src[~loops]]),
+            )
+
+        indptr, indices = _compress(src, dst, num_nodes)
+        if directed:
+            in_indptr, in_indices = _compress(dst, src, num_nodes)
+        else:
+            in_indptr, in_indices = indptr, indices
+
+        return cls(
+            indptr, indices, in_indptr, in_indices, num_edges, directed, node_map
+        )
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.indptr) - 1
+
+    def out_degree(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+    def in_degree(self) -> np.ndarray:
+        return np.diff(self.in_indptr)
+
+    def neighbors(self, node: int) -> np.ndarray:
+        return self.indices[self.indptr[node] : self.indptr[node + 1]]
+
+    def edges(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Expands the CSR arrays back into an edge list, undirected edges are
+        returned once.
+
+        Returns:
+            (src, dst) index arrays
+        """
+        src = np.repeat(
+            np.arange(self.num_nodes, dtype=self.indices.dtype), self.out_degree()
+        )
+        dst = np.asarray(self.indices)
+        if not self.directed:
+            keep = src <= dst
+            src, dst = src[keep], dst[keep]
+        return src, dst
+
+    def out_edges(self, nodes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        The out-edges of a set of nodes, gathered from their rows at once, in
+        time proportional to the edges returned.
+
+        Params:
+            nodes: node indices
+
+        Returns:
+            (src, dst) index arrays
+        """
+        nodes = np.asarray(nodes, dtype=np.int64)
+        starts = np.asarray(self.indptr[nodes])
+        counts = np.asarray(self.indptr[nodes + 1]) - starts
+        total = int(counts.sum())
+        offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+        dst = np.asarray(self.indices[offsets + np.arange(total)], dtype=np.int64)
+        return np.repeat(nodes, counts), dst
+
+    def subgraph(self, nodes: np.ndarray) -> "CSRGraph":
+        """
+        The subgraph induced by a set of nodes, renumbered 0..len(nodes)-1 in
+        ascending order of their old indices. Only the rows of the kept nodes
+        are read, so a small subgraph of a huge graph is cheap. The node map
+        is carried over, so original ids still resolve.
+
+        Params:
+            nodes: indices of the nodes to keep
+
+        Returns:
+            a new, compact CSRGraph
+        """
+        nodes = np.unique(np.asarray(nodes, dtype=np.int64))
+        src, dst = self.out_edges(nodes)
+        src = np.searchsorted(nodes, src)
+        position = np.searchsorted(nodes, dst).clip(max=max(len(nodes) - 1, 0))
+        keep = nodes[position] == dst if len(nodes) else np.zeros(0, dtype=bool)
+        src, dst = src[keep], position[keep]
+        if not self.directed:
+            # rows hold both directions, keep each edge once
+            src, dst = src[src <= dst], dst[src <= dst]
+
+        node_map = None
+        if self.node_map is not None:
+            node_map = NodeMap(np.asarray(self.node_map.ids)[nodes])
+        return CSRGraph.from_edges(src, dst, len(nodes), self.directed, node_map)
+
+    def to_networkit(self):
+        """
+        Returns:
+            the graph as a networkit Graph, node i is index i
+        """
+        return to_networkit(*self.edges(), self.num_nodes, self.directed)
+
+
+def _compress(
+    rows: np.ndarray, cols: np.ndarray, num_nodes: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Helper method sorts an edge list by (row, col) and returns the row
+    pointer and column arrays
+    """
+    order = np.argsort(rows * num_nodes + cols)
+    counts = np.bincount(rows, minlength=num_nodes)
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    index_dtype = np.int32 if num_nodes <= np.iinfo(np.int32).max else np.int64
+    return indptr, cols[order].astype(index_dtype)
@@ -0,0 +1,374 @@
+import math
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+from scipy import optimize, special, stats
+
+
+# candidate rows per block of the xmin scan, bounds its memory to about
+# SCAN_CELLS floats
+SCAN_CELLS = 1 << 22
+
+
+def log_binned(
+    degrees: np.ndarray, bins_per_decade: int = 10
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Degree distribution in logarithmically growing bins, the usual way to
+    show a heavy tail without the noise of the raw histogram. Degree 0 is
+    left out, it has no place on a log axis.
+
+    Params:
+        degrees: degree of every node
+        bins_per_decade: bins per factor of 10
+
+    Returns:
+        (bin centers, probability density of each bin), empty bins dropped
+    """
+    histogram = np.bincount(np.asarray(degrees, dtype=np.int64))
+    if len(histogram) < 2:
+        return np.empty(0), np.empty(0)
+
+    decades = math.log10(len(histogram))
+    edges = np.unique(
+        np.floor(np.logspace(0, decades, int(decades * bins_per_decade) + 2))
+    ).astype(np.int64)
+    edges = edges[edges < len(histogram)]
+    edges = np.append(edges, len(histogram))
+
+    counts = np.add.reduceat(histogram, edges[:-1])
+    widths = np.diff(edges)
+    density = counts / (widths * histogram.sum())
+    centers = np.sqrt(edges[:-1] * (edges[1:] - 1).clip(min=edges[:-1]))
+
+    keep = counts > 0
+    return centers[keep], density[keep]
+
+
+def ccdf(degrees: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Complementary cumulative distribution, P(degree >= x) at every degree x
+    that occurs.
+
+    Params:
+        degrees: degree of every node
+
+    Returns:
+        (degrees, P(degree >= x))
+    """
+    histogram = np.bincount(np.asarray(degrees, dtype=np.int64))
+    at_least = np.cumsum(histogram[::-1])[::-1]
+    present = np.flatnonzero(histogram)
+    return present, at_least[present] / max(len(degrees), 1)
+
+
+@dataclass
+class DistributionFit:
+    """
+    A discrete distribution fitted to the tail x >= xmin by maximum
+    likelihood. name is power_law, lognormal or exponential.
+    """
+
+    name: str
+    xmin: int
+    params: dict
+    loglikelihood: float
+    n: int
+
+    def logpmf(self, x: np.ndarray) -> np.ndarray:
+        """
+        Params:
+            x: values at or above xmin
+
+        Returns:
+            log probability of each value under the fit
+        """
+        x = np.asarray(x, dtype=np.float64)
+        if self.name == "power_law":
+            alpha = self.params["alpha"]
+            return -alpha * np.log(x) - math.log(special.zeta(alpha, self.xmin))
+        if self.name == "lognormal":
+            return _lognormal_logpmf(
+                x, self.params["mu"], self.params["sigma"], self.xmin
+            )
+        if self.name == "exponential":
+            rate = self.params["lambda"]
+            return math.log(-math.expm1(-rate)) - rate * (x - self.xmin)
+        raise ValueError(f"Unknown distribution {self.name!r}")
+
+    def ccdf(self, x: np.ndarray) -> np.ndarray:
+        """
+        Params:
+            x: values at or above xmin
+
+        Returns:
+            P(X >= x) under the fit, conditioned on X >= xmin
+        """
+        x = np.asarray(x, dtype=np.float64)
+        if self.name == "power_law":
+            alpha = self.params["alpha"]
+            return special.zeta(alpha, x) / special.zeta(alpha, self.xmin)
+        if self.name == "lognormal":
+            mu, sigma = self.params["mu"], self.params["sigma"]
+            return np.exp(
+                stats.norm.logsf((np.log(x - 0.5) - mu) / sigma)
+                - stats.norm.logsf((math.log(self.xmin - 0.5) - mu) / sigma)
+            )
+        if self.name == "exponential":
+            return np.exp(-self.params["lambda"] * (x - self.xmin))
+        raise ValueError(f"Unknown distribution {self.name!r}")
+
+
+@dataclass
+class Comparison:
+    """
+    Vuong's likelihood ratio test between two fits on the same tail. A
+    positive ratio favors first, and the sign is only meaningful when
+    p_value is small.
+    """
+
+    first: str
+    second: str
+    ratio: float
+    p_value: float
+
+    @property
+    def preferred(self) -> Optional[str]:
+        if self.p_value >= 0.1:
+            return None
+        return self.first if self.ratio > 0 else self.second
+
+
+@dataclass
+class TailAnalysis:
+    """
+    The fits to a degree distribution's tail, ks is the power law's
+    Kolmogorov-Smirnov distance at the chosen xmin.
+    """
+
+    xmin: int
+    n_tail: int
+    ks: float
+    fits: dict[str, DistributionFit]
+    comparisons: list[Comparison] = field(default_factory=list)
+
+
+def fit_power_law(
+    degrees: np.ndarray, xmin: Optional[int] = None, min_tail: int = 50
+) -> tuple[DistributionFit, float]:
+    """
+    Fits a discrete power law p(x) ~ x^-alpha to x >= xmin. Without an xmin,
+    every candidate is scanned at once and the one whose fit is closest to
+    the data in KS distance wins (Clauset, Shalizi and Newman). The scan
+    uses the closed form approximate alpha from suffix sums over the sorted
+    unique degrees, then alpha is refined by exact maximum likelihood.
+
+    Params:
+        degrees: degree of every node
+        xmin: start of the tail, scanned when None
+        min_tail: fewest nodes a candidate tail may hold
+
+    Returns:
+        the fit and its KS distance
+    """
+    values, counts = _tail_counts(degrees, 1)
+    if not len(values):
+        raise ValueError("No positive degrees to fit")
+
+    if xmin is None:
+        xmin = _scan_xmin(values, counts, min_tail)
+    values, counts = values[values >= xmin], counts[values >= xmin]
+    n = int(counts.sum())
+    log_sum = float(np.dot(counts, np.log(values)))
+
+    def negative_loglikelihood(alpha: float) -> float:
+        return alpha * log_sum + n * math.log(special.zeta(alpha, xmin))
+
+    guess = 1 + n / max(log_sum - n * math.log(xmin - 0.5), 1e-12)
+    alpha = float(
+        optimize.minimize_scalar(
+            negative_loglikelihood,
+            bounds=(1 + 1e-6, max(guess * 2, 6.0)),
+            method="bounded",
+        ).x
+    )
+
+    fit = DistributionFit(
+        "power_law", xmin, {"alpha": alpha}, -negative_loglikelihood(alpha), n
+    )
+    empirical = np.cumsum(counts[::-1])[::-1] / n
+    return fit, float(np.abs(empirical - fit.ccdf(values)).max())
+
+
+def fit_lognormal(degrees: np.ndarray, xmin: int = 1) -> DistributionFit:
+    """
+    Fits a discretized lognormal, truncated to x >= xmin, by maximum
+    likelihood.
+
+    Params:
+        degrees: degree of every node
+        xmin: start of the tail
+
+    Returns:
+        the fit
+    """
+    values, counts = _tail_counts(degrees, xmin)
+    n = int(counts.sum())
+    logs = np.log(values)
+    mean = np.dot(counts, logs) / n
+    spread = math.sqrt(max(np.dot(counts, (logs - mean) ** 2) / n, 1e-4))
+
+    def negative_loglikelihood(theta: np.ndarray) -> float:
+        mu, log_sigma = theta
+        return -np.dot(counts, _lognormal_logpmf(values, mu, math.exp(log_sigma), xmin))
+
+    result = optimize.minimize(
+        negative_loglikelihood, [mean, math.log(spread)], method="Nelder-Mead"
+    )
+    mu, log_sigma = result.x
+    return DistributionFit(
+        "lognormal",
+        xmin,
+        {"mu": float(mu), "sigma": math.exp(log_sigma)},
+        float(-result.fun),
+        n,
+    )
+
+
+def fit_exponential(degrees: np.ndarray, xmin: int = 1) -> DistributionFit:
+    """
+    Fits a discrete exponential p(x) ~ exp(-lambda x) to x >= xmin, its
+    maximum likelihood rate has a closed form.
+
+    Params:
+        degrees: degree of every node
+        xmin: start of the tail
+
+    Returns:
+        the fit
+    """
+    values, counts = _tail_counts(degrees, xmin)
+    n = int(counts.sum())
+    excess = np.dot(counts, values) / n - xmin
+    rate = math.log1p(1 / excess) if excess > 0 else 50.0
+    fit = DistributionFit("exponential", xmin, {"lambda": rate}, 0.0, n)
+    fit.loglikelihood = float(np.dot(counts, fit.logpmf(values)))
+    return fit
+
+
+def likelihood_ratio(
+    first: DistributionFit, second: DistributionFit, degrees: np.ndarray
+) -> Comparison:
+    """
+    Vuong's test of which of two fits describes the tail better.
+
+    Params:
+        first: a fit
+        second: another fit with the same xmin
+        degrees: degree of every node
+
+    Returns:
+        the Comparison
+    """
+    if first.xmin != second.xmin:
+        raise ValueError("Fits must share an xmin to be compared")
+    values, counts = _tail_counts(degrees, first.xmin)
+    n = counts.sum()
+
+    pointwise = first.logpmf(values) - second.logpmf(values)
+    ratio = float(np.dot(counts, pointwise))
+    variance = np.dot(counts, (pointwise - ratio / n) ** 2) / n
+    if variance <= 0:
+        return Comparison(first.name, second.name, ratio, 1.0)
+    p_value = math.erfc(abs(ratio) / math.sqrt(2 * n * variance))
+    return Comparison(first.name, second.name, ratio, p_value)
+
+
+def analyze_degrees(
+    degrees: np.ndarray, xmin: Optional[int] = None, min_tail: int = 50
+) -> TailAnalysis:
+    """
+    Fits power law, lognormal and exponential tails and compares the power
+    law against the other two.
+
+    Params:
+        degrees: degree of every node
+        xmin: start of the tail, chosen by the power law scan when None
+        min_tail: fewest nodes a candidate tail may hold
+
+    Returns:
+        the TailAnalysis
+    """
+    power_law, ks = fit_power_law(degrees, xmin, min_tail)
+    fits = {
+        "power_law": power_law,
+        "lognormal": fit_lognormal(degrees, power_law.xmin),
+        "exponential": fit_exponential(degrees, power_law.xmin),
+    }
+    comparisons = [
+        likelihood_ratio(power_law, fits["lognormal"], degrees),
+        likelihood_ratio(power_law, fits["exponential"], degrees),
+    ]
+    return TailAnalysis(power_law.xmin, power_law.n, ks, fits, comparisons)
+
+
+def _tail_counts(degrees: np.ndarray, xmin: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Helper method collapses the degrees at or above xmin to their distinct
+    values and counts, every fit runs on these instead of one entry per node
+    """
+    histogram = np.bincount(np.asarray(degrees, dtype=np.int64))
+    values = np.flatnonzero(histogram)
+    values = values[values >= max(xmin, 1)]
+    return values.astype(np.float64), histogram[values].astype(np.float64)
+
+
+def _scan_xmin(values: np.ndarray, counts: np.ndarray, min_tail: int) -> int:
+    """
+    Helper method scores every candidate xmin at once. Row i of each block is
+    the tail starting at values[i], its alpha comes from suffix sums and its
+    KS distance compares the empirical and fitted tails over all values
+    """
+    # nodes and summed log degree at or above each distinct value
+    tail_size = np.cumsum(counts[::-1])[::-1]
+    tail_logs = np.cumsum((counts * np.log(values))[::-1])[::-1]
+
+    # a tail holding only the largest value always fits, it's no candidate
+    candidates = np.flatnonzero((tail_size >= min_tail) & (values < values[-1]))
+    if len(candidates) == 0:
+        return int(values[0])
+
+    shifted = np.log(values - 0.5)
+    alphas = 1 + tail_size[candidates] / (
+        tail_logs[candidates] - tail_size[candidates] * shifted[candidates]
+    )
+
+    best_distance, best = np.inf, int(values[0])
+    block = max(1, SCAN_CELLS // len(values))
+    for start in range(0, len(candidates), block):
+        rows = candidates[start : start + block]
+        alpha = alphas[start : start + block, None]
+
+        # P(X >= x | X >= xmin) measured and under the fitted power law
+        empirical = tail_size[None, :] / tail_size[rows, None]
+        fitted = np.exp((1 - alpha) * (shifted[None, :] - shifted[rows, None]))
+        outside = np.arange(len(values))[None, :] < rows[:, None]
+        distance = np.where(outside, 0.0, np.abs(empirical - fitted)).max(axis=1)
+
+        i = int(np.argmin(distance))
+        if distance[i] < best_distance:
+            best_distance, best = distance[i], int(values[rows[i]])
+    return best
+
+
+def _lognormal_logpmf(x: np.ndarray, mu: float, sigma: float, xmin: int) -> np.ndarray:
+    """
+    Helper method is the log probability of a lognormal discretized to
+    integer bins [x - 0.5, x + 0.5) and truncated at xmin, computed from
+    survival functions so far tails don't round to zero
+    """
+    lower = stats.norm.logsf((np.log(x - 0.5) - mu) / sigma)
+    upper = stats.norm.logsf((np.log(x + 0.5) - mu) / sigma)
+    mass = lower + np.log(-np.expm1(np.minimum(upper - lower, -1e-300)))
+    return mass - stats.norm.logsf((math.log(xmin - 0.5) - mu) / sigma)
@@ -0,0 +1,168 @@
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+from csr_graph import CSRGraph
+
+
+@dataclass
+class DegreeSummary:
+    """
+    Degree statistics of a graph. degree is the total degree, in plus out on
+    directed graphs, with a self loop counting twice as networkx does, and
+    histogram[d] is the number of nodes of total degree d. Density leaves
+    self loops out, as networkit's graphtools.density does.
+    """
+
+    num_nodes: int
+    num_edges: int
+    directed: bool
+    in_degree: np.ndarray
+    out_degree: np.ndarray
+    degree: np.ndarray
+    histogram: np.ndarray
+    min: int
+    max: int
+    mean: float
+    median: float
+    mode: int
+    isolates: int
+    density: float
+
+    def rows(self) -> list[tuple[str, Any]]:
+        """
+        Returns:
+            (statistic, value) pairs for a summary table
+        """
+        return [
+            ("Nodes", self.num_nodes),
+            ("Edges", self.num_edges),
+            ("Minimum Degree", self.min),
+            ("Maximum Degree", self.max),
+            ("Mean Degree", self.mean),
+            ("Mode Degree", self.mode),
+            ("Median Degree", self.median),
+            ("Isolated Nodes", self.isolates),
+            ("Density", self.density),
+        ]
+
+
+def degree_summary(
+    src: np.ndarray, dst: np.ndarray, num_nodes: int, directed: bool = True
+) -> DegreeSummary:
+    """
+    Computes every degree statistic from an edge list, one bincount per
+    endpoint array and the rest from the degree histogram.
+
+    Params:
+        src: source index of each edge
+        dst: target index of each edge
+        num_nodes: number of nodes, including any without edges
+        directed: treat edges as directed
+
+    Returns:
+        the DegreeSummary
+    """
+    out_degree = np.bincount(src, minlength=num_nodes)
+    in_degree = np.bincount(dst, minlength=num_nodes)
+    degree = out_degree + in_degree
+    loops = int(np.count_nonzero(src == dst))
+
+    if not directed:
+        out_degree = in_degree = degree
+    return summarize_degrees(
+        len(src), loops, directed, in_degree, out_degree, degree, num_nodes
+    )
+
+
+def summarize_graph(graph: CSRGraph) -> DegreeSummary:
+    """
+    Computes every degree statistic of a CSR graph, the degrees are
+    differences of the row pointers so only self loops need an edge pass.
+
+    Params:
+        graph: the graph
+
+    Returns:
+        the DegreeSummary
+    """
+    n = graph.num_nodes
+    out_degree = np.diff(graph.indptr)
+    rows = np.repeat(np.arange(n, dtype=graph.indices.dtype), out_degree)
+    on_loop = rows == graph.indices
+    loops = int(np.count_nonzero(on_loop))
+
+    if graph.directed:
+        in_degree = np.diff(graph.in_indptr)
+        degree = out_degree + in_degree
+    else:
+        # undirected rows hold a self loop once, networkx counts it twice
+        degree = out_degree + np.bincount(rows[on_loop], minlength=n)
+        in_degree = out_degree = degree
+    return summarize_degrees(
+        graph.num_edges, loops, graph.directed, in_degree, out_degree, degree, n
+    )
+
+
+def summarize_degrees(
+    num_edges: int,
+    loops: int,
+    directed: bool,
+    in_degree: np.ndarray,
+    out_degree: np.ndarray,
+    degree: np.ndarray,
+    num_nodes: int,
+) -> DegreeSummary:
+    """
+    Builds the summary from degree arrays that are already counted, the
+    order statistics are read off the degree histogram, which is only as
+    long as the maximum degree.
+
+    Params:
+        num_edges: number of edges
+        loops: number of self loops among them
+        directed: whether the edges are directed
+        in_degree: in-degree of every node
+        out_degree: out-degree of every node
+        degree: total degree of every node
+        num_nodes: number of nodes
+
+    Returns:
+        the DegreeSummary
+    """
+    histogram = np.bincount(degree) if num_nodes else np.zeros(1, dtype=np.int64)
+    present = np.flatnonzero(histogram)
+
+    if num_nodes:
+        # the two middle positions of the sorted degrees, equal for odd n
+        cumulative = np.cumsum(histogram)
+        middle = np.searchsorted(
+            cumulative, [(num_nodes - 1) // 2, num_nodes // 2], side="right"
+        )
+        median = float(middle.mean())
+        mean = float(np.dot(np.arange(len(histogram)), histogram) / num_nodes)
+    else:
+        median = mean = 0.0
+
+    possible = num_nodes * (num_nodes - 1)
+    if not directed:
+        possible /= 2
+    density = (num_edges - loops) / possible if possible else 0.0
+
+    return DegreeSummary(
+        num_nodes,
+        num_edges,
+        directed,
+        in_degree,
+        out_degree,
+        degree,
+        histogram,
+        int(present[0]) if num_nodes else 0,
+        int(present[-1]) if num_nodes else 0,
+        mean,
+        median,
+        int(np.argmax(histogram)),
+        int(histogram[0]) if num_nodes else 0,
+        density,
+    )
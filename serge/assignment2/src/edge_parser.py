@@ -0,0 +1,243 @@
+import io
+import logging
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+
+# files smaller than this are parsed in-process, a pool isn't worth starting
+PARALLEL_THRESHOLD = 32 << 20
+RANGES_PER_WORKER = 4
+
+
+def read_edge_list(
+    path: str,
+    columns: Sequence[Union[str, int]] = ("citing_iid", "cited_iid"),
+    delimiter: str = ",",
+    header: bool = True,
+    workers: Optional[int] = None,
+    scratch_dir: Optional[str] = None,
+) -> tuple[np.ndarray, ...]:
+    """
+    Parses integer columns of a large delimited edge file on every core.
+
+    The file is split into byte ranges aligned to line breaks. Each worker
+    process parses its range straight into typed int64 arrays in a shared,
+    file-backed mapping, at the row offset its range starts at, so nothing
+    is concatenated or copied afterwards. Rows that don't parse as integers
+    or are missing a selected column are skipped, fields past the last
+    expected column are ignored.
+
+    Params:
+        path: the edge file
+        columns: column names (requires header) or 0-based positions to read
+        delimiter: field separator, ',' for CSV and '\\t' for TSV
+        header: whether the first line holds column names
+        workers: worker processes, defaults to the number of cores
+        scratch_dir: where the shared output mapping lives, defaults to
+            /dev/shm when it exists
+
+    Returns:
+        one int64 array per requested column, in the order requested
+    """
+    size = os.path.getsize(path)
+    start, positions, num_fields = _resolve_columns(path, columns, delimiter, header)
+    workers = workers or os.cpu_count() or 1
+    if size - start < PARALLEL_THRESHOLD:
+        workers = 1
+
+    ranges = _split_ranges(path, start, size, workers * RANGES_PER_WORKER)
+
+    # count rows first so every range knows where its output starts
+    if workers == 1:
+        counts = [_count_rows(path, lo, hi) for lo, hi in ranges]
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            counts = list(
+                pool.map(_count_rows, *zip(*[(path, lo, hi) for lo, hi in ranges]))
+            )
+    offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+    total = int(offsets[-1])
+
+    scratch_dir = scratch_dir or (
+        "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    )
+    fd, out_path = tempfile.mkstemp(suffix=".edges", dir=scratch_dir)
+    os.close(fd)
+
+    try:
+        shape = (len(positions), max(total, 1))
+        out = np.memmap(out_path, dtype=np.int64, mode="w+", shape=shape)
+        jobs = [
+            (
+                path,
+                lo,
+                hi,
+                positions,
+                num_fields,
+                delimiter,
+                out_path,
+                shape,
+                int(offset),
+            )
+            for (lo, hi), offset in zip(ranges, offsets[:-1])
+        ]
+        if workers == 1:
+            parsed = [_parse_range(*job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(workers) as pool:
+                parsed = list(pool.map(_parse_range, *zip(*jobs)))
+    finally:
+        # the mapping stays valid after the name is gone
+        os.remove(out_path)
+
+    # close the gaps left by skipped rows, in place
+    kept = 0
+    for offset, count in zip(offsets[:-1], parsed):
+        if kept != offset:
+            out[:, kept : kept + count] = out[:, offset : offset + count]
+        kept += count
+
+    skipped = total - kept
+    if skipped:
+        logging.warning(f"Skipped {skipped} malformed rows in {path}.")
+
+    return tuple(out[i, :kept] for i in range(len(positions)))
+
+
+def _resolve_columns(
+    path: str,
+    columns: Sequence[Union[str, int]],
+    delimiter: str,
+    header: bool,
+) -> tuple[int, list[int], int]:
+    """
+    Helper method finds where the data starts, maps the requested columns to
+    field positions and works out how many fields a row should have
+    """
+    if not header:
+        if not all(isinstance(column, int) for column in columns):
+            raise ValueError("Columns must be positions when the file has no header")
+        return 0, list(columns), max(columns) + 1
+
+    with open(path, "rb") as file:
+        first_line = file.readline()
+    names = first_line.decode().rstrip("\r\n").split(delimiter)
+
+    positions = []
+    for column in columns:
+        if isinstance(column, int):
+            positions.append(column)
+        elif column in names:
+            positions.append(names.index(column))
+        else:
+            raise ValueError(f"Column {column!r} not found in header {names}")
+    return len(first_line), positions, max(len(names), max(positions) + 1)
+
+
+def _split_ranges(path: str, start: int, end: int, parts: int) -> list[tuple[int, int]]:
+    """
+    Helper method cuts [start, end) into about equal byte ranges, moving
+    every cut forward to just past the next line break
+    """
+    cuts = [start]
+    with open(path, "rb") as file:
+        for i in range(1, parts):
+            position = max(start + (end - start) * i // parts, cuts[-1])
+            file.seek(position)
+            file.readline()
+            cuts.append(min(file.tell(), end))
+    cuts.append(end)
+    return [(lo, hi) for lo, hi in zip(cuts, cuts[1:]) if hi > lo]
+
+
+def _count_rows(path: str, lo: int, hi: int) -> int:
+    """
+    Helper method counts the lines in a byte range, a last line without a
+    trailing line break still counts
+    """
+    count = 0
+    last = b"\n"
+    with open(path, "rb") as file:
+        file.seek(lo)
+        remaining = hi - lo
+        while remaining > 0:
+            block = file.read(min(remaining, 16 << 20))
+            if not block:
+                break
+            count += block.count(b"\n")
+            last = block[-1:]
+            remaining -= len(block)
+    return count + (last != b"\n")
+
+
+def _parse_range(
+    path: str,
+    lo: int,
+    hi: int,
+    positions: list[int],
+    num_fields: int,
+    delimiter: str,
+    out_path: str,
+    shape: tuple[int, int],
+    offset: int,
+) -> int:
+    """
+    Helper method parses one byte range and writes its rows into the shared
+    output starting at offset
+
+    Returns:
+        the number of rows kept
+    """
+    with open(path, "rb") as file:
+        file.seek(lo)
+        data = file.read(hi - lo)
+
+    options = dict(
+        sep=delimiter,
+        header=None,
+        names=range(num_fields),
+        usecols=positions,
+        index_col=False,
+        on_bad_lines="skip",
+        skip_blank_lines=True,
+        engine="c",
+    )
+    try:
+        frame = pd.read_csv(io.BytesIO(data), dtype=np.int64, **options)
+        values = frame[positions].to_numpy()
+    except pd.errors.EmptyDataError:
+        return 0
+    except (ValueError, TypeError):
+        # some row is malformed, only this range takes the slow path
+        values = _parse_lines(data, positions, delimiter)
+
+    out = np.memmap(out_path, dtype=np.int64, mode="r+", shape=shape)
+    out[:, offset : offset + len(values)] = values.T
+    out.flush()
+    return len(values)
+
+
+def _parse_lines(data: bytes, positions: list[int], delimiter: str) -> np.ndarray:
+    """
+    Helper method parses a range line by line, keeping only the rows whose
+    selected fields are all integers
+    """
+    rows = []
+    separator = delimiter.encode()
+    needed = max(positions) + 1
+
+    for line in data.splitlines():
+        fields = line.split(separator)
+        if len(fields) < needed:
+            continue
+        try:
+            rows.append([int(fields[position]) for position in positions])
+        except ValueError:
+            continue
+
+    return np.array(rows, dtype=np.int64).reshape(-1, len(positions))
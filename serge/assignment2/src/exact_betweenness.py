@@ -0,0 +1,334 @@
+import argparse
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+
+from file_locks import keep_alive, release, try_claim
+from graph_snapshot import open_snapshot, read_snapshot_header
+
+
+MANIFEST = "manifest.json"
+
+
+def single_source_dependencies(
+    indptr: np.ndarray,
+    indices: np.ndarray,
+    source: int,
+    dist: np.ndarray,
+    sigma: np.ndarray,
+    delta: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    One Brandes pass from a source over CSR arrays, breadth first one level
+    at a time with every level's edges handled as arrays. dist, sigma and
+    delta are scratch arrays of length n, they must come in as -1, 0 and 0
+    and are reset to that before returning.
+
+    Params:
+        indptr: CSR row pointers of the out-adjacency
+        indices: CSR neighbor indices of the out-adjacency
+        source: the source node
+        dist: scratch distances
+        sigma: scratch shortest path counts
+        delta: scratch dependencies
+
+    Returns:
+        (nodes, dependencies) for every node the source reaches
+    """
+    dist[source] = 0
+    sigma[source] = 1.0
+    levels = [np.array([source], dtype=np.int64)]
+    dag_edges = []
+    depth = 0
+
+    while True:
+        frontier = levels[-1]
+        starts = indptr[frontier]
+        counts = indptr[frontier + 1] - starts
+        total = int(counts.sum())
+        if total == 0:
+            break
+
+        # gather every out-edge of the frontier at once
+        firsts = np.repeat(starts - np.cumsum(counts) + counts, counts)
+        tails = np.repeat(frontier, counts)
+        heads = indices[firsts + np.arange(total)].astype(np.int64)
+
+        fresh = np.unique(heads[dist[heads] < 0])
+        if fresh.size:
+            dist[fresh] = depth + 1
+
+        # edges into the next level are the shortest path DAG
+        on_dag = dist[heads] == depth + 1
+        tails, heads = tails[on_dag], heads[on_dag]
+        if fresh.size == 0:
+            break
+
+        slots = np.searchsorted(fresh, heads)
+        sigma[fresh] = np.bincount(slots, weights=sigma[tails], minlength=fresh.size)
+        levels.append(fresh)
+        dag_edges.append((tails, heads))
+        depth += 1
+
+    # accumulate dependencies from the deepest level back up
+    for (tails, heads), level in zip(reversed(dag_edges), reversed(levels[:-1])):
+        share = sigma[tails] / sigma[heads] * (1.0 + delta[heads])
+        slots = np.searchsorted(level, tails)
+        delta[level] += np.bincount(slots, weights=share, minlength=level.size)
+
+    reached = np.concatenate(levels)
+    dependencies = delta[reached].copy()
+    dependencies[0] = 0.0  # the source itself
+
+    dist[reached] = -1
+    sigma[reached] = 0.0
+    delta[reached] = 0.0
+    return reached, dependencies
+
+
+def chunk_sources(num_nodes: int, num_chunks: int, chunk: int) -> np.ndarray:
+    """
+    Sources handled by a chunk. Chunks take every num_chunks-th node rather
+    than a contiguous range, so hubs spread evenly across chunks.
+
+    Params:
+        num_nodes: nodes in the graph
+        num_chunks: total number of chunks
+        chunk: this chunk's number
+
+    Returns:
+        the source nodes
+    """
+    return np.arange(chunk, num_nodes, num_chunks, dtype=np.int64)
+
+
+def plan_betweenness(snapshot_path: str, directory: str, num_chunks: int = 64) -> dict:
+    """
+    Writes the job manifest for a chunked exact betweenness run, or checks
+    that an existing one belongs to the same graph so a restart resumes it.
+
+    Params:
+        snapshot_path: a CSR graph snapshot, see graph_snapshot
+        directory: job directory, shared by every worker and host
+        num_chunks: number of checkpointed chunks to split the sources into
+
+    Returns:
+        the manifest
+    """
+    header = read_snapshot_header(snapshot_path)
+    manifest = {
+        "snapshot": os.path.abspath(snapshot_path),
+        "checksum": (header.get("source") or {}).get("checksum"),
+        "num_nodes": header["num_nodes"],
+        "num_edges": header["num_edges"],
+        "directed": header["directed"],
+        "num_chunks": min(num_chunks, max(header["num_nodes"], 1)),
+    }
+
+    manifest_path = os.path.join(directory, MANIFEST)
+    if os.path.exists(manifest_path):
+        existing = load_manifest(directory)
+        if existing != manifest:
+            raise ValueError(
+                f"{directory} holds a run for a different graph or chunking, "
+                "use a new directory"
+            )
+        return existing
+
+    os.makedirs(os.path.join(directory, "chunks"), exist_ok=True)
+    tmp_path = f"{manifest_path}.tmp.{os.getpid()}"
+    with open(tmp_path, "w") as file:
+        json.dump(manifest, file, indent=2)
+    os.replace(tmp_path, manifest_path)
+    return manifest
+
+
+def load_manifest(directory: str) -> dict:
+    with open(os.path.join(directory, MANIFEST)) as file:
+        return json.load(file)
+
+
+def chunk_path(directory: str, chunk: int) -> str:
+    return os.path.join(directory, "chunks", f"{chunk:06d}.npy")
+
+
+def run_chunks(directory: str, stale_after: Optional[float] = None) -> int:
+    """
+    Claims and computes chunks until none are left, in this process. Each
+    finished chunk's partial dependency sums are checkpointed to disk, so a
+    crash only loses the chunk in progress.
+
+    Params:
+        directory: job directory written by plan_betweenness
+        stale_after: seconds after which another worker's claim is treated
+            as abandoned, None to only take over claims of dead local workers
+
+    Returns:
+        the number of chunks this process computed
+    """
+    manifest = load_manifest(directory)
+    graph = open_snapshot(manifest["snapshot"])
+    n = graph.num_nodes
+    num_chunks = manifest["num_chunks"]
+    indptr = np.asarray(graph.indptr)
+    indices = graph.indices
+
+    dist = np.full(n, -1, dtype=np.int64)
+    sigma = np.zeros(n)
+    delta = np.zeros(n)
+    computed = 0
+
+    for chunk in range(num_chunks):
+        output_path = chunk_path(directory, chunk)
+        if os.path.exists(output_path):
+            continue
+        lock_path = os.path.join(directory, "locks", f"{chunk:06d}.lock")
+        if not try_claim(lock_path, stale_after):
+            continue
+
+        try:
+            if os.path.exists(output_path):
+                continue
+            partial = np.zeros(n)
+            with keep_alive(lock_path):
+                for source in chunk_sources(n, num_chunks, chunk):
+                    reached, dependencies = single_source_dependencies(
+                        indptr, indices, int(source), dist, sigma, delta
+                    )
+                    partial[reached] += dependencies
+
+            tmp_path = f"{output_path}.tmp.{os.getpid()}.npy"
+            np.save(tmp_path, partial)
+            os.replace(tmp_path, output_path)
+            computed += 1
+            logging.info(f"Finished betweenness chunk {chunk + 1}/{num_chunks}.")
+        finally:
+            release(lock_path)
+
+    return computed
+
+
+def merge_chunks(directory: str, normalized: bool = True) -> np.ndarray:
+    """
+    Sums every chunk's partial dependencies into the final scores.
+
+    Params:
+        directory: job directory
+        normalized: scale to [0, 1] the way networkit's Betweenness does
+
+    Returns:
+        betweenness scores indexed by node
+    """
+    manifest = load_manifest(directory)
+    n = manifest["num_nodes"]
+    missing = [
+        chunk
+        for chunk in range(manifest["num_chunks"])
+        if not os.path.exists(chunk_path(directory, chunk))
+    ]
+    if missing:
+        raise RuntimeError(f"{len(missing)} chunks are unfinished, e.g. {missing[:5]}")
+
+    scores = np.zeros(n)
+    for chunk in range(manifest["num_chunks"]):
+        scores += np.load(chunk_path(directory, chunk))
+
+    # each undirected path was counted from both of its ends
+    if not manifest["directed"]:
+        scores /= 2
+    if normalized and n > 2:
+        pairs = (n - 1) * (n - 2)
+        scores /= pairs if manifest["directed"] else pairs / 2
+    return scores
+
+
+def exact_betweenness(
+    snapshot_path: str,
+    directory: str,
+    workers: Optional[int] = None,
+    num_chunks: int = 64,
+    normalized: bool = True,
+    stale_after: Optional[float] = None,
+) -> np.ndarray:
+    """
+    Exact betweenness on a process pool, resumable from the last finished
+    chunk. Rerun with the same directory to resume after a crash, or run
+    run_chunks on other hosts that share the directory to add machines.
+    Claims of crashed workers on this host are taken over on a rerun, those
+    of other hosts once they are stale_after seconds old.
+
+    Params:
+        snapshot_path: a CSR graph snapshot, see graph_snapshot
+        directory: job directory for the manifest and checkpoints
+        workers: worker processes, defaults to the number of cores
+        num_chunks: number of checkpointed chunks
+        normalized: scale to [0, 1] the way networkit's Betweenness does
+        stale_after: seconds after which another worker's claim is treated
+            as abandoned, None to only take over claims of dead local workers
+
+    Returns:
+        betweenness scores indexed by node
+    """
+    plan_betweenness(snapshot_path, directory, num_chunks)
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1:
+        run_chunks(directory, stale_after)
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            list(pool.map(run_chunks, [directory] * workers, [stale_after] * workers))
+
+    return merge_chunks(directory, normalized)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Chunked, resumable exact betweenness over a CSR snapshot."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    plan = commands.add_parser("plan", help="write the job manifest")
+    plan.add_argument("snapshot_path")
+    plan.add_argument("directory")
+    plan.add_argument("--chunks", type=int, default=64)
+
+    work = commands.add_parser("work", help="compute chunks until none are left")
+    work.add_argument("directory")
+    work.add_argument("--workers", type=int, default=None)
+    work.add_argument("--stale-after", type=float, default=None)
+
+    merge = commands.add_parser("merge", help="sum the chunks into scores")
+    merge.add_argument("directory")
+    merge.add_argument("output_path", help=".npy file for the scores")
+    merge.add_argument("--raw", action="store_true", help="skip normalization")
+
+    args = parser.parse_args()
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(levelname)s:%(message)s"
+    )
+
+    if args.command == "plan":
+        manifest = plan_betweenness(args.snapshot_path, args.directory, args.chunks)
+        print(f"Planned {manifest['num_chunks']} chunks.")
+    elif args.command == "work":
+        workers = args.workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(workers) as pool:
+            computed = sum(
+                pool.map(
+                    run_chunks,
+                    [args.directory] * workers,
+                    [args.stale_after] * workers,
+                )
+            )
+        print(f"Computed {computed} chunks.")
+    elif args.command == "merge":
+        np.save(args.output_path, merge_chunks(args.directory, not args.raw))
+        print(f"Wrote {args.output_path}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,392 @@
+import json
+import os
+from collections import defaultdict
+from typing import Iterable, Optional, Union
+
+import numpy as np
+
+from records import PubmedRecord
+
+
+# roaring containers switch from a sorted array to a bitset past 4096 values
+ARRAY_LIMIT = 4096
+BITSET_WORDS = 1024  # 65536 bits as uint64 words
+FACETS = ("mesh", "language", "journal", "year")
+
+
+class Bitmap:
+    """
+    A roaring-style compressed set of uint32 ids (PMIDs here). Ids are split
+    by their high 16 bits into containers, each holding the low 16 bits as
+    either a sorted uint16 array (sparse) or a 1024 word uint64 bitset
+    (dense). Sets combine with &, | and -, like Python sets.
+    """
+
+    def __init__(
+        self,
+        keys: Optional[np.ndarray] = None,
+        containers: Optional[list[np.ndarray]] = None,
+    ):
+        self.keys = keys if keys is not None else np.empty(0, dtype=np.uint16)
+        self.containers = containers if containers is not None else []
+
+    @classmethod
+    def from_values(cls, values: Union[Iterable[int], np.ndarray]) -> "Bitmap":
+        """
+        Builds a bitmap from a collection of ids.
+
+        Params:
+            values: non-negative ids below 2**32, duplicates are fine
+
+        Returns:
+            a new Bitmap
+        """
+        values = np.unique(np.asarray(values, dtype=np.uint32))
+        if values.size == 0:
+            return cls()
+
+        high = (values >> 16).astype(np.uint16)
+        low = (values & 0xFFFF).astype(np.uint16)
+        keys, starts = np.unique(high, return_index=True)
+        bounds = np.append(starts, values.size)
+
+        containers = [
+            _normalize(low[bounds[i] : bounds[i + 1]]) for i in range(keys.size)
+        ]
+        return cls(keys, containers)
+
+    def __len__(self) -> int:
+        return sum(_cardinality(container) for container in self.containers)
+
+    def __contains__(self, value: int) -> bool:
+        position = np.searchsorted(self.keys, value >> 16)
+        if position == self.keys.size or self.keys[position] != value >> 16:
+            return False
+        container = self.containers[position]
+        low = value & 0xFFFF
+        if container.dtype == np.uint64:
+            return bool((int(container[low >> 6]) >> (low & 63)) & 1)
+        index = np.searchsorted(container, low)
+        return index < container.size and container[index] == low
+
+    def __and__(self, other: "Bitmap") -> "Bitmap":
+        _, mine, theirs = np.intersect1d(
+            self.keys, other.keys, assume_unique=True, return_indices=True
+        )
+        keys, containers = [], []
+        for i, j in zip(mine, theirs):
+            container = _and(self.containers[i], other.containers[j])
+            if container is not None:
+                keys.append(self.keys[i])
+                containers.append(container)
+        return Bitmap(np.array(keys, dtype=np.uint16), containers)
+
+    def __or__(self, other: "Bitmap") -> "Bitmap":
+        keys = np.union1d(self.keys, other.keys).astype(np.uint16)
+        mine = dict(zip(self.keys.tolist(), self.containers))
+        theirs = dict(zip(other.keys.tolist(), other.containers))
+        containers = []
+        for key in keys.tolist():
+            a, b = mine.get(key), theirs.get(key)
+            containers.append(a if b is None else b if a is None else _or(a, b))
+        return Bitmap(keys, containers)
+
+    def __sub__(self, other: "Bitmap") -> "Bitmap":
+        theirs = dict(zip(other.keys.tolist(), other.containers))
+        keys, containers = [], []
+        for key, container in zip(self.keys.tolist(), self.containers):
+            if key in theirs:
+                container = _andnot(container, theirs[key])
+            if container is not None:
+                keys.append(key)
+                containers.append(container)
+        return Bitmap(np.array(keys, dtype=np.uint16), containers)
+
+    @staticmethod
+    def union_all(bitmaps: Iterable["Bitmap"]) -> "Bitmap":
+        """
+        Unions many bitmaps at once, e.g. every year in a range
+
+        Params:
+            bitmaps: the bitmaps to combine
+
+        Returns:
+            a new Bitmap
+        """
+        result = Bitmap()
+        for bitmap in bitmaps:
+            result = result | bitmap
+        return result
+
+    def to_array(self) -> np.ndarray:
+        """
+        Returns:
+            the ids in the set as a sorted uint32 array
+        """
+        if not self.containers:
+            return np.empty(0, dtype=np.uint32)
+        return np.concatenate(
+            [
+                (np.uint32(key) << np.uint32(16)) | _values(container)
+                for key, container in zip(self.keys.tolist(), self.containers)
+            ]
+        )
+
+
+def _values(container: np.ndarray) -> np.ndarray:
+    """
+    Helper method returns a container's low 16 bit values as uint32
+    """
+    if container.dtype == np.uint64:
+        bits = np.unpackbits(container.view(np.uint8), bitorder="little")
+        return np.flatnonzero(bits).astype(np.uint32)
+    return container.astype(np.uint32)
+
+
+def _cardinality(container: np.ndarray) -> int:
+    if container.dtype == np.uint64:
+        return int(np.unpackbits(container.view(np.uint8)).sum())
+    return int(container.size)
+
+
+def _to_bitset(values: np.ndarray) -> np.ndarray:
+    flags = np.zeros(BITSET_WORDS * 64, dtype=bool)
+    flags[values] = True
+    return np.packbits(flags, bitorder="little").view(np.uint64)
+
+
+def _test(bitset: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """
+    Helper method checks which of an array container's values are set in a
+    bitset container
+    """
+    values = values.astype(np.uint64)
+    words = bitset[values >> np.uint64(6)]
+    return ((words >> (values & np.uint64(63))) & np.uint64(1)).astype(bool)
+
+
+def _normalize(container: np.ndarray) -> Optional[np.ndarray]:
+    """
+    Helper method picks the smaller representation for a container, empty
+    containers are dropped
+    """
+    if container.dtype == np.uint64:
+        if _cardinality(container) <= ARRAY_LIMIT:
+            container = _values(container).astype(np.uint16)
+        else:
+            return container
+    if container.size == 0:
+        return None
+    if container.size > ARRAY_LIMIT:
+        return _to_bitset(container)
+    return container
+
+
+def _and(a: np.ndarray, b: np.ndarray) -> Optional[np.ndarray]:
+    if a.dtype == np.uint64 and b.dtype == np.uint64:
+        return _normalize(a & b)
+    if a.dtype == np.uint64:
+        a, b = b, a
+    if b.dtype == np.uint64:
+        return _normalize(a[_test(b, a)])
+    return _normalize(np.intersect1d(a, b, assume_unique=True))
+
+
+def _or(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    if a.dtype == np.uint64 or b.dtype == np.uint64:
+        a = a if a.dtype == np.uint64 else _to_bitset(a)
+        b = b if b.dtype == np.uint64 else _to_bitset(b)
+        return a | b
+    return _normalize(np.union1d(a, b).astype(np.uint16))
+
+
+def _andnot(a: np.ndarray, b: np.ndarray) -> Optional[np.ndarray]:
+    if a.dtype == np.uint64:
+        b = b if b.dtype == np.uint64 else _to_bitset(b)
+        return _normalize(a & ~b)
+    if b.dtype == np.uint64:
+        return _normalize(a[~_test(b, a)])
+    return _normalize(np.setdiff1d(a, b, assume_unique=True))
+
+
+class FacetIndex:
+    """
+    Bitmap index over record facets: MeSH descriptor, language, journal and
+    publication year. Each facet value maps to the Bitmap of PMIDs that have
+    it, so facet slices are bitmap intersections, unions and differences.
+
+    e.g. English 2020 records tagged Extracellular Vesicles but not Exosomes:
+
+        index = FacetIndex.load("output/facets")
+        hits = (
+            index.get("language", "eng")
+            & index.get("year", 2020)
+            & index.get("mesh", "Extracellular Vesicles")
+        ) - index.get("mesh", "Exosomes")
+        pmids = hits.to_array()
+    """
+
+    def __init__(self, bitmaps: Optional[dict[tuple[str, str], Bitmap]] = None):
+        self.bitmaps = bitmaps if bitmaps is not None else {}
+
+    @classmethod
+    def from_records(cls, records: Iterable[PubmedRecord]) -> "FacetIndex":
+        """
+        Builds the index from extracted records, e.g. PubmedIndex.records()
+        or read_records_from_csv.
+
+        Params:
+            records: the records to index
+
+        Returns:
+            a new FacetIndex
+        """
+        postings: dict[tuple[str, str], list[int]] = defaultdict(list)
+
+        for record in records:
+            for term in set(record.mesh_terms):
+                postings[_key("mesh", term)].append(record.pmid)
+            for language in set(record.languages):
+                postings[_key("language", language)].append(record.pmid)
+            if record.journal:
+                postings[_key("journal", record.journal)].append(record.pmid)
+            if record.year is not None:
+                postings[_key("year", record.year)].append(record.pmid)
+
+        return cls({key: Bitmap.from_values(pmids) for key, pmids in postings.items()})
+
+    def get(self, facet: str, value: Union[str, int]) -> Bitmap:
+        """
+        Params:
+            facet: one of 'mesh', 'language', 'journal' or 'year'
+            value: the facet value, matched case-insensitively
+
+        Returns:
+            the PMIDs with that facet value, empty if there are none
+        """
+        if facet not in FACETS:
+            raise ValueError(f"Unknown facet {facet!r}, expected one of {FACETS}")
+        return self.bitmaps.get(_key(facet, value), Bitmap())
+
+    def any_of(self, facet: str, values: Iterable[Union[str, int]]) -> Bitmap:
+        """
+        Params:
+            facet: one of 'mesh', 'language', 'journal' or 'year'
+            values: facet values to union
+
+        Returns:
+            the PMIDs with any of the values
+        """
+        return Bitmap.union_all(self.get(facet, value) for value in values)
+
+    def years(self, start: int, end: int) -> Bitmap:
+        """
+        Returns:
+            the PMIDs published between start and end, inclusive
+        """
+        return self.any_of("year", range(start, end + 1))
+
+    def values(self, facet: str) -> dict[str, int]:
+        """
+        Params:
+            facet: one of 'mesh', 'language', 'journal' or 'year'
+
+        Returns:
+            each value of the facet and its record count
+        """
+        return {
+            value: len(bitmap)
+            for (name, value), bitmap in self.bitmaps.items()
+            if name == facet
+        }
+
+    def save(self, directory: str = "output/facets") -> None:
+        """
+        Writes the index as flat arrays plus a JSON list of facet keys, so
+        load can memory-map it instead of parsing.
+
+        Params:
+            directory: output directory, created if missing
+        """
+        os.makedirs(directory, exist_ok=True)
+        facet_keys = sorted(self.bitmaps)
+
+        container_keys: list[np.ndarray] = []
+        kinds: list[int] = []
+        sizes: list[int] = []
+        chunks: list[np.ndarray] = []
+        container_offsets = [0]
+        bitmap_offsets = [0]
+
+        for facet_key in facet_keys:
+            bitmap = self.bitmaps[facet_key]
+            container_keys.append(bitmap.keys)
+            for container in bitmap.containers:
+                data = container.view(np.uint16)
+                # pad so every container starts on an 8 byte boundary and
+                # bitsets can be viewed as uint64 straight from the map
+                padding = -data.size % 4
+                chunks.append(data)
+                if padding:
+                    chunks.append(np.zeros(padding, dtype=np.uint16))
+                kinds.append(int(container.dtype == np.uint64))
+                sizes.append(data.size)
+                container_offsets.append(container_offsets[-1] + data.size + padding)
+            bitmap_offsets.append(bitmap_offsets[-1] + len(bitmap.containers))
+
+        arrays = {
+            "keys": _concat(container_keys, np.uint16),
+            "kinds": np.array(kinds, dtype=np.uint8),
+            "sizes": np.array(sizes, dtype=np.int64),
+            "data": _concat(chunks, np.uint16),
+            "container_offsets": np.array(container_offsets, dtype=np.int64),
+            "bitmap_offsets": np.array(bitmap_offsets, dtype=np.int64),
+        }
+        for name, array in arrays.items():
+            np.save(os.path.join(directory, f"{name}.npy"), array)
+
+        with open(os.path.join(directory, "facets.json"), "w") as file:
+            json.dump([list(facet_key) for facet_key in facet_keys], file)
+
+    @classmethod
+    def load(cls, directory: str = "output/facets") -> "FacetIndex":
+        """
+        Opens a saved index, container data stays memory-mapped.
+
+        Params:
+            directory: a directory written by save
+
+        Returns:
+            the FacetIndex
+        """
+        with open(os.path.join(directory, "facets.json")) as file:
+            facet_keys = [tuple(facet_key) for facet_key in json.load(file)]
+
+        def load_array(name: str) -> np.ndarray:
+            return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+
+        keys = np.asarray(load_array("keys"))
+        kinds = np.asarray(load_array("kinds"))
+        sizes = np.asarray(load_array("sizes"))
+        data = load_array("data")
+        container_offsets = np.asarray(load_array("container_offsets"))
+        bitmap_offsets = np.asarray(load_array("bitmap_offsets"))
+
+        bitmaps: dict[tuple[str, str], Bitmap] = {}
+        for i, facet_key in enumerate(facet_keys):
+            first, last = bitmap_offsets[i], bitmap_offsets[i + 1]
+            containers = []
+            for c in range(first, last):
+                chunk = data[container_offsets[c] : container_offsets[c] + sizes[c]]
+                containers.append(chunk.view(np.uint64) if kinds[c] else chunk)
+            bitmaps[facet_key] = Bitmap(keys[first:last], containers)
+
+        return cls(bitmaps)
+
+
+def _key(facet: str, value: Union[str, int]) -> tuple[str, str]:
+    return facet, str(value).strip().lower()
+
+
+def _concat(arrays: list[np.ndarray], dtype) -> np.ndarray:
+    return np.concatenate(arrays).astype(dtype) if arrays else np.empty(0, dtype=dtype)
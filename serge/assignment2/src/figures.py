@@ -0,0 +1,160 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+import numpy as np
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+from matplotlib.ticker import FuncFormatter, ScalarFormatter
+
+# Series kinds drawn by the Axes method of the same name
+AXES_KINDS = ("plot", "scatter", "bar", "stairs")
+
+
+@dataclass
+class Series:
+    """
+    One thing drawn on a panel. kind is "plot", "scatter", "bar" or "stairs",
+    drawn by the Axes method of that name as method(x, y, **style), or
+    "segments", where x is an (m, 2, 2) array of line segments and y is
+    unused, drawn as one LineCollection.
+    """
+
+    kind: str
+    x: np.ndarray
+    y: Optional[np.ndarray] = None
+    style: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class Panel:
+    """
+    One set of axes and its styling. base is the base of the log scaled
+    axes, axis=False hides the axes, as for a network drawing, and yformat
+    is "scalar" for plain tick labels on a log axis or a format string such
+    as "{:.2f}".
+    """
+
+    series: list[Series] = field(default_factory=list)
+    title: str = ""
+    xlabel: str = ""
+    ylabel: str = ""
+    xscale: str = "linear"
+    yscale: str = "linear"
+    base: float = 10
+    xlim: Optional[tuple[float, float]] = None
+    ylim: Optional[tuple[float, float]] = None
+    legend: bool = False
+    grid: bool = False
+    axis: bool = True
+    yformat: Optional[str] = None
+
+
+@dataclass
+class FigureSpec:
+    """
+    A figure as plain data: the panels, laid out in a grid of columns, and
+    the file it goes to, whose extension (.png, .svg, .pdf) picks the
+    format. A spec holds no matplotlib objects, so it pickles cheaply and
+    figures can be drawn in other processes.
+    """
+
+    path: str
+    panels: list[Panel]
+    columns: int = 1
+    figsize: tuple[float, float] = (7, 5)
+    title: str = ""
+    sharey: bool = False
+    dpi: int = 150
+
+
+def render_figure(spec: FigureSpec) -> str:
+    """
+    Draws a figure with the Agg backend and writes it. The figure is built
+    without pyplot, so nothing needs a display and nothing stays open.
+
+    Params:
+        spec: the figure
+
+    Returns:
+        the path written
+    """
+    rows = -(-len(spec.panels) // spec.columns)
+    figure = Figure(figsize=spec.figsize, layout="tight")
+    axes = figure.subplots(rows, spec.columns, sharey=spec.sharey, squeeze=False)
+    for ax, panel in zip(axes.ravel(), spec.panels):
+        _draw_panel(ax, panel)
+    for ax in axes.ravel()[len(spec.panels) :]:
+        ax.set_axis_off()
+    if spec.title:
+        figure.suptitle(spec.title)
+
+    directory = os.path.dirname(spec.path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    figure.savefig(spec.path, dpi=spec.dpi)
+    return spec.path
+
+
+def render_figures(specs: list[FigureSpec], workers: Optional[int] = None) -> list[str]:
+    """
+    Draws many figures at once, one per worker process. Only the specs go
+    to the workers, so the data behind a figure should be reduced first,
+    e.g. a histogram's counts rather than the values.
+
+    Params:
+        specs: the figures
+        workers: worker processes, defaults to the number of cores
+
+    Returns:
+        the paths written, in the order of specs
+    """
+    workers = min(workers or os.cpu_count() or 1, len(specs))
+    if workers <= 1:
+        return [render_figure(spec) for spec in specs]
+    with ProcessPoolExecutor(workers) as pool:
+        return list(pool.map(render_figure, specs))
+
+
+def _draw_panel(ax, panel: Panel) -> None:
+    """
+    Helper method draws a panel's series onto a set of axes and styles them
+    """
+    for series in panel.series:
+        if series.kind == "segments":
+            ax.add_collection(LineCollection(series.x, **series.style))
+            ax.autoscale_view()
+        elif series.kind in AXES_KINDS:
+            getattr(ax, series.kind)(series.x, series.y, **series.style)
+        else:
+            raise ValueError(
+                f"Unknown series kind {series.kind!r}, expected one of "
+                f"{list(AXES_KINDS) + ['segments']}"
+            )
+
+    for scale, setter in ((panel.xscale, ax.set_xscale), (panel.yscale, ax.set_yscale)):
+        if scale == "log":
+            setter(scale, base=panel.base)
+        else:
+            setter(scale)
+    if panel.xlim is not None:
+        ax.set_xlim(*panel.xlim)
+    if panel.ylim is not None:
+        ax.set_ylim(*panel.ylim)
+    if panel.yformat == "scalar":
+        ax.yaxis.set_major_formatter(ScalarFormatter())
+    elif panel.yformat is not None:
+        ax.yaxis.set_major_formatter(
+            FuncFormatter(lambda y, _, fmt=panel.yformat: fmt.format(y))
+        )
+
+    ax.set_title(panel.title)
+    ax.set_xlabel(panel.xlabel)
+    ax.set_ylabel(panel.ylabel)
+    if panel.legend:
+        ax.legend()
+    if panel.grid:
+        ax.grid(True)
+    if not panel.axis:
+        ax.set_axis_off()
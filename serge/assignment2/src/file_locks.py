@@ -0,0 +1,178 @@
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+# seconds between refreshes of a held lock's mtime, stale_after should be
+# a few times longer
+HEARTBEAT = 30.0
+
+# token of every lock this process holds, by path
+_held: dict[str, str] = {}
+
+
+def try_claim(path: str, stale_after: Optional[float] = None) -> bool:
+    """
+    Attempts to claim a unit of work by creating a lock file. Creation uses
+    O_CREAT | O_EXCL, which is atomic on local filesystems and on NFSv3+, so
+    exactly one worker on any host sharing the directory wins. The lock
+    records its owner's host, pid and a token unique to this claim. A lock
+    whose owner ran on this host and is no longer alive is always broken.
+
+    Params:
+        path: the lock file to create
+        stale_after: seconds after which someone else's lock is considered
+            abandoned (e.g. the worker crashed on another host) and may be
+            broken, None to only break locks of dead local owners. Holders
+            refresh their lock while working, see keep_alive
+
+    Returns:
+        True if this process now holds the lock
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    for _ in range(2):
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            if not _break_stale(path, stale_after):
+                return False
+            continue
+
+        token = uuid.uuid4().hex
+        with os.fdopen(fd, "w") as file:
+            json.dump(
+                {
+                    "host": socket.gethostname(),
+                    "pid": os.getpid(),
+                    "token": token,
+                    "time": time.time(),
+                },
+                file,
+            )
+        _held[path] = token
+        return True
+
+    return False
+
+
+def release(path: str) -> None:
+    """
+    Releases a lock taken with try_claim. A lock that was broken and taken
+    by another worker in the meantime is left alone.
+
+    Params:
+        path: the lock file
+    """
+    token = _held.pop(path, None)
+    if token is None or _owner(path).get("token") != token:
+        return
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def holds(path: str) -> bool:
+    """
+    Params:
+        path: the lock file
+
+    Returns:
+        True if this process still holds the lock
+    """
+    token = _held.get(path)
+    return token is not None and _owner(path).get("token") == token
+
+
+@contextmanager
+def keep_alive(path: str, interval: float = HEARTBEAT) -> Iterator[None]:
+    """
+    Refreshes a held lock's mtime from a background thread while the block
+    runs, so a long unit of work is not taken for abandoned.
+
+    Params:
+        path: a lock file this process holds
+        interval: seconds between refreshes
+    """
+    done = threading.Event()
+
+    def beat() -> None:
+        while not done.wait(interval):
+            if not holds(path):
+                return
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                return
+
+    thread = threading.Thread(target=beat, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        done.set()
+        thread.join()
+
+
+def _owner(path: str) -> dict:
+    """
+    Helper method reads a lock's owner record, empty when the lock is gone
+    or still being written
+    """
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _dead(owner: dict) -> bool:
+    """
+    Helper method tells whether a lock's owner is a process on this host
+    that has exited
+    """
+    if owner.get("host") != socket.gethostname() or "pid" not in owner:
+        return False
+    try:
+        os.kill(owner["pid"], 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        return False
+    return False
+
+
+def _break_stale(path: str, stale_after: Optional[float]) -> bool:
+    """
+    Helper method moves an abandoned lock out of the way. Several workers
+    can notice the same stale lock, so after the rename the moved lock's
+    token is checked against the one judged stale: a worker that moved a
+    fresh lock instead puts it back, and only one of them breaks it.
+    """
+    owner = _owner(path)
+    try:
+        age = time.time() - os.stat(path).st_mtime
+    except FileNotFoundError:
+        return True
+    if not _dead(owner) and (stale_after is None or age < stale_after):
+        return False
+
+    aside = f"{path}.stale.{socket.gethostname()}.{os.getpid()}"
+    try:
+        os.rename(path, aside)
+    except FileNotFoundError:
+        return False
+    if _owner(aside).get("token") != owner.get("token"):
+        # link won't replace a lock claimed since, unlike rename
+        try:
+            os.link(aside, path)
+        except FileExistsError:
+            pass
+        os.remove(aside)
+        return False
+    return True
@@ -0,0 +1,82 @@
+from typing import Optional
+
+import networkit as nk
+import networkx as nx
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from csr_graph import CSRGraph
+from graph_loader import to_networkit as edges_to_networkit
+from graph_loader import to_networkx as edges_to_networkx
+from node_map import NodeMap
+
+
+def to_scipy(graph: CSRGraph, transpose: bool = False) -> csr_matrix:
+    """
+    The adjacency matrix as a scipy sparse matrix over the graph's own
+    arrays. The data is one broadcast value so it takes no memory. scipy
+    wants both index arrays of one type, so the row pointers are narrowed to
+    the indices' int32 when the edge count fits, sharing the indices, and
+    the indices are widened otherwise. The matrix is read-only, treat it as
+    structure.
+
+    Params:
+        graph: the graph
+        transpose: give the in-adjacency, row v holds v's in-neighbors
+
+    Returns:
+        the n x n csr_matrix
+    """
+    n = graph.num_nodes
+    indptr = graph.in_indptr if transpose else graph.indptr
+    indices = graph.in_indices if transpose else graph.indices
+
+    indptr = np.asarray(indptr)
+    indices = np.asarray(indices)
+    if indptr.dtype != indices.dtype:
+        if len(indices) <= np.iinfo(indices.dtype).max:
+            indptr = indptr.astype(indices.dtype)
+        else:
+            indices = indices.astype(indptr.dtype)
+    data = np.broadcast_to(np.ones(1, dtype=np.int8), indices.shape)
+    return csr_matrix((data, indices, indptr), shape=(n, n), copy=False)
+
+
+def to_networkx(graph: CSRGraph, nodes: Optional[np.ndarray] = None) -> nx.Graph:
+    """
+    Materializes the graph, or only the subgraph induced by nodes, as a
+    networkx graph labeled with the original node ids. networkx stores
+    dicts per node and edge, so pass nodes for anything but small graphs.
+
+    Params:
+        graph: the graph
+        nodes: indices of the nodes to keep, e.g. from a sampler
+
+    Returns:
+        an nx.DiGraph or nx.Graph
+    """
+    if nodes is not None:
+        graph = graph.subgraph(nodes)
+    # label by index without a node map, so nodes without edges are kept
+    node_map = graph.node_map
+    if node_map is None:
+        node_map = NodeMap(np.arange(graph.num_nodes))
+    return edges_to_networkx(*graph.edges(), node_map, graph.directed)
+
+
+def to_networkit(graph: CSRGraph, nodes: Optional[np.ndarray] = None) -> nk.Graph:
+    """
+    Materializes the graph, or only the subgraph induced by nodes, as a
+    networkit graph. networkit keeps its own adjacency, so this is one copy
+    of the edges, node i is index i of the (sub)graph.
+
+    Params:
+        graph: the graph
+        nodes: indices of the nodes to keep, e.g. from a sampler
+
+    Returns:
+        the nk.Graph
+    """
+    if nodes is not None:
+        graph = graph.subgraph(nodes)
+    return edges_to_networkit(*graph.edges(), graph.num_nodes, graph.directed)
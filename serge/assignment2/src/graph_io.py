@@ -0,0 +1,744 @@
+import json
+import logging
+import os
+import struct
+from typing import Iterable, Iterator, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from csr_graph import CSRGraph
+from edge_parser import read_edge_list
+from node_map import NodeMap
+
+
+# binary edge list layout: magic, header length, JSON header, then 64 byte
+# aligned (src, dst) pairs and the node ids, as in graph_snapshot
+MAGIC = b"EDGEBIN1"
+VERSION = 1
+ALIGNMENT = 64
+
+# numbers formatted or parsed at a time, and bytes read at a time
+CHUNK = 1 << 22
+BLOCK = 16 << 20
+
+POWERS = 10 ** np.arange(19, dtype=np.int64)
+SPACE, TAB, NEWLINE, RETURN = b" \t\n\r"
+
+
+def write_metis(graph: CSRGraph, path: str, chunk: int = CHUNK) -> None:
+    """
+    Writes a graph as a METIS adjacency file: a "nodes edges" header, then
+    line i lists the neighbors of node i, numbered from 1. METIS graphs are
+    undirected and simple, so a directed graph is written with every edge
+    in both directions and self loops and repeated edges are dropped. The
+    lines are formatted with NumPy a chunk of rows at a time.
+
+    Params:
+        graph: the graph
+        path: output file
+        chunk: neighbors formatted at a time
+    """
+    indptr, indices = _simple_rows(graph)
+    n = len(indptr) - 1
+    with open(path, "wb") as file:
+        file.write(f"{n} {len(indices) // 2}\n".encode())
+        first = 0
+        while first < n:
+            last = int(np.searchsorted(indptr, indptr[first] + chunk, side="right"))
+            last = min(max(last - 1, first + 1), n)
+            counts = np.diff(indptr[first : last + 1])
+            # an empty row is one blank token, so it still ends its line
+            tokens = np.maximum(counts, 1)
+            ends = np.cumsum(tokens) - 1
+            blank = np.zeros(int(tokens.sum()), dtype=bool)
+            blank[(ends - tokens + 1)[counts == 0]] = True
+
+            values = np.zeros(len(blank), dtype=np.int64)
+            values[~blank] = np.asarray(indices[indptr[first] : indptr[last]]) + 1
+            separators = np.full(len(blank), SPACE, dtype=np.uint8)
+            separators[ends] = NEWLINE
+            file.write(_format(values, separators, blank))
+            first = last
+
+
+def read_metis(path: str, block: int = BLOCK) -> CSRGraph:
+    """
+    Reads an unweighted METIS adjacency file as an undirected CSRGraph,
+    parsing a block of lines at a time with NumPy. Comment lines starting
+    with % are skipped. The file is trusted to list every edge both ways,
+    validate_metis checks that.
+
+    Params:
+        path: the METIS file
+        block: bytes parsed at a time
+
+    Returns:
+        the graph, node i is line i
+    """
+    (n, m), counts, indices = _read_metis_rows(path, block)
+    if len(counts) != n:
+        raise ValueError(f"{path} has {len(counts)} adjacency lines, expected {n}")
+    if len(indices) and (indices.min() < 1 or indices.max() > n):
+        raise ValueError(f"{path} has neighbor ids outside 1..{n}")
+    if len(indices) != 2 * m:
+        logging.warning(
+            f"{path} lists {len(indices)} neighbors, the header says {m} edges."
+        )
+
+    index_dtype = np.int32 if n <= np.iinfo(np.int32).max else np.int64
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    indices = (indices - 1).astype(index_dtype)
+    # ascending within every row, a row may start lower than the last ended
+    ascending = np.diff(indices) > 0
+    row_starts = indptr[1:-1]
+    ascending[row_starts[(row_starts > 0) & (row_starts < len(indices))] - 1] = True
+    if ascending.all():
+        return CSRGraph(indptr, indices, indptr, indices, len(indices) // 2, False)
+
+    src = np.repeat(np.arange(n, dtype=np.int64), counts)
+    upper = src <= indices
+    return CSRGraph.from_edges(src[upper], indices[upper], n, directed=False)
+
+
+def validate_metis(path: str, block: int = BLOCK) -> list[str]:
+    """
+    Checks a METIS adjacency file against its header and the format: one
+    line per node, twice as many neighbor entries as edges, ids in 1..n,
+    and a simple, symmetric adjacency.
+
+    Params:
+        path: the METIS file
+        block: bytes parsed at a time
+
+    Returns:
+        a description of every problem found, empty for a valid file
+    """
+    try:
+        (n, m), counts, indices = _read_metis_rows(path, block)
+    except ValueError as error:
+        return [str(error)]
+
+    problems = []
+    if len(counts) != n:
+        problems.append(f"header says {n} nodes, found {len(counts)} lines")
+    if len(indices) != 2 * m:
+        problems.append(
+            f"header says {m} edges, found {len(indices)} neighbor entries, "
+            f"expected {2 * m}"
+        )
+    outside = (indices < 1) | (indices > n)
+    if outside.any():
+        problems.append(f"{int(outside.sum())} neighbor ids outside 1..{n}")
+
+    src = np.repeat(np.arange(1, len(counts) + 1, dtype=np.int64), counts)
+    src, dst = src[~outside], indices[~outside]
+    loops = src == dst
+    if loops.any():
+        problems.append(f"{int(loops.sum())} self loops")
+    pairs = np.sort(src * (n + 1) + dst)
+    repeated = int((pairs[1:] == pairs[:-1]).sum())
+    if repeated:
+        problems.append(f"{repeated} repeated neighbor entries")
+    reverse = np.sort(dst * (n + 1) + src)
+    position = np.searchsorted(reverse, pairs).clip(max=max(len(reverse) - 1, 0))
+    unmatched = int((reverse[position] != pairs).sum()) if len(pairs) else 0
+    if unmatched:
+        problems.append(f"{unmatched} edges are listed in one direction only")
+    return problems
+
+
+def write_text_edges(
+    graph: CSRGraph,
+    path: str,
+    delimiter: str = "\t",
+    ids: bool = True,
+    chunk: int = CHUNK,
+) -> None:
+    """
+    Writes the edges one per line as "source<delimiter>target", undirected
+    edges once. The lines are formatted with NumPy a chunk at a time.
+
+    Params:
+        graph: the graph
+        path: output file
+        delimiter: a single character, "\\t" for TSV or " " for a space
+            separated list
+        ids: write original node ids rather than indices, when the graph
+            has a node map
+        chunk: edges formatted at a time
+    """
+    write_text_pairs(labeled_edge_chunks(graph, ids, chunk), path, delimiter)
+
+
+def write_text_pairs(
+    pairs: Iterable[tuple[np.ndarray, np.ndarray]],
+    path: str,
+    delimiter: str = "\t",
+    header: Optional[tuple[str, str]] = None,
+) -> int:
+    """
+    Writes a stream of edge chunks as delimited text, formatting each chunk
+    with NumPy and writing it at once.
+
+    Params:
+        pairs: (source, target) integer arrays, one chunk at a time
+        path: output file
+        delimiter: a single character
+        header: column names for a first line, none by default
+
+    Returns:
+        the number of edges written
+    """
+    if len(delimiter.encode()) != 1:
+        raise ValueError(f"Delimiter must be a single character, got {delimiter!r}")
+    separators = np.array([ord(delimiter), NEWLINE], dtype=np.uint8)
+    written = 0
+    with open(path, "wb") as file:
+        if header is not None:
+            file.write(f"{header[0]}{delimiter}{header[1]}\n".encode())
+        for src, dst in pairs:
+            values = np.empty(2 * len(src), dtype=np.int64)
+            values[0::2] = src
+            values[1::2] = dst
+            file.write(_format(values, np.tile(separators, len(src))))
+            written += len(src)
+    return written
+
+
+def iter_text_pairs(
+    path: str,
+    delimiter: str = "\t",
+    header: bool = False,
+    columns: Sequence[Union[str, int]] = (0, 1),
+    chunk: int = CHUNK,
+) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """
+    Reads a delimited edge file a chunk of rows at a time, so a file of any
+    size streams through in constant memory. Lines starting with # are
+    skipped, every other row must hold integer ids. An empty file, as
+    write_text_pairs writes for a graph without edges, yields nothing.
+
+    Params:
+        path: the edge file
+        delimiter: field separator
+        header: whether the first line holds column names
+        columns: source and target column, names (requires header) or
+            0-based positions
+        chunk: rows per chunk
+
+    Returns:
+        an iterator of (source, target) int64 id arrays
+    """
+    try:
+        frames = pd.read_csv(
+            path,
+            sep=delimiter,
+            header=0 if header else None,
+            usecols=list(columns),
+            dtype=np.int64,
+            comment="#",
+            on_bad_lines="skip",
+            chunksize=chunk,
+            engine="c",
+        )
+    except pd.errors.EmptyDataError:
+        return
+    # selected columns come back in file order, whatever order they're asked in
+    if all(isinstance(column, int) for column in columns):
+        order = [sorted(columns).index(column) for column in columns]
+    else:
+        order = None
+    with frames:
+        for frame in frames:
+            frame = frame.iloc[:, order] if order else frame[list(columns)]
+            yield (
+                frame.iloc[:, 0].to_numpy(np.int64),
+                frame.iloc[:, 1].to_numpy(np.int64),
+            )
+
+
+def iter_parquet_pairs(
+    path: str,
+    columns: Sequence[str] = ("source", "target"),
+    chunk: int = CHUNK,
+) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """
+    Reads an edge table from Parquet one record batch at a time. Needs
+    pyarrow.
+
+    Params:
+        path: the Parquet file
+        columns: source and target column names
+        chunk: rows per batch
+
+    Returns:
+        an iterator of (source, target) int64 id arrays
+    """
+    import pyarrow.parquet as pq
+
+    table = pq.ParquetFile(path)
+    for batch in table.iter_batches(batch_size=chunk, columns=list(columns)):
+        yield (
+            batch.column(0).to_numpy().astype(np.int64, copy=False),
+            batch.column(1).to_numpy().astype(np.int64, copy=False),
+        )
+
+
+def write_parquet_pairs(
+    pairs: Iterable[tuple[np.ndarray, np.ndarray]],
+    path: str,
+    columns: Sequence[str] = ("source", "target"),
+) -> int:
+    """
+    Writes a stream of edge chunks as a Parquet edge table, one row group
+    per chunk. Needs pyarrow.
+
+    Params:
+        pairs: (source, target) integer arrays, one chunk at a time
+        path: output file
+        columns: source and target column names
+
+    Returns:
+        the number of edges written
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(columns[0], pa.int64()), (columns[1], pa.int64())])
+    written = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for src, dst in pairs:
+            writer.write_table(
+                pa.table(
+                    [pa.array(src, pa.int64()), pa.array(dst, pa.int64())],
+                    schema=schema,
+                )
+            )
+            written += len(src)
+    return written
+
+
+def read_text_edges(
+    path: str,
+    delimiter: str = "\t",
+    directed: bool = True,
+    workers: Optional[int] = None,
+) -> CSRGraph:
+    """
+    Reads a headerless edge list of integer node ids, the first two fields
+    of each line, into a CSRGraph. Lines that don't parse, such as comments,
+    are skipped.
+
+    Params:
+        path: the edge file
+        delimiter: field separator
+        directed: treat edges as directed
+        workers: parser processes, defaults to the number of cores
+
+    Returns:
+        the graph, with a node map back to the ids in the file
+    """
+    sources, targets = read_edge_list(path, (0, 1), delimiter, False, workers)
+    node_map, src, dst = NodeMap.from_edges(sources, targets)
+    return CSRGraph.from_edges(src, dst, len(node_map), directed, node_map)
+
+
+def write_binary_edges(graph: CSRGraph, path: str, chunk: int = CHUNK) -> None:
+    """
+    Writes the edges as raw (source, target) index pairs after a JSON
+    header, undirected edges once, followed by the node ids when the graph
+    has a node map. The file is written under a temporary name and renamed.
+
+    Params:
+        graph: the graph
+        path: output file
+        chunk: edges written at a time
+    """
+    n = graph.num_nodes
+    num_edges = graph.num_edges
+    dtype = np.dtype(np.int32 if n <= np.iinfo(np.int32).max else np.int64)
+    ids = None if graph.node_map is None else np.asarray(graph.node_map.ids)
+    edge_bytes = _aligned(2 * num_edges * dtype.itemsize)
+    header = json.dumps(
+        {
+            "version": VERSION,
+            "directed": graph.directed,
+            "num_nodes": n,
+            "num_edges": num_edges,
+            "dtype": dtype.str,
+            "ids": None
+            if ids is None
+            else {"dtype": ids.dtype.str, "offset": edge_bytes},
+        }
+    ).encode()
+    data_start = _aligned(len(MAGIC) + 8 + len(header))
+
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "wb") as file:
+        file.write(MAGIC)
+        file.write(struct.pack("<Q", len(header)))
+        file.write(header)
+        file.seek(data_start)
+        written = 0
+        for src, dst in edge_chunks(graph, chunk):
+            np.stack([src, dst], axis=1).astype(dtype).tofile(file)
+            written += len(src)
+        if written != num_edges:
+            raise ValueError(f"Graph has {written} edges, expected {num_edges}")
+        if ids is not None:
+            file.seek(data_start + edge_bytes)
+            np.ascontiguousarray(ids).tofile(file)
+    os.replace(tmp_path, path)
+
+
+def read_binary_edges(path: str) -> CSRGraph:
+    """
+    Reads a file written by write_binary_edges. The pairs are memory-mapped
+    and go straight into the CSR build.
+
+    Params:
+        path: the binary edge file
+
+    Returns:
+        the graph
+    """
+    header = read_binary_header(path)
+    data_start = header["data_start"]
+    n, num_edges = header["num_nodes"], header["num_edges"]
+    dtype = np.dtype(header["dtype"])
+    # mmap can't map an empty range
+    pairs = np.empty((0, 2), dtype=dtype)
+    if num_edges:
+        pairs = np.memmap(
+            path, dtype=dtype, mode="r", offset=data_start, shape=(num_edges, 2)
+        )
+    node_map = None
+    if header["ids"] is not None:
+        ids = np.empty(0, dtype=np.dtype(header["ids"]["dtype"]))
+        if n:
+            ids = np.memmap(
+                path,
+                dtype=ids.dtype,
+                mode="r",
+                offset=data_start + header["ids"]["offset"],
+                shape=(n,),
+            )
+        node_map = NodeMap(np.asarray(ids))
+    return CSRGraph.from_edges(
+        pairs[:, 0], pairs[:, 1], n, header["directed"], node_map
+    )
+
+
+def iter_binary_pairs(
+    path: str, ids: bool = True, chunk: int = CHUNK
+) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """
+    Reads a file written by write_binary_edges a chunk of pairs at a time
+    from a memory map.
+
+    Params:
+        path: the binary edge file
+        ids: give the stored node ids rather than indices, when there are
+            any
+        chunk: pairs per chunk
+
+    Returns:
+        an iterator of (source, target) int64 arrays
+    """
+    header = read_binary_header(path)
+    data_start = header["data_start"]
+    n, num_edges = header["num_nodes"], header["num_edges"]
+    if not num_edges:
+        return
+    pairs = np.memmap(
+        path,
+        dtype=np.dtype(header["dtype"]),
+        mode="r",
+        offset=data_start,
+        shape=(num_edges, 2),
+    )
+    labels = None
+    if ids and header["ids"] is not None:
+        labels = np.memmap(
+            path,
+            dtype=np.dtype(header["ids"]["dtype"]),
+            mode="r",
+            offset=data_start + header["ids"]["offset"],
+            shape=(n,),
+        )
+    for first in range(0, num_edges, chunk):
+        part = np.asarray(pairs[first : first + chunk], dtype=np.int64)
+        if labels is None:
+            yield part[:, 0], part[:, 1]
+        else:
+            yield (
+                np.asarray(labels[part[:, 0]], dtype=np.int64),
+                np.asarray(labels[part[:, 1]], dtype=np.int64),
+            )
+
+
+def read_binary_header(path: str) -> dict:
+    """
+    Params:
+        path: a binary edge file
+
+    Returns:
+        the file's JSON header
+    """
+    with open(path, "rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a binary edge list")
+        (length,) = struct.unpack("<Q", file.read(8))
+        header = json.loads(file.read(length))
+
+    if header["version"] != VERSION:
+        raise ValueError(f"Unsupported binary edge list version {header['version']}")
+    header["data_start"] = _aligned(len(MAGIC) + 8 + length)
+    return header
+
+
+def validate_binary_edges(path: str) -> list[str]:
+    """
+    Checks a binary edge list against its header: the file holds as many
+    pairs and ids as the header says and every index is a node.
+
+    Params:
+        path: the binary edge file
+
+    Returns:
+        a description of every problem found, empty for a valid file
+    """
+    try:
+        header = read_binary_header(path)
+    except (ValueError, KeyError, struct.error, json.JSONDecodeError) as error:
+        return [f"unreadable header: {error}"]
+
+    n, num_edges = header["num_nodes"], header["num_edges"]
+    dtype = np.dtype(header["dtype"])
+    expected = header["data_start"] + 2 * num_edges * dtype.itemsize
+    if header["ids"] is not None:
+        expected = header["data_start"] + header["ids"]["offset"]
+        expected += n * np.dtype(header["ids"]["dtype"]).itemsize
+    size = os.path.getsize(path)
+    if size < expected:
+        return [f"file is {size} bytes, the header needs {expected}"]
+
+    pairs = np.memmap(
+        path, dtype=dtype, mode="r", offset=header["data_start"], shape=(num_edges, 2)
+    )
+    problems = []
+    outside = 0
+    for first in range(0, num_edges, CHUNK):
+        part = pairs[first : first + CHUNK]
+        outside += int(((part < 0) | (part >= n)).any(axis=1).sum())
+    if outside:
+        problems.append(f"{outside} edges have an endpoint outside 0..{n - 1}")
+    return problems
+
+
+def edge_chunks(
+    graph: CSRGraph, chunk: int = CHUNK
+) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """
+    The edges a range of rows at a time, in the order graph.edges() lists
+    them, without expanding them all at once.
+
+    Params:
+        graph: the graph
+        chunk: edges per chunk, roughly, a chunk holds whole rows
+
+    Returns:
+        an iterator of (src, dst) index arrays
+    """
+    indptr = np.asarray(graph.indptr)
+    n = graph.num_nodes
+    first = 0
+    while first < n:
+        last = int(np.searchsorted(indptr, indptr[first] + chunk, side="right"))
+        last = min(max(last - 1, first + 1), n)
+        src = np.repeat(
+            np.arange(first, last, dtype=np.int64), np.diff(indptr[first : last + 1])
+        )
+        dst = np.asarray(graph.indices[indptr[first] : indptr[last]], dtype=np.int64)
+        if not graph.directed:
+            src, dst = src[src <= dst], dst[src <= dst]
+        yield src, dst
+        first = last
+
+
+def labeled_edge_chunks(
+    graph: CSRGraph, ids: bool = True, chunk: int = CHUNK
+) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """
+    Params:
+        graph: the graph
+        ids: give original node ids rather than indices, when the graph has
+            a node map
+        chunk: edges per chunk, roughly
+
+    Returns:
+        an iterator of the (src, dst) chunks of edge_chunks, as ids
+    """
+    labels = _labels(graph, ids)
+    for src, dst in edge_chunks(graph, chunk):
+        if labels is None:
+            yield src, dst
+        else:
+            yield labels[src], labels[dst]
+
+
+def _simple_rows(graph: CSRGraph) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Helper method gives symmetric CSR rows without self loops or repeated
+    neighbors, the graph's own arrays when they already are
+    """
+    n = graph.num_nodes
+    if not graph.directed:
+        indices = np.asarray(graph.indices)
+        rows = np.repeat(np.arange(n, dtype=indices.dtype), graph.out_degree())
+        repeated = (indices[1:] == indices[:-1]) & (rows[1:] == rows[:-1])
+        if not repeated.any() and not (rows == indices).any():
+            return np.asarray(graph.indptr), indices
+
+    src, dst = graph.edges()
+    low = np.minimum(src, dst).astype(np.int64)
+    high = np.maximum(src, dst).astype(np.int64)
+    # sort and drop repeats, np.unique hashes and is slower on big arrays
+    pairs = np.sort((low * n + high)[low != high])
+    if len(pairs):
+        pairs = pairs[np.concatenate([[True], pairs[1:] != pairs[:-1]])]
+    simple = CSRGraph.from_edges(pairs // n, pairs % n, n, directed=False)
+    return simple.indptr, simple.indices
+
+
+def _labels(graph: CSRGraph, ids: bool) -> Optional[np.ndarray]:
+    """
+    Helper method gives the id written for each node index, None to write
+    the indices themselves
+    """
+    if not ids or graph.node_map is None:
+        return None
+    return np.asarray(graph.node_map.ids, dtype=np.int64)
+
+
+def _format(
+    values: np.ndarray, separators: np.ndarray, blank: Optional[np.ndarray] = None
+) -> bytes:
+    """
+    Helper method formats integers as decimal text, each followed by its
+    separator byte, in a few passes over the whole array. Every number gets
+    a row of digit columns, right aligned, and the unused leading columns
+    are dropped with one mask. Blank values print no digits, only their
+    separator.
+    """
+    values = np.asarray(values, dtype=np.int64)
+    magnitude = np.abs(values)
+    top = int(magnitude.max(initial=0))
+    width = max(int(np.searchsorted(POWERS, top, side="right")), 1)
+    digits = np.searchsorted(POWERS[:width], magnitude, side="right").clip(min=1)
+
+    # column 0 has room for a sign, the last column holds the separator,
+    # 32 bit division is twice as fast when the numbers fit
+    table = np.empty((len(values), width + 2), dtype=np.uint8)
+    dtype = np.uint32 if top <= np.iinfo(np.uint32).max else np.uint64
+    rest = magnitude.astype(dtype)
+    ten = dtype(10)
+    for column in range(width, 0, -1):
+        rest, digit = np.divmod(rest, ten)
+        table[:, column] = digit + ord("0")
+    table[:, -1] = separators
+
+    length = digits
+    negative = values < 0
+    if negative.any():
+        table[negative, width - digits[negative]] = ord("-")
+        length = digits + negative
+    if blank is not None:
+        length = np.where(blank, 0, length)
+    keep = np.arange(width + 2) >= (width + 1 - length)[:, None]
+    return table[keep].tobytes()
+
+
+def _read_metis_rows(
+    path: str, block: int
+) -> tuple[tuple[int, int], np.ndarray, np.ndarray]:
+    """
+    Helper method reads a METIS file's header and, for every adjacency line,
+    the number of entries and the entries themselves as written
+    """
+    counts = []
+    entries = []
+    with open(path, "rb") as file:
+        header = b"%"
+        while header.startswith(b"%"):
+            header = file.readline()
+            if not header:
+                raise ValueError(f"{path} has no METIS header")
+        fields = header.split()
+        if len(fields) < 2 or not all(field.isdigit() for field in fields):
+            raise ValueError(f"{path} has a malformed METIS header {header!r}")
+        if len(fields) > 2 and int(fields[2]) != 0:
+            raise ValueError(f"{path} is a weighted METIS graph, which isn't supported")
+
+        rest = b""
+        while True:
+            data = file.read(block)
+            final = not data
+            data = rest + data
+            cut = len(data) if final else data.rfind(b"\n") + 1
+            data, rest = data[:cut], data[cut:]
+            if data:
+                line_counts, values = _parse_lines(data, path)
+                counts.append(line_counts)
+                entries.append(values)
+            if final:
+                break
+
+    counts = np.concatenate(counts) if counts else np.zeros(0, dtype=np.int64)
+    entries = np.concatenate(entries) if entries else np.zeros(0, dtype=np.int64)
+    n = int(fields[0])
+    # blank lines past the last node are trailing whitespace, not nodes
+    if len(counts) > n and not counts[n:].any():
+        counts = counts[:n]
+    return (n, int(fields[1])), counts, entries
+
+
+def _parse_lines(data: bytes, path: str) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Helper method parses whole lines of non-negative integers, returning the
+    number of integers on each line and all of them in order
+    """
+    if b"%" in data:
+        data = b"\n".join(
+            line for line in data.split(b"\n") if not line.startswith(b"%")
+        )
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    digit = (buffer >= ord("0")) & (buffer <= ord("9"))
+    space = (buffer == SPACE) | (buffer == TAB) | (buffer == RETURN)
+    newline = buffer == NEWLINE
+    if not (digit | space | newline).all():
+        raise ValueError(f"{path} has characters other than digits and whitespace")
+
+    edge = np.diff(digit.astype(np.int8), prepend=0, append=0)
+    starts = np.flatnonzero(edge == 1)
+    ends = np.flatnonzero(edge == -1)
+    lengths = ends - starts
+    if len(lengths) and lengths.max() > len(POWERS):
+        raise ValueError(f"{path} has a number too large for 64 bits")
+
+    # each digit times its place value, summed per number
+    where = np.flatnonzero(digit)
+    place = np.repeat(ends - 1, lengths) - where
+    values = (buffer[where] - ord("0")).astype(np.int64) * POWERS[place]
+    offsets = np.cumsum(lengths) - lengths
+    values = np.add.reduceat(values, offsets) if len(offsets) else values
+
+    lines = int(newline.sum()) + (len(data) > 0 and data[-1:] != b"\n")
+    line = np.cumsum(newline)[starts] if len(starts) else starts
+    return np.bincount(line, minlength=lines).astype(np.int64), values
+
+
+def _aligned(size: int) -> int:
+    return -(-size // ALIGNMENT) * ALIGNMENT
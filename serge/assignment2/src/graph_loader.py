@@ -0,0 +1,84 @@
+from typing import Optional
+
+import numpy as np
+
+from edge_parser import read_edge_list
+from node_map import NodeMap
+
+
+def load_edge_table(
+    path: str, source: str = "citing_iid", target: str = "cited_iid"
+) -> tuple[np.ndarray, np.ndarray, NodeMap]:
+    """
+    Reads a citation edge table and maps both id columns onto dense indices.
+
+    Params:
+        path: CSV file with one edge per row
+        source: column holding the citing node id
+        target: column holding the cited node id
+
+    Returns:
+        (src, dst, node_map) where src and dst are int32 index arrays
+    """
+    sources, targets = read_edge_list(path, (source, target))
+    node_map, src, dst = NodeMap.from_edges(sources, targets)
+    return src, dst, node_map
+
+
+def to_networkit(
+    src: np.ndarray, dst: np.ndarray, num_nodes: int, directed: bool = True
+):
+    """
+    Builds a networkit graph from whole index arrays (COO), node i of the
+    graph is index i of the arrays.
+
+    Params:
+        src: source index of each edge
+        dst: target index of each edge
+        num_nodes: number of nodes, including any without edges
+        directed: build a directed graph
+
+    Returns:
+        a networkit Graph
+    """
+    import networkit as nk
+
+    return nk.graph.GraphFromCoo(
+        (src.astype(np.uint64, copy=False), dst.astype(np.uint64, copy=False)),
+        n=num_nodes,
+        directed=directed,
+    )
+
+
+def to_networkx(
+    src: np.ndarray,
+    dst: np.ndarray,
+    node_map: Optional[NodeMap] = None,
+    directed: bool = True,
+):
+    """
+    Builds a networkx graph from whole index arrays. Nodes are labelled with
+    their original ids when node_map is given, otherwise with their index.
+
+    Params:
+        src: source index of each edge
+        dst: target index of each edge
+        node_map: maps node indices back to original ids
+        directed: build a DiGraph rather than a Graph
+
+    Returns:
+        a networkx Graph or DiGraph
+    """
+    import networkx as nx
+
+    G = nx.DiGraph() if directed else nx.Graph()
+    if node_map is None:
+        num_nodes = int(max(src.max(initial=-1), dst.max(initial=-1))) + 1
+        G.add_nodes_from(range(num_nodes))
+        G.add_edges_from(zip(src.tolist(), dst.tolist()))
+    else:
+        G.add_nodes_from(node_map.ids.tolist())
+        G.add_edges_from(
+            zip(node_map.reverse(src).tolist(), node_map.reverse(dst).tolist())
+        )
+    return G
@@ -0,0 +1,255 @@
+import hashlib
+import json
+import logging
+import os
+import struct
+from typing import Optional
+
+import numpy as np
+
+from csr_graph import CSRGraph
+from graph_loader import load_edge_table
+from node_map import NodeMap
+
+
+# file layout: magic, header length, JSON header, then 64 byte aligned arrays
+MAGIC = b"CSRSNAP1"
+VERSION = 1
+ALIGNMENT = 64
+
+
+def file_checksum(path: str) -> str:
+    """
+    Hashes a file's contents in 4 MiB blocks.
+
+    Params:
+        path: the file to hash
+
+    Returns:
+        the hex BLAKE2b digest
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as file:
+        while block := file.read(4 << 20):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def source_info(path: str, checksum: Optional[str] = None) -> dict:
+    """
+    Describes a source file well enough to tell later whether it changed.
+
+    Params:
+        path: the source CSV
+        checksum: its checksum, computed if not given
+
+    Returns:
+        the file's size, modification time and checksum
+    """
+    stat = os.stat(path)
+    return {
+        "path": os.path.abspath(path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "checksum": checksum or file_checksum(path),
+    }
+
+
+def write_snapshot(
+    graph: CSRGraph,
+    path: str,
+    source: Optional[dict] = None,
+    build: Optional[dict] = None,
+) -> None:
+    """
+    Writes a CSR graph to a binary snapshot that open_snapshot can
+    memory-map. The file is written under a temporary name and renamed.
+
+    Params:
+        graph: the graph to save
+        path: destination snapshot file
+        source: source_info of the file the graph was built from
+        build: the options the graph was built with, e.g. its columns
+    """
+    arrays = {"indptr": graph.indptr, "indices": graph.indices}
+    if graph.directed:
+        arrays["in_indptr"] = graph.in_indptr
+        arrays["in_indices"] = graph.in_indices
+    if graph.node_map is not None:
+        arrays["node_ids"] = graph.node_map.ids
+
+    # lay the arrays out first, offsets are relative to the data section
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        layout[name] = {
+            "dtype": np.asarray(array).dtype.str,
+            "shape": list(np.shape(array)),
+            "offset": offset,
+        }
+        offset += _aligned(np.asarray(array).nbytes)
+
+    header = json.dumps(
+        {
+            "version": VERSION,
+            "directed": graph.directed,
+            "num_nodes": graph.num_nodes,
+            "num_edges": graph.num_edges,
+            "source": source,
+            "build": build,
+            "arrays": layout,
+        }
+    ).encode()
+    data_start = _aligned(len(MAGIC) + 8 + len(header))
+
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "wb") as file:
+        file.write(MAGIC)
+        file.write(struct.pack("<Q", len(header)))
+        file.write(header)
+        for name, array in arrays.items():
+            file.seek(data_start + layout[name]["offset"])
+            np.ascontiguousarray(array).tofile(file)
+        file.truncate(data_start + offset)
+    os.replace(tmp_path, path)
+
+
+def read_snapshot_header(path: str) -> dict:
+    """
+    Params:
+        path: a snapshot file
+
+    Returns:
+        the snapshot's JSON header
+    """
+    with open(path, "rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a CSR snapshot")
+        (length,) = struct.unpack("<Q", file.read(8))
+        header = json.loads(file.read(length))
+
+    if header["version"] != VERSION:
+        raise ValueError(f"Unsupported snapshot version {header['version']}")
+    header["data_start"] = _aligned(len(MAGIC) + 8 + length)
+    return header
+
+
+def open_snapshot(path: str) -> CSRGraph:
+    """
+    Opens a snapshot without reading it, every array is a read-only
+    np.memmap over the file so pages load on first touch.
+
+    Params:
+        path: a snapshot file
+
+    Returns:
+        the CSRGraph
+    """
+    header = read_snapshot_header(path)
+
+    def array(name: str) -> np.ndarray:
+        spec = header["arrays"][name]
+        if not spec["shape"][0]:
+            return np.empty(spec["shape"], dtype=spec["dtype"])
+        return np.memmap(
+            path,
+            dtype=np.dtype(spec["dtype"]),
+            mode="r",
+            offset=header["data_start"] + spec["offset"],
+            shape=tuple(spec["shape"]),
+        )
+
+    indptr, indices = array("indptr"), array("indices")
+    if header["directed"]:
+        in_indptr, in_indices = array("in_indptr"), array("in_indices")
+    else:
+        in_indptr, in_indices = indptr, indices
+    node_map = NodeMap(array("node_ids")) if "node_ids" in header["arrays"] else None
+
+    return CSRGraph(
+        indptr,
+        indices,
+        in_indptr,
+        in_indices,
+        header["num_edges"],
+        header["directed"],
+        node_map,
+    )
+
+
+def snapshot_is_current(
+    snapshot_path: str, source_path: str, build: Optional[dict] = None
+) -> bool:
+    """
+    Checks a snapshot against the file it was built from. A matching size and
+    modification time is trusted, otherwise the source is rehashed, so a
+    touched but unchanged file doesn't force a rebuild.
+
+    Params:
+        snapshot_path: the snapshot file
+        source_path: the source CSV
+        build: the build options wanted, a snapshot built with others is
+            not current
+
+    Returns:
+        True if the snapshot still matches the source
+    """
+    if not os.path.exists(snapshot_path):
+        return False
+    try:
+        header = read_snapshot_header(snapshot_path)
+        source = header["source"]
+    except (ValueError, KeyError, json.JSONDecodeError):
+        return False
+    if not source:
+        return False
+    if build is not None and header.get("build") != build:
+        return False
+
+    stat = os.stat(source_path)
+    if stat.st_size != source["size"]:
+        return False
+    if stat.st_mtime_ns == source["mtime_ns"]:
+        return True
+    return file_checksum(source_path) == source["checksum"]
+
+
+def load_graph(
+    csv_path: str,
+    snapshot_path: Optional[str] = None,
+    source: str = "citing_iid",
+    target: str = "cited_iid",
+    directed: bool = True,
+) -> CSRGraph:
+    """
+    Loads an edge table as a CSR graph, through a binary snapshot. The first
+    load parses the CSV and writes the snapshot, later loads memory-map the
+    snapshot until the CSV, the columns or the directedness change.
+
+    Params:
+        csv_path: CSV file with one edge per row
+        snapshot_path: snapshot file, defaults to csv_path + '.csr'
+        source: column holding the citing node id
+        target: column holding the cited node id
+        directed: treat edges as directed
+
+    Returns:
+        the CSRGraph
+    """
+    snapshot_path = snapshot_path or f"{csv_path}.csr"
+    build = {"source": source, "target": target, "directed": directed}
+
+    if snapshot_is_current(snapshot_path, csv_path, build):
+        logging.info(f"Opened graph snapshot {snapshot_path}.")
+        return open_snapshot(snapshot_path)
+
+    logging.info(f"Building graph snapshot {snapshot_path} from {csv_path}.")
+    info = source_info(csv_path)
+    src, dst, node_map = load_edge_table(csv_path, source, target)
+    graph = CSRGraph.from_edges(src, dst, len(node_map), directed, node_map)
+    write_snapshot(graph, snapshot_path, info, build)
+    return open_snapshot(snapshot_path)
+
+
+def _aligned(size: int) -> int:
+    return -(-size // ALIGNMENT) * ALIGNMENT
@@ -0,0 +1,318 @@
+from array import array
+from typing import Optional, Union
+from xml.etree.ElementTree import iterparse
+from xml.sax.saxutils import quoteattr
+
+import numpy as np
+
+from csr_graph import CSRGraph
+from graph_io import edge_chunks
+from node_map import NodeMap
+
+
+NAMESPACE = "http://graphml.graphdrawing.org/xmlns"
+HEADER = (
+    "<?xml version='1.0' encoding='utf-8'?>\n"
+    f'<graphml xmlns="{NAMESPACE}" '
+    'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+    f'xsi:schemaLocation="{NAMESPACE} {NAMESPACE}/1.0/graphml.xsd">\n'
+)
+
+# lines formatted at a time
+CHUNK = 1 << 18
+
+# GraphML attribute types and the arrays they are read into
+TYPES = {
+    "boolean": np.bool_,
+    "int": np.int32,
+    "long": np.int64,
+    "float": np.float32,
+    "double": np.float64,
+    "string": np.str_,
+}
+# array codes that numeric values are collected in while reading
+CODES = {"boolean": "b", "int": "q", "long": "q", "float": "d", "double": "d"}
+
+
+def write_graphml(
+    graph: CSRGraph,
+    path: str,
+    node_attrs: Optional[dict[str, np.ndarray]] = None,
+    edge_attrs: Optional[dict[str, np.ndarray]] = None,
+    ids: bool = True,
+    chunk: int = CHUNK,
+) -> None:
+    """
+    Writes a graph as GraphML a chunk of elements at a time. The lines of a
+    chunk are put together with NumPy string operations, column by column,
+    so the document never exists as a tree or as one string. Attribute
+    types follow the arrays' dtypes: bool, int, long, float, double or
+    string.
+
+    Params:
+        graph: the graph
+        path: output file
+        node_attrs: one array per attribute, entry i belongs to node i
+        edge_attrs: one array per attribute, in the order of graph.edges()
+        ids: use original node ids as the GraphML ids, when the graph has a
+            node map, instead of indices
+        chunk: elements formatted at a time
+    """
+    node_attrs = {
+        name: np.asarray(values) for name, values in (node_attrs or {}).items()
+    }
+    edge_attrs = {
+        name: np.asarray(values) for name, values in (edge_attrs or {}).items()
+    }
+    labels = np.arange(graph.num_nodes, dtype=np.int64)
+    if ids and graph.node_map is not None:
+        labels = np.asarray(graph.node_map.ids)
+
+    keys = []
+    for domain, attrs in (("node", node_attrs), ("edge", edge_attrs)):
+        for name, values in attrs.items():
+            key = f"d{len(keys)}"
+            keys.append(
+                f'  <key id="{key}" for="{domain}" attr.name={quoteattr(name)} '
+                f'attr.type="{_graphml_type(values)}" />\n'
+            )
+
+    edgedefault = "directed" if graph.directed else "undirected"
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(HEADER)
+        file.writelines(keys)
+        file.write(f'  <graph edgedefault="{edgedefault}">\n')
+
+        for first in range(0, graph.num_nodes, chunk):
+            part = slice(first, first + chunk)
+            columns = ['    <node id="', labels[part], '"']
+            file.write(_elements(columns, node_attrs, part, 0, "node"))
+
+        done = 0
+        for src, dst in edge_chunks(graph, chunk):
+            part = slice(done, done + len(src))
+            columns = [
+                '    <edge source="',
+                labels[src],
+                '" target="',
+                labels[dst],
+                '"',
+            ]
+            file.write(_elements(columns, edge_attrs, part, len(node_attrs), "edge"))
+            done += len(src)
+
+        file.write("  </graph>\n</graphml>\n")
+
+
+def read_graphml(
+    path: str,
+) -> tuple[CSRGraph, dict[str, np.ndarray], dict[str, np.ndarray]]:
+    """
+    Reads a GraphML file with iterparse, clearing every element once it is
+    read, so memory holds the arrays being filled and the node ids, never
+    the document.
+    When every node id is an integer the nodes are numbered by id and the
+    ids become the node map, otherwise they are numbered in file order and
+    the ids are kept in the "id" node attribute. Attributes are typed by
+    their key declarations and missing values take the key's default, or
+    zero, NaN, False or "" without one.
+
+    Params:
+        path: the GraphML file
+
+    Returns:
+        (graph, node_attrs, edge_attrs), node attributes by node index and
+        edge attributes in the order of graph.edges()
+    """
+    keys: dict[str, tuple[str, str, str, Optional[str]]] = {}
+    # (owners, values) of every key, by key and element
+    values: dict[tuple[str, str], tuple[array, Union[array, list]]] = {}
+    index: dict[str, int] = {}
+    names: list[str] = []
+    src, dst = array("q"), array("q")
+    directed = True
+
+    def node_index(name: str) -> int:
+        if name not in index:
+            index[name] = len(names)
+            names.append(name)
+        return index[name]
+
+    owner, owner_tag, data_key = 0, "graph", None
+    events = iterparse(path, events=("start", "end"))
+    _, parent = next(events)
+    for event, element in events:
+        tag = element.tag.rpartition("}")[2]
+        if event == "start":
+            if tag == "graph":
+                directed = element.get("edgedefault", "directed") == "directed"
+                parent = element
+            elif tag == "node":
+                owner, owner_tag = node_index(element.get("id")), tag
+            elif tag == "edge":
+                owner, owner_tag = len(src), tag
+                src.append(node_index(element.get("source")))
+                dst.append(node_index(element.get("target")))
+            elif tag == "data":
+                data_key = element.get("key")
+            continue
+
+        if tag == "key":
+            default = element.findtext(f"{{{NAMESPACE}}}default")
+            keys[element.get("id")] = (
+                element.get("for", "all"),
+                element.get("attr.name", element.get("id")),
+                element.get("attr.type", "string"),
+                default,
+            )
+        elif tag == "data":
+            kind = keys[data_key][2] if data_key in keys else "string"
+            if (data_key, owner_tag) not in values:
+                column = array(CODES[kind]) if kind in CODES else []
+                values[(data_key, owner_tag)] = (array("q"), column)
+            owners, column = values[(data_key, owner_tag)]
+            owners.append(owner)
+            column.append(_parse(kind, element.text or ""))
+        elif tag in ("node", "edge"):
+            # the builder keeps finished elements as children of the graph
+            owner_tag = "graph"
+            parent.clear()
+
+    n = len(names)
+    src = np.frombuffer(src, dtype=np.int64)
+    dst = np.frombuffer(dst, dtype=np.int64)
+    node_attrs: dict[str, np.ndarray] = {}
+    edge_attrs: dict[str, np.ndarray] = {}
+    for key, (domain, name, kind, default) in keys.items():
+        if domain == "node" or (key, "node") in values:
+            node_attrs[name] = _typed(values.get((key, "node")), n, kind, default)
+        if domain == "edge" or (key, "edge") in values:
+            edge_attrs[name] = _typed(
+                values.get((key, "edge")), len(src), kind, default
+            )
+
+    node_map = None
+    if all(name.lstrip("-").isdigit() for name in names):
+        # NodeMap numbers nodes in id order
+        ids = np.array(names, dtype=np.int64)
+        order = np.argsort(ids, kind="stable")
+        rank = np.empty(n, dtype=np.int64)
+        rank[order] = np.arange(n)
+        src, dst = rank[src], rank[dst]
+        node_attrs = {name: column[order] for name, column in node_attrs.items()}
+        node_map = NodeMap(ids[order])
+    else:
+        node_attrs["id"] = np.array(names)
+
+    # the CSR build sorts the edges, the edge attributes follow them
+    low, high = src, dst
+    if not directed:
+        low, high = np.minimum(src, dst), np.maximum(src, dst)
+    order = np.argsort(low * max(n, 1) + high, kind="stable")
+    edge_attrs = {name: column[order] for name, column in edge_attrs.items()}
+
+    graph = CSRGraph.from_edges(src, dst, n, directed, node_map)
+    return graph, node_attrs, edge_attrs
+
+
+def _elements(
+    columns: list,
+    attrs: dict[str, np.ndarray],
+    part: slice,
+    first_key: int,
+    tag: str,
+) -> str:
+    """
+    Helper method puts together the lines of a chunk of elements from
+    constant strings and per-element arrays, adding a data child for every
+    attribute
+    """
+    if not attrs:
+        return "".join(_concatenate(columns + [" />\n"]).tolist())
+    columns = columns + [">\n"]
+    for number, values in enumerate(attrs.values(), first_key):
+        columns += [
+            f'      <data key="d{number}">',
+            values[part],
+            "</data>\n",
+        ]
+    columns.append(f"    </{tag}>\n")
+    return "".join(_concatenate(columns).tolist())
+
+
+def _concatenate(columns: list) -> np.ndarray:
+    """
+    Helper method joins constant strings and arrays element-wise
+    """
+    line = None
+    for column in columns:
+        if not isinstance(column, str):
+            column = _text(column)
+        line = column if line is None else np.strings.add(line, column)
+    return np.atleast_1d(line)
+
+
+def _text(values: np.ndarray) -> np.ndarray:
+    """
+    Helper method converts attribute values to escaped XML text
+    """
+    if values.dtype == np.bool_:
+        return np.where(values, "true", "false")
+    if values.dtype.kind in "iuf":
+        return values.astype(str)
+    text = values.astype(str)
+    for character, entity in (("&", "&amp;"), ("<", "&lt;"), (">", "&gt;")):
+        text = np.strings.replace(text, character, entity)
+    return text
+
+
+def _graphml_type(values: np.ndarray) -> str:
+    """
+    Helper method names the GraphML type of an attribute array
+    """
+    kind, size = values.dtype.kind, values.dtype.itemsize
+    if kind == "b":
+        return "boolean"
+    if kind in "iu":
+        return "int" if size <= 4 and kind == "i" else "long"
+    if kind == "f":
+        return "float" if size <= 4 else "double"
+    return "string"
+
+
+def _parse(kind: str, text: str) -> Union[bool, int, float, str]:
+    """
+    Helper method reads one attribute value of a GraphML type
+    """
+    if kind == "boolean":
+        return text.strip().lower() in ("true", "1")
+    if kind in ("int", "long"):
+        return int(text)
+    if kind in ("float", "double"):
+        return float(text)
+    return text
+
+
+def _typed(
+    values: Optional[tuple[array, Union[array, list]]],
+    count: int,
+    kind: str,
+    default: Optional[str],
+) -> np.ndarray:
+    """
+    Helper method puts the values of an attribute into a typed array with
+    the default filled in
+    """
+    dtype = TYPES.get(kind, np.str_)
+    if default is not None:
+        fill = _parse(kind, default)
+    elif dtype is np.str_:
+        fill = ""
+    else:
+        fill = np.nan if np.issubdtype(dtype, np.floating) else 0
+
+    result = np.full(count, fill, dtype=object if dtype is np.str_ else dtype)
+    if values is not None:
+        owners, column = values
+        result[np.frombuffer(owners, dtype=np.int64)] = column
+    return result.astype(str) if dtype is np.str_ else result
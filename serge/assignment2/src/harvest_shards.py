@@ -0,0 +1,262 @@
+import argparse
+import json
+import logging
+import os
+from datetime import date, datetime, timedelta
+from typing import Callable, Optional
+
+from file_locks import keep_alive, release, try_claim
+from records import PubmedRecord, read_records_from_csv, write_records_to_csv
+
+
+MANIFEST = "manifest.json"
+DATE_FORMAT = "%Y/%m/%d"
+
+# a harvest takes a (start_date, end_date, api_key) window and returns records
+Harvest = Callable[[str, str, Optional[str]], list[PubmedRecord]]
+
+
+def harvest_window(
+    start_date: str, end_date: str, api_key: Optional[str] = None
+) -> list[PubmedRecord]:
+    """
+    Default harvest, runs our search term over one date window and fetches
+    every matching record
+
+    Params:
+        start_date: begin search window here
+        end_date: end search window here
+        api_key: optional NCBI API key, raises the rate limit to 10 requests/s
+
+    Returns:
+        the records published in the window
+    """
+    # imported here so workers with a custom harvest don't need requests
+    from main import build_search_term, fetch_records, search_pmids
+
+    pmids = search_pmids(build_search_term(start_date, end_date), api_key)
+    return fetch_records(pmids, api_key)
+
+
+def plan_shards(
+    directory: str, start_date: str, end_date: str, days: int = 90
+) -> list[dict]:
+    """
+    Splits a publication window into date-window shards and writes the job
+    manifest. Windows should be small enough that each one stays under the
+    10,000 result eSearch limit.
+
+    Params:
+        directory: shared job directory, every worker must see the same path
+        start_date: begin search window here, YYYY/MM/DD
+        end_date: end search window here, YYYY/MM/DD
+        days: length of each shard's window
+
+    Returns:
+        the planned shards
+    """
+    start = datetime.strptime(start_date, DATE_FORMAT).date()
+    end = datetime.strptime(end_date, DATE_FORMAT).date()
+    if end < start:
+        raise ValueError(f"end_date {end_date} is before start_date {start_date}")
+
+    shards = []
+    window_start: date = start
+    while window_start <= end:
+        window_end = min(window_start + timedelta(days=days - 1), end)
+        shards.append(
+            {
+                "id": f"{len(shards):05d}",
+                "start_date": window_start.strftime(DATE_FORMAT),
+                "end_date": window_end.strftime(DATE_FORMAT),
+            }
+        )
+        window_start = window_end + timedelta(days=1)
+
+    os.makedirs(os.path.join(directory, "shards"), exist_ok=True)
+    os.makedirs(os.path.join(directory, "locks"), exist_ok=True)
+
+    manifest_path = os.path.join(directory, MANIFEST)
+    tmp_path = f"{manifest_path}.tmp.{os.getpid()}"
+    with open(tmp_path, "w") as file:
+        json.dump(
+            {"start_date": start_date, "end_date": end_date, "shards": shards},
+            file,
+            indent=2,
+        )
+    os.replace(tmp_path, manifest_path)
+
+    logging.info(f"Planned {len(shards)} shards in {directory}.")
+    return shards
+
+
+def load_manifest(directory: str) -> dict:
+    with open(os.path.join(directory, MANIFEST)) as file:
+        return json.load(file)
+
+
+def shard_output(directory: str, shard: dict) -> str:
+    return os.path.join(directory, "shards", f"{shard['id']}.csv")
+
+
+def run_worker(
+    directory: str,
+    harvest: Harvest = harvest_window,
+    api_key: Optional[str] = None,
+    stale_after: Optional[float] = None,
+) -> int:
+    """
+    Claims and harvests shards until none are left. Any number of workers,
+    on any host that mounts the job directory, can run at once. A shard
+    counts as done once its output file exists, outputs are written under a
+    temporary name and renamed, so a crashed worker never leaves a partial
+    shard behind.
+
+    Params:
+        directory: shared job directory written by plan_shards
+        harvest: function that harvests one date window
+        api_key: NCBI API key for this worker
+        stale_after: seconds after which another worker's claim is treated
+            as abandoned, None to only take over claims of dead local workers
+
+    Returns:
+        the number of shards this worker harvested
+    """
+    manifest = load_manifest(directory)
+    harvested = 0
+
+    for shard in manifest["shards"]:
+        output_path = shard_output(directory, shard)
+        if os.path.exists(output_path):
+            continue
+
+        lock_path = os.path.join(directory, "locks", f"{shard['id']}.lock")
+        if not try_claim(lock_path, stale_after):
+            continue
+
+        try:
+            # someone may have finished it between our check and the claim
+            if os.path.exists(output_path):
+                continue
+
+            logging.info(
+                f"Harvesting shard {shard['id']}: {shard['start_date']} to {shard['end_date']}."
+            )
+            with keep_alive(lock_path):
+                records = harvest(shard["start_date"], shard["end_date"], api_key)
+                write_records_to_csv(records, output_path)
+            harvested += 1
+        except Exception as e:
+            # leave the shard unfinished so another worker can retry it
+            logging.error(f"Shard {shard['id']} failed: {e}")
+        finally:
+            release(lock_path)
+
+    return harvested
+
+
+def shard_status(directory: str) -> dict[str, int]:
+    """
+    Params:
+        directory: shared job directory
+
+    Returns:
+        counts of done, claimed and pending shards
+    """
+    manifest = load_manifest(directory)
+    status = {"done": 0, "claimed": 0, "pending": 0}
+
+    for shard in manifest["shards"]:
+        if os.path.exists(shard_output(directory, shard)):
+            status["done"] += 1
+        elif os.path.exists(os.path.join(directory, "locks", f"{shard['id']}.lock")):
+            status["claimed"] += 1
+        else:
+            status["pending"] += 1
+
+    return status
+
+
+def merge_shards(directory: str, output_path: str) -> int:
+    """
+    Merges every finished shard into one record file, deduplicated by PMID.
+    Windows don't overlap, but a record can still appear twice when its
+    print and electronic publication dates fall in different shards.
+
+    Params:
+        directory: shared job directory
+        output_path: the merged CSV file
+
+    Returns:
+        the number of unique records written
+    """
+    manifest = load_manifest(directory)
+    missing = [
+        shard["id"]
+        for shard in manifest["shards"]
+        if not os.path.exists(shard_output(directory, shard))
+    ]
+    if missing:
+        logging.warning(f"Merging without {len(missing)} unfinished shards: {missing}")
+
+    seen: set[int] = set()
+
+    def unique_records():
+        for shard in manifest["shards"]:
+            path = shard_output(directory, shard)
+            if not os.path.exists(path):
+                continue
+            for record in read_records_from_csv(path):
+                if record.pmid not in seen:
+                    seen.add(record.pmid)
+                    yield record
+
+    return write_records_to_csv(unique_records(), output_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Shard a PubMed harvest across processes or machines."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    plan = commands.add_parser("plan", help="write the shard manifest")
+    plan.add_argument("directory")
+    plan.add_argument("start_date", help="YYYY/MM/DD")
+    plan.add_argument("end_date", help="YYYY/MM/DD")
+    plan.add_argument("--days", type=int, default=90)
+
+    work = commands.add_parser("work", help="harvest shards until none are left")
+    work.add_argument("directory")
+    work.add_argument("--api-key", default=os.environ.get("NCBI_API_KEY"))
+    work.add_argument("--stale-after", type=float, default=None)
+
+    status = commands.add_parser("status", help="count finished shards")
+    status.add_argument("directory")
+
+    merge = commands.add_parser("merge", help="merge shard outputs by PMID")
+    merge.add_argument("directory")
+    merge.add_argument("output_path")
+
+    args = parser.parse_args()
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(levelname)s:%(message)s"
+    )
+
+    if args.command == "plan":
+        shards = plan_shards(args.directory, args.start_date, args.end_date, args.days)
+        print(f"Planned {len(shards)} shards.")
+    elif args.command == "work":
+        harvested = run_worker(
+            args.directory, api_key=args.api_key, stale_after=args.stale_after
+        )
+        print(f"Harvested {harvested} shards.")
+    elif args.command == "status":
+        print(shard_status(args.directory))
+    elif args.command == "merge":
+        count = merge_shards(args.directory, args.output_path)
+        print(f"Merged {count} records.")
+
+
+if __name__ == "__main__":
+    main()
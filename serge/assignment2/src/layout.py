@@ -0,0 +1,673 @@
+import argparse
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from csr_graph import CSRGraph
+from graph_snapshot import load_graph
+
+# depth of the quadtree, cells at the deepest level are 1 / 2**16 of the
+# layout's width and points that share one are treated as a single mass
+LEVELS = 16
+
+
+@dataclass
+class QuadTree:
+    """
+    A Barnes-Hut quadtree stored level by level as arrays. A point's cell at
+    level l is its Morton code shifted right by 2 * (LEVELS - l), so sorting
+    the points by code lays every level's cells out in order and a cell's
+    children are a contiguous run of the next level. Level 0 is the root.
+    Only occupied cells are stored.
+    """
+
+    size: float
+    codes: np.ndarray
+    keys: list[np.ndarray]
+    count: list[np.ndarray]
+    mass: list[np.ndarray]
+    center_x: list[np.ndarray]
+    center_y: list[np.ndarray]
+    child_start: list[np.ndarray]
+    child_end: list[np.ndarray]
+
+    @classmethod
+    def build(cls, pos: np.ndarray, weight: np.ndarray) -> "QuadTree":
+        """
+        Builds the tree with one sort of the points' Morton codes and one
+        reduceat per level.
+
+        Params:
+            pos: (n, 2) coordinates
+            weight: mass of every point
+
+        Returns:
+            the QuadTree
+        """
+        low = pos.min(axis=0)
+        size = float((pos.max(axis=0) - low).max()) * (1 + 1e-9) or 1.0
+        side = 1 << LEVELS
+        grid = ((pos - low) * (side / size)).astype(np.int64).clip(0, side - 1)
+        codes = _interleave(grid[:, 0]) | (_interleave(grid[:, 1]) << 1)
+
+        order = np.argsort(codes, kind="stable")
+        keys = codes[order]
+        starts = _run_starts(keys)
+        levels = [
+            (
+                keys[starts],
+                np.diff(np.append(starts, len(keys))),
+                np.add.reduceat(weight[order], starts),
+                np.add.reduceat(weight[order, None] * pos[order], starts, axis=0),
+            )
+        ]
+        child_start = []
+
+        # every parent level aggregates runs of the level below
+        for _ in range(LEVELS):
+            keys, count, mass, moment = levels[-1]
+            parents = keys >> 2
+            starts = _run_starts(parents)
+            levels.append(
+                (
+                    parents[starts],
+                    np.add.reduceat(count, starts),
+                    np.add.reduceat(mass, starts),
+                    np.add.reduceat(moment, starts, axis=0),
+                )
+            )
+            child_start.append(starts)
+
+        levels.reverse()
+        child_start.reverse()
+        child_end = [
+            np.append(starts[1:], len(levels[depth + 1][0]))
+            for depth, starts in enumerate(child_start)
+        ]
+        keys, count, mass, moment = (list(column) for column in zip(*levels))
+        center_x = [m[:, 0] / w for m, w in zip(moment, mass)]
+        center_y = [m[:, 1] / w for m, w in zip(moment, mass)]
+        return cls(
+            size, codes, keys, count, mass, center_x, center_y, child_start, child_end
+        )
+
+    def repulsion(
+        self,
+        x: np.ndarray,
+        y: np.ndarray,
+        codes: np.ndarray,
+        weight: np.ndarray,
+        theta: float,
+    ) -> np.ndarray:
+        """
+        Sum of m_j * (x_i - x_j) / |x_i - x_j|**2 over the tree's points j, for
+        each query point i, with far cells standing in for the points inside
+        them. All (query, cell) pairs of one level are handled at once: a cell
+        is used whole when its width is below theta times its distance to the
+        query, holds one point, or is a leaf, and is opened otherwise.
+
+        Params:
+            x: x coordinate of each query
+            y: y coordinate of each query
+            codes: the query's code in self.codes when the query is one of
+                the tree's own points, which is left out of its own sum, and
+                -1 otherwise
+            weight: mass of each query, the mass it has in the tree
+            theta: opening angle, smaller is more exact and slower
+
+        Returns:
+            (len(x), 2) repulsion, before scaling by the queries' masses
+        """
+        force_x = np.zeros(len(x))
+        force_y = np.zeros(len(x))
+        local = np.arange(len(x))
+        cells = np.zeros(len(x), dtype=np.int64)
+
+        for depth in range(LEVELS + 1):
+            if not len(local):
+                break
+            width = self.size / (1 << depth)
+            mass = self.mass[depth][cells]
+            center_x = self.center_x[depth][cells]
+            center_y = self.center_y[depth][cells]
+            count = self.count[depth][cells]
+
+            # take the point itself out of the one cell holding it, a cell
+            # holding only the point is left with no mass and pushes nothing
+            inside = np.flatnonzero(
+                (codes[local] >> (2 * (LEVELS - depth))) == self.keys[depth][cells]
+            )
+            mine = local[inside]
+            own, rest = weight[mine], mass[inside] - weight[mine]
+            alone = rest <= 1e-12 * own
+            rest[alone] = 1.0
+            center_x[inside] = (mass[inside] * center_x[inside] - own * x[mine]) / rest
+            center_y[inside] = (mass[inside] * center_y[inside] - own * y[mine]) / rest
+            rest[alone] = 0.0
+            mass[inside] = rest
+            count[inside] -= 1
+
+            delta_x = x[local] - center_x
+            delta_y = y[local] - center_y
+            dist2 = np.maximum(delta_x * delta_x + delta_y * delta_y, 1e-12 * width**2)
+            whole = (
+                (count <= 1)
+                | (width * width < theta * theta * dist2)
+                | (depth == LEVELS)
+            )
+
+            push = mass[whole] / dist2[whole]
+            near = local[whole]
+            force_x += np.bincount(near, delta_x[whole] * push, len(x))
+            force_y += np.bincount(near, delta_y[whole] * push, len(x))
+
+            # open the rest, every child becomes a pair of the next level
+            if depth < LEVELS:
+                local, cells = local[~whole], cells[~whole]
+                starts = self.child_start[depth][cells]
+                counts = self.child_end[depth][cells] - starts
+                local = np.repeat(local, counts)
+                cells = np.repeat(starts - np.cumsum(counts) + counts, counts)
+                cells += np.arange(len(cells))
+        return np.stack([force_x, force_y], axis=1)
+
+
+def force_layout(
+    graph: CSRGraph,
+    k: float = 1.0,
+    iterations: int = 100,
+    theta: float = 1.0,
+    repulsion: float = 0.2,
+    gravity: float = 0.01,
+    tol: float = 0.01,
+    min_size: int = 50,
+    seed: Optional[int] = None,
+    workers: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Multilevel force directed layout of a graph (Hu's sfdp), edge directions
+    ignored. See layout_edges.
+
+    Params:
+        graph: the graph
+        k: natural edge length
+        iterations: most iterations at each level
+        theta: Barnes-Hut opening angle
+        repulsion: strength of the repulsion relative to the springs
+        gravity: pull towards the center, keeps disconnected pieces in view
+        tol: stop a level once the step falls below tol mean edge lengths
+        min_size: stop coarsening at this many nodes
+        seed: random seed, the same seed gives the same layout
+        workers: threads for the repulsion, defaults to the number of cores
+
+    Returns:
+        (num_nodes, 2) coordinates, row i is node index i
+    """
+    src, dst = graph.edges()
+    return layout_edges(
+        src,
+        dst,
+        graph.num_nodes,
+        k,
+        iterations,
+        theta,
+        repulsion,
+        gravity,
+        tol,
+        min_size,
+        seed,
+        workers,
+    )
+
+
+def layout_edges(
+    src: np.ndarray,
+    dst: np.ndarray,
+    num_nodes: int,
+    k: float = 1.0,
+    iterations: int = 100,
+    theta: float = 1.0,
+    repulsion: float = 0.2,
+    gravity: float = 0.01,
+    tol: float = 0.01,
+    min_size: int = 50,
+    seed: Optional[int] = None,
+    workers: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Multilevel force directed layout of an edge list. The graph is coarsened
+    by matching nodes along edges until it is small, the coarsest graph is
+    laid out from random positions, and every finer level starts from the
+    coarser layout and only has to relax locally. Springs pull with
+    d**2 / k, every pair of nodes repels with repulsion * k**2 / d through a
+    Barnes-Hut quadtree, so an iteration is O(n log n) rather than the O(n**2)
+    of networkx's spring_layout.
+
+    Params:
+        src: source index of each edge
+        dst: target index of each edge
+        num_nodes: number of nodes, including any without edges
+        k: natural edge length
+        iterations: most iterations at each level
+        theta: Barnes-Hut opening angle
+        repulsion: strength of the repulsion relative to the springs
+        gravity: pull towards the center, keeps disconnected pieces in view
+        tol: stop a level once the step falls below tol mean edge lengths
+        min_size: stop coarsening at this many nodes
+        seed: random seed, the same seed gives the same layout
+        workers: threads for the repulsion, defaults to the number of cores
+
+    Returns:
+        (num_nodes, 2) coordinates, row i is node index i
+    """
+    rng = np.random.default_rng(seed)
+    workers = workers or os.cpu_count() or 1
+    forces = Forces(k, theta, repulsion, gravity, workers)
+
+    levels = [(*_simple_edges(src, dst, num_nodes), np.ones(num_nodes))]
+    labels = []
+    while len(levels[-1][3]) > min_size:
+        src, dst, weight, node_weight = levels[-1]
+        label, num = coarsen(src, dst, weight, node_weight, rng)
+        if num > 0.75 * len(node_weight):
+            # matching has stalled, e.g. on a star
+            break
+        src, dst, weight = _simple_edges(label[src], label[dst], num, weight)
+        levels.append((src, dst, weight, np.bincount(label, node_weight, num)))
+        labels.append(label)
+    logging.info(f"Layout levels: {[len(level[3]) for level in levels]}")
+
+    src, dst, weight, node_weight = levels[-1]
+    side = k * np.sqrt(node_weight.sum())
+    pos = rng.uniform(0, side, (len(node_weight), 2))
+    pos = relax(forces, src, dst, weight, node_weight, pos, iterations, 1.0, tol)
+
+    for label, (src, dst, weight, node_weight) in zip(
+        reversed(labels), reversed(levels[:-1])
+    ):
+        # a fine node starts on its coarse node, nudged off its partners
+        pos = pos[label] + rng.normal(0, 0.1 * k, (len(label), 2))
+        pos = relax(forces, src, dst, weight, node_weight, pos, iterations, 0.3, tol)
+    return pos
+
+
+def refine_layout(
+    src: np.ndarray,
+    dst: np.ndarray,
+    num_nodes: int,
+    pos: np.ndarray,
+    movable: np.ndarray,
+    k: float = 1.0,
+    iterations: int = 100,
+    theta: float = 1.0,
+    repulsion: float = 0.2,
+    gravity: float = 0.01,
+    tol: float = 0.01,
+    workers: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Warm starts a layout: only the movable nodes are relaxed, from the given
+    positions, while every other node stays put. The fixed nodes' quadtree
+    is built once and only forces on movable nodes are computed, so an
+    iteration costs about the size of the movable region, not of the graph.
+    Use it after a small change to a graph that was laid out before, with
+    the changed nodes and their neighborhood movable.
+
+    Params:
+        src: source index of each edge
+        dst: target index of each edge
+        num_nodes: number of nodes, including any without edges
+        pos: (num_nodes, 2) starting coordinates
+        movable: indices of the nodes that may move
+        k: natural edge length
+        iterations: most iterations
+        theta: Barnes-Hut opening angle
+        repulsion: strength of the repulsion relative to the springs
+        gravity: pull towards the center, keeps disconnected pieces in view
+        tol: stop once the step falls below tol mean edge lengths
+        workers: threads for the repulsion, defaults to the number of cores
+
+    Returns:
+        (num_nodes, 2) coordinates, row i is node index i
+    """
+    workers = workers or os.cpu_count() or 1
+    forces = Forces(k, theta, repulsion, gravity, workers)
+    src, dst, weight = _simple_edges(src, dst, num_nodes)
+    movable = np.unique(np.asarray(movable, dtype=np.int64))
+    return relax(
+        forces,
+        src,
+        dst,
+        weight,
+        np.ones(num_nodes),
+        pos,
+        iterations,
+        0.3,
+        tol,
+        movable=movable,
+    )
+
+
+@dataclass
+class Forces:
+    """
+    The force model shared by every level of a layout.
+    """
+
+    k: float
+    theta: float
+    repulsion: float
+    gravity: float
+    workers: int
+    batch: int = 1 << 14
+
+    def __call__(
+        self,
+        src: np.ndarray,
+        dst: np.ndarray,
+        weight: np.ndarray,
+        node_weight: np.ndarray,
+        pos: np.ndarray,
+        movable: Optional[np.ndarray] = None,
+        frozen: Optional[QuadTree] = None,
+    ) -> np.ndarray:
+        """
+        Params:
+            src: source index of each edge, each edge once
+            dst: target index of each edge
+            weight: spring strength of each edge
+            node_weight: mass of every node
+            pos: (n, 2) coordinates
+            movable: the nodes to compute forces on, all by default
+            frozen: quadtree of the nodes that aren't movable, which don't
+                move and so are only built once
+
+        Returns:
+            (len(movable), 2) net force on each movable node
+        """
+        n, k = len(pos), self.k
+        points = np.arange(n) if movable is None else movable
+        x, y, mass = pos[points, 0], pos[points, 1], node_weight[points]
+
+        tree = QuadTree.build(pos[points], mass)
+        force = self._repel(tree, x, y, tree.codes, mass)
+        if frozen is not None:
+            force += self._repel(frozen, x, y, np.full(len(points), -1), mass)
+        force *= (self.repulsion * k * k * mass)[:, None]
+
+        # springs, d**2 / k along the edge
+        delta = pos[dst] - pos[src]
+        pull = delta * (weight * np.hypot(delta[:, 0], delta[:, 1]) / k)[:, None]
+        for axis in range(2):
+            spring = np.bincount(src, pull[:, axis], n)
+            spring -= np.bincount(dst, pull[:, axis], n)
+            force[:, axis] += spring[points]
+
+        # gravity grows with distance from the center so that loose nodes,
+        # repelled by everything else, settle instead of drifting away
+        center = pos.mean(axis=0)
+        force -= (self.gravity * mass / k)[:, None] * (pos[points] - center)
+        return force
+
+    def _repel(
+        self,
+        tree: QuadTree,
+        x: np.ndarray,
+        y: np.ndarray,
+        codes: np.ndarray,
+        mass: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Helper method runs the tree's repulsion over batches of queries, on
+        the thread pool when there is more than one worker
+        """
+        batches = [
+            slice(start, start + self.batch) for start in range(0, len(x), self.batch)
+        ]
+
+        def repel(batch: slice) -> np.ndarray:
+            return tree.repulsion(
+                x[batch], y[batch], codes[batch], mass[batch], self.theta
+            )
+
+        if self.workers > 1 and len(batches) > 1:
+            with ThreadPoolExecutor(self.workers) as pool:
+                parts = list(pool.map(repel, batches))
+        else:
+            parts = [repel(batch) for batch in batches]
+        return np.concatenate(parts) if parts else np.zeros((0, 2))
+
+
+def relax(
+    forces: Forces,
+    src: np.ndarray,
+    dst: np.ndarray,
+    weight: np.ndarray,
+    node_weight: np.ndarray,
+    pos: np.ndarray,
+    iterations: int,
+    step: float,
+    tol: float,
+    cooling: float = 0.9,
+    movable: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Moves every node a step along its net force until the step gets small.
+    The step follows Hu's adaptive scheme, shrinking whenever the energy
+    rises and growing after five improvements in a row, and cools on top of
+    that so a level ends after a predictable number of iterations. Steps are
+    measured in mean edge lengths, since the long range repulsion stretches
+    edges well past k on large graphs.
+
+    Params:
+        forces: the force model
+        src: source index of each edge
+        dst: target index of each edge
+        weight: spring strength of each edge
+        node_weight: mass of every node
+        pos: (n, 2) starting coordinates
+        iterations: most iterations
+        step: initial step, in mean edge lengths
+        tol: stop once the step falls below tol mean edge lengths
+        cooling: factor the step shrinks by every iteration
+        movable: the only nodes that move, all by default
+
+    Returns:
+        (n, 2) relaxed coordinates
+    """
+    pos = np.array(pos, dtype=np.float64)
+    frozen = None
+    if movable is not None:
+        fixed = np.ones(len(pos), dtype=bool)
+        fixed[movable] = False
+        if fixed.any():
+            frozen = QuadTree.build(pos[fixed], node_weight[fixed])
+        # only springs with a movable end pull on anything that moves
+        touching = ~fixed[src] | ~fixed[dst]
+        src, dst, weight = src[touching], dst[touching], weight[touching]
+    points = np.arange(len(pos)) if movable is None else movable
+    if not len(points):
+        return pos
+
+    scale = forces.k
+    if len(src):
+        scale = float(np.hypot(*(pos[dst] - pos[src]).T).mean()) or scale
+    step *= scale
+
+    energy, progress = np.inf, 0
+    for _ in range(iterations):
+        force = forces(src, dst, weight, node_weight, pos, movable, frozen)
+        length = np.hypot(force[:, 0], force[:, 1])
+        moving = length > 0
+        pos[points[moving]] += force[moving] * (step / length[moving])[:, None]
+
+        previous, energy = energy, float(np.dot(length, length))
+        if energy < previous:
+            progress += 1
+            if progress >= 5:
+                progress = 0
+                step /= 0.9
+        else:
+            progress = 0
+            step *= 0.9
+        step *= cooling
+        if step < tol * scale:
+            break
+    return pos
+
+
+def coarsen(
+    src: np.ndarray,
+    dst: np.ndarray,
+    weight: np.ndarray,
+    node_weight: np.ndarray,
+    rng: np.random.Generator,
+    rounds: int = 4,
+) -> tuple[np.ndarray, int]:
+    """
+    Groups nodes for the next coarser level. A few rounds of handshake
+    matching pair nodes that pick each other, each picking the unmatched
+    neighbor it is most strongly tied to relative to their masses, with
+    random tie breaks. Nodes still unmatched then join the pair of a
+    neighbor, which collapses stars that matching can only shrink by one
+    leaf at a time, and isolated nodes are paired up.
+
+    Params:
+        src: source index of each edge, each edge once and no self loops
+        dst: target index of each edge
+        weight: edge weights
+        node_weight: mass of every node
+        rng: random generator
+        rounds: rounds of matching
+
+    Returns:
+        (group of every node, number of groups)
+    """
+    tails = np.concatenate([src, dst])
+    heads = np.concatenate([dst, src])
+    num_nodes = len(node_weight)
+    score = np.concatenate([weight, weight]) / (node_weight[tails] * node_weight[heads])
+    partner = np.full(num_nodes, -1, dtype=np.int64)
+
+    for _ in range(rounds):
+        free = (partner[tails] < 0) & (partner[heads] < 0)
+        if not free.any():
+            break
+        t, h = tails[free], heads[free]
+        noisy = score[free] * (1 + 0.5 * rng.random(len(t)))
+
+        # each tail's best edge is the last of its run
+        order = np.lexsort((noisy, t))
+        t, h = t[order], h[order]
+        last = np.append(t[1:] != t[:-1], True)
+        pick = np.full(num_nodes, -1, dtype=np.int64)
+        pick[t[last]] = h[last]
+
+        chosen = np.flatnonzero(pick >= 0)
+        mutual = chosen[pick[pick[chosen]] == chosen]
+        partner[mutual] = pick[mutual]
+
+    group = np.where(partner >= 0, np.minimum(np.arange(num_nodes), partner), -1)
+    group[group < 0] = np.flatnonzero(group < 0)
+
+    # nodes left over join their best matched neighbor's pair
+    left = (partner[tails] < 0) & (partner[heads] >= 0)
+    t, h = tails[left], heads[left]
+    order = np.lexsort((score[left], t))
+    t, h = t[order], h[order]
+    last = np.append(t[1:] != t[:-1], True)
+    group[t[last]] = group[h[last]]
+
+    degree = np.bincount(tails, minlength=num_nodes)
+    isolated = np.flatnonzero(degree == 0)
+    group[isolated[1::2]] = isolated[: len(isolated) // 2 * 2 : 2]
+
+    uniques, label = np.unique(group, return_inverse=True)
+    return label, len(uniques)
+
+
+def positions(graph: CSRGraph, coords: np.ndarray) -> dict:
+    """
+    Params:
+        graph: the graph that was laid out
+        coords: (num_nodes, 2) coordinates from force_layout
+
+    Returns:
+        node id -> (x, y), the pos argument of networkx's draw functions
+    """
+    ids = graph.node_map.ids if graph.node_map is not None else range(len(coords))
+    return {int(node): xy for node, xy in zip(ids, coords)}
+
+
+def _simple_edges(
+    src: np.ndarray,
+    dst: np.ndarray,
+    num_nodes: int,
+    weight: Optional[np.ndarray] = None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Helper method folds an edge list into undirected edges without self
+    loops, each once with the summed weight of its copies
+    """
+    src = np.asarray(src, dtype=np.int64)
+    dst = np.asarray(dst, dtype=np.int64)
+    weight = np.ones(len(src)) if weight is None else weight
+    apart = src != dst
+    low = np.minimum(src, dst)[apart]
+    high = np.maximum(src, dst)[apart]
+    pairs, index = np.unique(low * num_nodes + high, return_inverse=True)
+    return pairs // num_nodes, pairs % num_nodes, np.bincount(index, weight[apart])
+
+
+def _interleave(values: np.ndarray) -> np.ndarray:
+    """
+    Helper method spreads the low 16 bits of each value to the even bits
+    """
+    values = values & 0xFFFF
+    values = (values | (values << 8)) & 0x00FF00FF
+    values = (values | (values << 4)) & 0x0F0F0F0F
+    values = (values | (values << 2)) & 0x33333333
+    return (values | (values << 1)) & 0x55555555
+
+
+def _run_starts(sorted_keys: np.ndarray) -> np.ndarray:
+    """
+    Helper method gives the start of every run of equal keys
+    """
+    return np.flatnonzero(np.append(True, sorted_keys[1:] != sorted_keys[:-1]))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Multilevel force directed layout of an edge CSV, saved as "
+        "an (n, 2) array of coordinates in node index order."
+    )
+    parser.add_argument("path")
+    parser.add_argument("output", help=".npy file for the coordinates")
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--theta", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(levelname)s:%(message)s"
+    )
+
+    graph = load_graph(args.path)
+    coords = force_layout(
+        graph,
+        iterations=args.iterations,
+        theta=args.theta,
+        seed=args.seed,
+        workers=args.workers,
+    )
+    np.save(args.output, coords)
+    logging.info(f"Laid out {graph.num_nodes} nodes into {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
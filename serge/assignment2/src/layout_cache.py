@@ -0,0 +1,229 @@
+import logging
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from csr_graph import CSRGraph
+from layout import layout_edges, refine_layout
+from metric_cache import MISSING, MetricCache, graph_fingerprint, metric_key
+from sampling import neighbors
+
+
+@dataclass
+class CachedLayout:
+    """
+    A layout and the graph it was computed for, by original node id, so a
+    later version of the graph can reuse it. coords[i] is the position of
+    node ids[i], and the edges are stored once each as src < dst, by id.
+    """
+
+    ids: np.ndarray
+    coords: np.ndarray
+    src: np.ndarray
+    dst: np.ndarray
+
+
+def cached_layout(
+    graph: CSRGraph,
+    cache: MetricCache,
+    name: str = "layout",
+    hops: int = 1,
+    max_changed: float = 0.2,
+    seed: Optional[int] = 0,
+    workers: Optional[int] = None,
+    **params,
+) -> np.ndarray:
+    """
+    Lays out a graph through the cache. An unchanged graph reuses its stored
+    layout and skips the layout entirely. A graph that changed a little since
+    the last layout stored under the same name, e.g. after a harvest added
+    edges, starts from the old positions: new nodes start at the mean of
+    their placed neighbors and only the nodes touched by the change, and
+    their neighbors within hops, are relaxed. Anything else gets a full
+    multilevel layout.
+
+    Params:
+        graph: the graph
+        cache: where layouts are kept
+        name: the lineage of a graph, the latest layout under a name is the
+            starting point for the next version of that graph
+        hops: how far from a changed node nodes may still move
+        max_changed: lay out from scratch when more than this share of
+            nodes would have to move
+        seed: random seed, the same seed gives the same layout
+        workers: threads for the repulsion, defaults to the number of cores
+        params: arguments of layout_edges, e.g. k or iterations
+
+    Returns:
+        (num_nodes, 2) coordinates, row i is node index i
+    """
+    params = dict(params, seed=seed)
+    key = metric_key(graph_fingerprint(graph), name, params, [])
+    entry = cache.get(key)
+    if isinstance(entry, CachedLayout):
+        logging.info(f"Layout {name} of {graph.num_nodes} nodes from the cache.")
+        return entry.coords
+
+    ids = _node_ids(graph)
+    src, dst = _undirected(*graph.edges(), graph.num_nodes)
+    latest = metric_key("latest", name, params, [])
+    base_key = cache.get(latest)
+    base = cache.get(base_key) if isinstance(base_key, str) else MISSING
+
+    start = None
+    if isinstance(base, CachedLayout):
+        start = _warm_start(graph, ids, src, dst, base, hops, max_changed, seed)
+    if start is None:
+        logging.info(f"Layout {name} of {graph.num_nodes} nodes from scratch.")
+        options = {option: value for option, value in params.items()}
+        options.pop("seed")
+        coords = layout_edges(
+            src, dst, graph.num_nodes, seed=seed, workers=workers, **options
+        )
+    else:
+        pos, movable = start
+        logging.info(
+            f"Layout {name}: relaxing {len(movable)} of {graph.num_nodes} nodes."
+        )
+        coords = refine_layout(
+            src,
+            dst,
+            graph.num_nodes,
+            pos,
+            movable,
+            workers=workers,
+            **_refine_params(params),
+        )
+
+    cache.put(key, CachedLayout(ids, coords, ids[src], ids[dst]))
+    cache.put(latest, key)
+    return coords
+
+
+def _refine_params(params: dict) -> dict:
+    """
+    Helper method keeps the arguments refine_layout shares with layout_edges
+    """
+    shared = ("k", "iterations", "theta", "repulsion", "gravity", "tol")
+    return {option: value for option, value in params.items() if option in shared}
+
+
+def _warm_start(
+    graph: CSRGraph,
+    ids: np.ndarray,
+    src: np.ndarray,
+    dst: np.ndarray,
+    base: CachedLayout,
+    hops: int,
+    max_changed: float,
+    seed: Optional[int],
+) -> Optional[tuple[np.ndarray, np.ndarray]]:
+    """
+    Helper method places a graph from an older layout of it, returning the
+    starting positions and the nodes to relax, or None when too much changed
+    """
+    n = graph.num_nodes
+    known, where = _locate(base.ids, ids)
+    if n == 0 or known.sum() < (1 - max_changed) * n:
+        return None
+
+    # edges of the old graph in the new numbering, edges at removed nodes
+    # only mark their surviving end
+    old_ends, old_src = _locate(ids, base.src)
+    both_ends, old_dst = _locate(ids, base.dst)
+    kept = old_ends & both_ends
+    changed = [np.flatnonzero(~known)]
+    changed.append(old_src[old_ends & ~both_ends])
+    changed.append(old_dst[both_ends & ~old_ends])
+
+    old_pairs = np.minimum(old_src[kept], old_dst[kept]) * n
+    old_pairs += np.maximum(old_src[kept], old_dst[kept])
+    new_pairs = src.astype(np.int64) * n + dst
+    added = np.setdiff1d(new_pairs, old_pairs)
+    removed = np.setdiff1d(old_pairs, new_pairs)
+    for pairs in (added, removed):
+        changed.extend([pairs // n, pairs % n])
+    movable = np.unique(np.concatenate(changed).astype(np.int64))
+
+    for _ in range(hops):
+        if not len(movable):
+            break
+        movable = np.union1d(movable, neighbors(graph, movable))
+    if len(movable) > max_changed * n:
+        return None
+
+    pos = np.zeros((n, 2))
+    pos[known] = base.coords[where[known]]
+    _place_new(pos, known, src, dst, np.random.default_rng(seed))
+    return pos, movable
+
+
+def _place_new(
+    pos: np.ndarray,
+    placed: np.ndarray,
+    src: np.ndarray,
+    dst: np.ndarray,
+    rng: np.random.Generator,
+) -> None:
+    """
+    Helper method puts every unplaced node at the mean of its placed
+    neighbors, repeating so chains of new nodes grow out of the old layout,
+    and scatters nodes with no placed neighbor around the center
+    """
+    placed = placed.copy()
+    spread = pos[placed].std(axis=0).mean() if placed.any() else 1.0
+    jitter = 0.05 * (spread or 1.0)
+    ends = np.concatenate([src, dst])
+    others = np.concatenate([dst, src])
+    while not placed.all():
+        usable = ~placed[ends] & placed[others]
+        if not usable.any():
+            break
+        count = np.bincount(ends[usable], minlength=len(pos))
+        for axis in range(2):
+            total = np.bincount(ends[usable], pos[others[usable], axis], len(pos))
+            pos[count > 0, axis] = total[count > 0] / count[count > 0]
+        fresh = count > 0
+        pos[fresh] += rng.normal(0, jitter, (int(fresh.sum()), 2))
+        placed |= fresh
+
+    loose = ~placed
+    center = pos[placed].mean(axis=0) if placed.any() else np.zeros(2)
+    pos[loose] = center + rng.normal(0, spread or 1.0, (int(loose.sum()), 2))
+
+
+def _node_ids(graph: CSRGraph) -> np.ndarray:
+    """
+    Helper method gives every node's original id, its index when the graph
+    has no node map
+    """
+    if graph.node_map is None:
+        return np.arange(graph.num_nodes, dtype=np.int64)
+    return np.asarray(graph.node_map.ids, dtype=np.int64)
+
+
+def _undirected(
+    src: np.ndarray, dst: np.ndarray, num_nodes: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Helper method folds edges to distinct src < dst pairs, self loops
+    dropped, which is all a layout sees of them
+    """
+    n = num_nodes
+    low = np.minimum(src, dst).astype(np.int64)
+    high = np.maximum(src, dst).astype(np.int64)
+    pairs = np.unique((low * n + high)[low != high])
+    return pairs // n, pairs % n
+
+
+def _locate(sorted_ids: np.ndarray, ids: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Helper method finds ids in a sorted id array, returning which were found
+    and where
+    """
+    sorted_ids = np.asarray(sorted_ids)
+    if not len(sorted_ids):
+        return np.zeros(len(ids), dtype=bool), np.zeros(len(ids), dtype=np.int64)
+    where = np.searchsorted(sorted_ids, ids).clip(max=len(sorted_ids) - 1)
+    return sorted_ids[where] == ids, where
@@ -5,6 +5,9 @@ import logging
 import os
 from typing import Optional
 
+from pubmed_index import PubmedIndex
+from records import PubmedRecord, parse_records_from_tree
+
 
 # Set up logging
 log_dir = "logs"
@@ -15,6 +18,26 @@ logging.basicConfig(
     format="%(asctime)s %(levelname)s:%(message)s",
 )
 
+# Base url and fetch url
+BASE_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
+FETCH_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
+
+
+def build_search_term(start_date: str, end_date: str) -> str:
+    """
+    Builds our extracellular vesicle search term for a publication window,
+    the same string is evaluated remotely by eSearch and locally by
+    PubmedIndex.search
+
+    Params:
+        start_date: begin search window here
+        end_date: end search window here
+
+    Returns:
+        a PubMed search string
+    """
+    return f'("extracellular vesicles"[MeSH Terms] OR ("extracellular"[All Fields] AND "vesicles"[All Fields]) OR "extracellular vesicles"[All Fields] OR ("extracellular"[All Fields] AND "vesicle"[All Fields]) OR "extracellular vesicle"[All Fields]) AND {start_date}:{end_date}[Date - Publication] AND "English"[Language]'
+
 
 def query_pubmed(start_date: str, end_date: str) -> Optional[list[str]]:
     """
@@ -34,11 +57,7 @@ def query_pubmed(start_date: str, end_date: str) -> Optional[list[str]]:
         an XML element tree.
     """
     # Define query here
-    search_term = f'("extracellular vesicles"[MeSH Terms] OR ("extracellular"[All Fields] AND "vesicles"[All Fields]) OR "extracellular vesicles"[All Fields] OR ("extracellular"[All Fields] AND "vesicle"[All Fields]) OR "extracellular vesicle"[All Fields]) AND {start_date}:{end_date}[Date - Publication] AND "English"[Language]'
-
-    # Base url and fetch url
-    base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
-    fetch_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
+    search_term = build_search_term(start_date, end_date)
 
     def fetch_detailed_info(web_env: str, query_key: str, retstart: int) -> str:
         """
@@ -60,7 +79,7 @@ def query_pubmed(start_date: str, end_date: str) -> Optional[list[str]]:
             "rettype": "medline",
             "retmode": "xml",
         }
-        response = requests.get(fetch_url, query_string)
+        response = requests.get(FETCH_URL, query_string)
         response.raise_for_status()
         return response.text
 
@@ -73,7 +92,7 @@ def query_pubmed(start_date: str, end_date: str) -> Optional[list[str]]:
             "usehistory": "y",
             "term": search_term,
         }
-        response = requests.get(base_url, query_string)
+        response = requests.get(BASE_URL, query_string)
         response.raise_for_status()
         root = ET.fromstring(response.text)
 
@@ -141,6 +160,111 @@ def parse_dois_from_tree(tree: ET.Element) -> list[str]:
     return dois
 
 
+def search_pmids(search_term: str, api_key: Optional[str] = None) -> list[int]:
+    """
+    Runs an eSearch and returns only the matching PMIDs, this is cheap
+    compared to eFetch and tells us which records we are missing locally.
+
+    Note that eSearch will not page past the first 10,000 results, split
+    larger windows into smaller date ranges.
+
+    Params:
+        search_term: a PubMed search string
+        api_key: optional NCBI API key, raises the rate limit to 10 requests/s
+
+    Returns:
+        the matching PMIDs
+    """
+    pmids: list[int] = []
+    total_count = None
+    retstart = 0
+
+    while total_count is None or retstart < min(total_count, 10000):
+        query_string = {
+            "db": "pubmed",
+            "term": search_term,
+            "retstart": retstart,
+            "retmax": 5000,
+        }
+        if api_key:
+            query_string["api_key"] = api_key
+        response = requests.get(BASE_URL, query_string)
+        response.raise_for_status()
+        root = ET.fromstring(response.text)
+
+        total_count = int(root.findtext(".//Count") or "0")
+        batch = [int(pmid.text) for pmid in root.findall(".//IdList/Id") if pmid.text]
+        if not batch:
+            break
+        pmids.extend(batch)
+        retstart += len(batch)
+
+    if total_count and total_count > len(pmids):
+        logging.warning(
+            f"eSearch returned {len(pmids)} of {total_count} PMIDs, narrow the date window."
+        )
+
+    return pmids
+
+
+def fetch_records(
+    pmids: list[int], api_key: Optional[str] = None
+) -> list[PubmedRecord]:
+    """
+    Fetches full records for a list of PMIDs with eFetch, in batches of 500.
+
+    Params:
+        pmids: the PMIDs to fetch
+        api_key: optional NCBI API key
+
+    Returns:
+        the parsed records
+    """
+    records: list[PubmedRecord] = []
+
+    for start in range(0, len(pmids), 500):
+        logging.info(f"Fetching {len(pmids[start : start + 500])} records by id.")
+        # POST so long id lists don't overflow the url
+        response = requests.post(
+            FETCH_URL,
+            data={
+                "db": "pubmed",
+                "id": ",".join(map(str, pmids[start : start + 500])),
+                "rettype": "medline",
+                "retmode": "xml",
+                **({"api_key": api_key} if api_key else {}),
+            },
+        )
+        response.raise_for_status()
+        records.extend(parse_records_from_tree(ET.fromstring(response.text)))
+
+    return records
+
+
+def sync_index(index: PubmedIndex, start_date: str, end_date: str) -> list[int]:
+    """
+    Brings the local index up to date for a publication window. Only PMIDs
+    the index doesn't have yet are fetched, after that, variants of the query
+    can be run locally with index.search.
+
+    Params:
+        index: the local record index
+        start_date: begin search window here
+        end_date: end search window here
+
+    Returns:
+        the PMIDs matching our search term in the window
+    """
+    pmids = search_pmids(build_search_term(start_date, end_date))
+    missing = index.missing_pmids(pmids)
+    logging.info(f"{len(pmids)} PMIDs matched, {len(missing)} not indexed yet.")
+
+    if missing:
+        index.add_records(fetch_records(missing))
+
+    return pmids
+
+
 def write_dois_to_csv(dois: list[str], output_dir: str, filename: str):
     """
     Writes the list of DOIs to a CSV file in the specified directory.
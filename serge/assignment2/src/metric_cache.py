@@ -0,0 +1,220 @@
+import dataclasses
+import hashlib
+import importlib
+import io
+import json
+import os
+from typing import Any, Optional
+
+import numpy as np
+
+from csr_graph import CSRGraph
+
+
+# returned by get on a miss, None is a valid cached value
+MISSING = object()
+
+
+def graph_fingerprint(graph: CSRGraph) -> str:
+    """
+    Hashes a graph's structure, so any change to its nodes, edges or
+    directedness gives a different fingerprint. Node ids aren't included,
+    metrics are indexed by node index.
+
+    Params:
+        graph: the graph
+
+    Returns:
+        the hex BLAKE2b digest
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(json.dumps([graph.directed, graph.num_nodes]).encode())
+    for array in (graph.indptr, graph.indices):
+        # hash by value in blocks, so int32 and int64 copies of a graph match
+        # and a memory-mapped graph is never copied whole
+        for start in range(0, len(array), 1 << 22):
+            block = np.asarray(array[start : start + (1 << 22)], dtype=np.int64)
+            digest.update(block.tobytes())
+    return digest.hexdigest()
+
+
+def metric_key(fingerprint: str, name: str, params: dict, inputs: list[str]) -> str:
+    """
+    Cache key of one metric value.
+
+    Params:
+        fingerprint: graph_fingerprint of the graph
+        name: the metric's name
+        params: the metric's parameters
+        inputs: cache keys of the metrics it was computed from
+
+    Returns:
+        the hex key
+    """
+    payload = json.dumps(
+        [fingerprint, name, params, inputs], sort_keys=True, default=repr
+    )
+    return hashlib.blake2b(payload.encode(), digest_size=20).hexdigest()
+
+
+class MetricCache:
+    def __init__(
+        self, directory: str = "output/metric_cache", max_bytes: int = 1 << 30
+    ) -> None:
+        """
+        A persistent cache of metric values, one compressed .npz file per
+        entry. Once the entries take more than max_bytes the least recently
+        used ones are removed. Clear the cache after changing how a metric is
+        computed, the key only covers the graph, the name and the params.
+
+        Params:
+            directory: where entries are stored
+            max_bytes: size limit of all entries together
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def get(self, key: str) -> Any:
+        """
+        Params:
+            key: see metric_key
+
+        Returns:
+            the cached value, or MISSING
+        """
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as entry:
+                value = _decode(entry)
+        except (FileNotFoundError, ValueError, KeyError, OSError):
+            return MISSING
+
+        # the modification time is the entry's last use
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return value
+
+    def put(self, key: str, value: Any) -> bool:
+        """
+        Stores a value, then evicts old entries if over the size limit.
+        Arrays, JSON-like values and dataclasses of those are supported.
+
+        Params:
+            key: see metric_key
+            value: the value to store
+
+        Returns:
+            False if the value can't be stored
+        """
+        arrays = _encode(value)
+        if arrays is None:
+            return False
+
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **arrays)
+        path = self._path(key)
+        tmp_path = f"{path}.tmp.{os.getpid()}"
+        with open(tmp_path, "wb") as file:
+            file.write(buffer.getbuffer())
+        os.replace(tmp_path, path)
+
+        self.evict()
+        return True
+
+    def evict(self) -> int:
+        """
+        Removes least recently used entries until the cache fits max_bytes.
+
+        Returns:
+            the number of entries removed
+        """
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".npz"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self) -> None:
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".npz"):
+                os.remove(entry.path)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.npz")
+
+
+def _encode(value: Any) -> Optional[dict[str, np.ndarray]]:
+    """
+    Helper method turns a value into named arrays for np.savez, arrays stay
+    arrays and everything else goes into a JSON string
+    """
+    if isinstance(value, np.ndarray):
+        if value.dtype == object:
+            return None
+        return {"kind": np.array("array"), "value": value}
+
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        arrays = {}
+        fields = {}
+        for field in dataclasses.fields(value):
+            item = getattr(value, field.name)
+            if isinstance(item, np.ndarray):
+                arrays[f"field.{field.name}"] = item
+            else:
+                fields[field.name] = item
+        try:
+            arrays["fields"] = np.array(json.dumps(fields, default=_json_scalar))
+        except TypeError:
+            return None
+        arrays["kind"] = np.array("dataclass")
+        arrays["class"] = np.array(
+            f"{type(value).__module__}:{type(value).__qualname__}"
+        )
+        return arrays
+
+    try:
+        encoded = json.dumps(value, default=_json_scalar)
+    except TypeError:
+        return None
+    return {"kind": np.array("json"), "value": np.array(encoded)}
+
+
+def _decode(entry: Any) -> Any:
+    """
+    Helper method rebuilds a value from the arrays _encode produced
+    """
+    kind = str(entry["kind"])
+    if kind == "array":
+        return entry["value"]
+    if kind == "json":
+        return json.loads(str(entry["value"]))
+
+    module, name = str(entry["class"]).split(":")
+    cls = getattr(importlib.import_module(module), name)
+    fields = json.loads(str(entry["fields"]))
+    for key in entry.files:
+        if key.startswith("field."):
+            fields[key[len("field.") :]] = entry[key]
+    return cls(**fields)
+
+
+def _json_scalar(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
@@ -0,0 +1,287 @@
+import logging
+import os
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Optional
+
+from betweenness import betweenness
+from components import (
+    component_sizes,
+    largest_component,
+    strong_components,
+    weak_components,
+)
+from csr_graph import CSRGraph
+from degree_stats import summarize_graph
+from metric_cache import MISSING, MetricCache, graph_fingerprint, metric_key
+
+
+@dataclass
+class Metric:
+    """
+    A statistic and the values it is computed from. compute is called with
+    the value of each input in order, then params as keyword arguments.
+    "graph" is the CSRGraph being measured, every other input is the name of
+    another metric. Metrics that hold the GIL for long should set process so
+    they run in a worker process, their compute function must then be a
+    module level function. Intermediate metrics only run when another metric
+    needs them.
+    """
+
+    name: str
+    compute: Callable[..., Any]
+    inputs: tuple[str, ...] = ("graph",)
+    params: dict = field(default_factory=dict)
+    process: bool = False
+    intermediate: bool = False
+
+
+@dataclass
+class MetricsReport:
+    """
+    The values computed by a run, with how long each metric took and which
+    came from the cache. elapsed is the wall time of the whole run, compare
+    it to the slowest metric.
+    """
+
+    values: dict[str, Any]
+    timings: dict[str, float]
+    elapsed: float
+    cached: list[str] = field(default_factory=list)
+
+    def __getitem__(self, name: str) -> Any:
+        return self.values[name]
+
+
+class MetricsEngine:
+    def __init__(
+        self,
+        metrics: Iterable[Metric] = (),
+        workers: Optional[int] = None,
+        cache: Optional[MetricCache] = None,
+    ) -> None:
+        """
+        Runs graph metrics as a dependency graph, each metric starts as soon
+        as its inputs are done, independent metrics run at the same time and
+        an input shared by several metrics is computed once. With a cache,
+        metrics already computed for the same graph and params are loaded
+        instead, along with skipping the inputs only they needed.
+
+        Params:
+            metrics: the metrics to schedule, see default_metrics
+            workers: pool size, defaults to the number of cores
+            cache: where to keep metric values between runs
+        """
+        self.metrics: dict[str, Metric] = {}
+        self.workers = workers or os.cpu_count() or 1
+        self.cache = cache
+        for metric in metrics:
+            self.register(metric)
+
+    def register(self, metric: Metric) -> None:
+        """
+        Adds a metric, replacing any metric with the same name.
+
+        Params:
+            metric: the metric to add
+        """
+        if metric.name == "graph":
+            raise ValueError("'graph' is reserved for the input graph")
+        self.metrics[metric.name] = metric
+
+    def run(
+        self, graph: CSRGraph, targets: Optional[Iterable[str]] = None
+    ) -> MetricsReport:
+        """
+        Computes the targets and everything they depend on.
+
+        Params:
+            graph: the graph to measure
+            targets: names of the metrics wanted, defaults to every metric
+                that isn't intermediate
+
+        Returns:
+            a MetricsReport holding every metric that was computed
+        """
+        start = time.perf_counter()
+        if targets is None:
+            targets = [
+                name for name, metric in self.metrics.items() if not metric.intermediate
+            ]
+        targets = list(targets)
+        order = self._resolve(targets)
+        values: dict[str, Any] = {"graph": graph}
+        timings: dict[str, float] = {}
+        keys: dict[str, str] = {}
+        if self.cache is not None:
+            order, keys = self._from_cache(graph, targets, order, values)
+        cached = [name for name in values if name != "graph"]
+
+        waiting = {
+            name: set(self.metrics[name].inputs) - values.keys() for name in order
+        }
+        running: dict[Future, str] = {}
+
+        threads = ThreadPoolExecutor(self.workers)
+        processes = (
+            ProcessPoolExecutor(self.workers)
+            if any(self.metrics[name].process for name in order)
+            else None
+        )
+        try:
+            while waiting or running:
+                for name in [name for name, needs in waiting.items() if not needs]:
+                    del waiting[name]
+                    metric = self.metrics[name]
+                    pool = processes if metric.process else threads
+                    args = [values[input_name] for input_name in metric.inputs]
+                    running[
+                        pool.submit(_timed, metric.compute, args, metric.params)
+                    ] = name
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    values[name], timings[name] = future.result()
+                    logging.info(f"Computed {name} in {timings[name]:.2f}s.")
+                    if self.cache is not None:
+                        self.cache.put(keys[name], values[name])
+                    for needs in waiting.values():
+                        needs.discard(name)
+        finally:
+            for future in running:
+                future.cancel()
+            threads.shutdown()
+            if processes is not None:
+                processes.shutdown()
+
+        del values["graph"]
+        return MetricsReport(values, timings, time.perf_counter() - start, cached)
+
+    def _from_cache(
+        self,
+        graph: CSRGraph,
+        targets: list[str],
+        order: list[str],
+        values: dict[str, Any],
+    ) -> tuple[list[str], dict[str, str]]:
+        """
+        Helper method loads cached values into values, walking down from the
+        targets so the inputs of a cached metric aren't looked up or run
+
+        Returns:
+            the metrics left to compute, in order, and every metric's key
+        """
+        fingerprint = graph_fingerprint(graph)
+        keys: dict[str, str] = {}
+        for name in order:
+            metric = self.metrics[name]
+            inputs = [keys[i] for i in metric.inputs if i != "graph"]
+            keys[name] = metric_key(fingerprint, name, metric.params, inputs)
+
+        needed = set()
+        stack = list(targets)
+        while stack:
+            name = stack.pop()
+            if name in needed or name in values:
+                continue
+            value = self.cache.get(keys[name])
+            if value is not MISSING:
+                values[name] = value
+                continue
+            needed.add(name)
+            stack.extend(i for i in self.metrics[name].inputs if i != "graph")
+
+        return [name for name in order if name in needed], keys
+
+    def _resolve(self, targets: Iterable[str]) -> list[str]:
+        """
+        Helper method collects the targets and their transitive inputs in
+        dependency order, rejecting unknown names and cycles
+        """
+        order: list[str] = []
+        state: dict[str, str] = {}
+
+        def visit(name: str, path: tuple[str, ...]) -> None:
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Metric cycle: {' -> '.join(path + (name,))}")
+            if name not in self.metrics:
+                raise KeyError(f"Unknown metric {name!r}")
+            state[name] = "visiting"
+            for input_name in self.metrics[name].inputs:
+                if input_name != "graph":
+                    visit(input_name, path + (name,))
+            state[name] = "done"
+            order.append(name)
+
+        for name in targets:
+            visit(name, ())
+        return order
+
+
+def _timed(compute: Callable[..., Any], args: list, params: dict) -> tuple[Any, float]:
+    """
+    Helper method runs one metric and times it, in whichever worker the
+    metric was sent to
+    """
+    start = time.perf_counter()
+    value = compute(*args, **params)
+    return value, time.perf_counter() - start
+
+
+def default_metrics(
+    betweenness_mode: str = "sample",
+    betweenness_samples: int = 1000,
+    time_budget: Optional[float] = None,
+) -> list[Metric]:
+    """
+    The statistics our reports print: the degree summary (counts, degrees,
+    isolates and density), weak and strong components, and betweenness on
+    the largest weakly connected component.
+
+    Params:
+        betweenness_mode: mode passed to betweenness
+        betweenness_samples: sources sampled in sample mode
+        time_budget: seconds betweenness may spend
+
+    Returns:
+        the metrics, ready for MetricsEngine
+    """
+    return [
+        Metric("degree_summary", summarize_graph),
+        Metric("weak_components", lambda graph: weak_components(graph)[1]),
+        Metric("weak_component_sizes", component_sizes, ("weak_components",)),
+        Metric("strong_components", lambda graph: strong_components(graph)[1]),
+        Metric("strong_component_sizes", component_sizes, ("strong_components",)),
+        Metric(
+            "largest_wcc",
+            largest_component,
+            ("graph", "weak_components"),
+            intermediate=True,
+        ),
+        Metric(
+            "nk_largest_wcc",
+            lambda graph: graph.to_networkit(),
+            ("largest_wcc",),
+            intermediate=True,
+        ),
+        Metric(
+            "betweenness",
+            betweenness,
+            ("nk_largest_wcc",),
+            {
+                "mode": betweenness_mode,
+                "samples": betweenness_samples,
+                "time_budget": time_budget,
+            },
+        ),
+    ]
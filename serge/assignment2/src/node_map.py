@@ -0,0 +1,140 @@
+from typing import Union
+
+import numpy as np
+import pandas as pd
+
+
+class NodeMap:
+    """
+    Stable mapping between original node ids (e.g. iids) and dense int32
+    indices. Index i is the i-th smallest id, so the same set of ids always
+    gets the same numbering and arrays from different runs line up by index.
+
+    Ids are kept in one sorted array, 4 bytes per node when every id fits in
+    int32 and 8 otherwise, which can be saved and memory-mapped back.
+    """
+
+    def __init__(self, ids: np.ndarray):
+        """
+        Params:
+            ids: sorted, unique original ids, ids[i] is the id of index i
+        """
+        self.ids = ids
+
+    @classmethod
+    def from_ids(cls, values: np.ndarray) -> "NodeMap":
+        """
+        Params:
+            values: original ids, in any order and with repeats
+
+        Returns:
+            a NodeMap over the distinct ids
+        """
+        return cls(_compact(np.unique(np.asarray(values))))
+
+    @classmethod
+    def from_edges(
+        cls, sources: np.ndarray, targets: np.ndarray
+    ) -> tuple["NodeMap", np.ndarray, np.ndarray]:
+        """
+        Builds the map from both ends of an edge list and encodes the edges
+        in the same hash-based pass.
+
+        Params:
+            sources: original id of each edge's source node
+            targets: original id of each edge's target node
+
+        Returns:
+            (node_map, src, dst) where src and dst are int32 index arrays
+        """
+        num_edges = len(sources)
+        codes, ids = pd.factorize(
+            np.concatenate([np.asarray(sources), np.asarray(targets)]), sort=True
+        )
+        # factorize gives missing values (NaN, None) the code -1
+        missing = np.flatnonzero(codes < 0) % max(num_edges, 1)
+        if len(missing):
+            raise ValueError(
+                f"{len(missing)} missing node ids, e.g. in edges "
+                f"{np.unique(missing)[:5].tolist()}"
+            )
+        codes = codes.astype(np.int32)
+        return cls(_compact(np.asarray(ids))), codes[:num_edges], codes[num_edges:]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, node_id: int) -> bool:
+        return bool(self.lookup(np.array([node_id]))[0] >= 0)
+
+    def lookup(
+        self, node_ids: Union[np.ndarray, list], strict: bool = False
+    ) -> np.ndarray:
+        """
+        Forward lookup, original ids to dense indices, with one vectorized
+        binary search.
+
+        Params:
+            node_ids: original ids to look up
+            strict: raise KeyError for unknown ids instead of returning -1
+
+        Returns:
+            an int32 array of indices, -1 where the id is unknown
+        """
+        node_ids = np.asarray(node_ids)
+        if len(self.ids) == 0:
+            indices = np.full(node_ids.shape, -1, dtype=np.int32)
+        else:
+            indices = np.searchsorted(self.ids, node_ids).astype(np.int32)
+            clipped = np.minimum(indices, len(self.ids) - 1)
+            indices[self.ids[clipped] != node_ids] = -1
+
+        if strict and (indices < 0).any():
+            unknown = node_ids[indices < 0]
+            raise KeyError(
+                f"{unknown.size} unknown node ids, e.g. {unknown[:5].tolist()}"
+            )
+        return indices
+
+    def reverse(self, indices: Union[np.ndarray, list]) -> np.ndarray:
+        """
+        Reverse lookup, dense indices to original ids.
+
+        Params:
+            indices: dense node indices
+
+        Returns:
+            the original ids
+        """
+        return self.ids[np.asarray(indices)]
+
+    def save(self, path: str) -> None:
+        """
+        Params:
+            path: destination .npy file
+        """
+        np.save(path, np.asarray(self.ids))
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "NodeMap":
+        """
+        Params:
+            path: a .npy file written by save
+            mmap: memory-map the ids instead of reading them into memory
+
+        Returns:
+            the NodeMap
+        """
+        return cls(np.load(path, mmap_mode="r" if mmap else None))
+
+
+def _compact(ids: np.ndarray) -> np.ndarray:
+    """
+    Helper method stores integer ids as int32 when they fit
+    """
+    if ids.dtype.kind in "iu" and ids.size:
+        info = np.iinfo(np.int32)
+        if info.min <= ids[0] and ids[-1] <= info.max:
+            return ids.astype(np.int32)
+        return ids.astype(np.int64)
+    return ids
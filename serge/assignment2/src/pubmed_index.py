@@ -0,0 +1,469 @@
+import re
+import sqlite3
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional, Union
+
+from records import PubmedRecord
+
+
+# PubMed accepts either the full field name or its short tag
+FIELD_ALIASES = {
+    "mesh terms": "mesh",
+    "mesh": "mesh",
+    "mh": "mesh",
+    "all fields": "all",
+    "all": "all",
+    "language": "language",
+    "la": "language",
+    "date - publication": "date",
+    "dp": "date",
+    "title": "title",
+    "ti": "title",
+    "title/abstract": "tiab",
+    "tiab": "tiab",
+    "journal": "journal",
+    "ta": "journal",
+}
+
+# [Language] takes the full language name, the XML stores the MEDLINE code
+LANGUAGE_CODES = {
+    "english": "eng",
+    "french": "fre",
+    "german": "ger",
+    "spanish": "spa",
+    "italian": "ita",
+    "portuguese": "por",
+    "russian": "rus",
+    "chinese": "chi",
+    "japanese": "jpn",
+    "korean": "kor",
+    "dutch": "dut",
+    "polish": "pol",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    pmid INTEGER PRIMARY KEY,
+    doi TEXT,
+    title TEXT NOT NULL,
+    abstract TEXT NOT NULL,
+    journal TEXT NOT NULL,
+    pub_date TEXT,
+    epub_date TEXT
+);
+CREATE TABLE IF NOT EXISTS record_mesh (
+    pmid INTEGER NOT NULL,
+    term TEXT NOT NULL COLLATE NOCASE
+);
+CREATE TABLE IF NOT EXISTS record_languages (
+    pmid INTEGER NOT NULL,
+    language TEXT NOT NULL COLLATE NOCASE
+);
+CREATE TABLE IF NOT EXISTS record_keywords (
+    pmid INTEGER NOT NULL,
+    keyword TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS record_mesh_term ON record_mesh (term, pmid);
+CREATE INDEX IF NOT EXISTS record_mesh_pmid ON record_mesh (pmid);
+CREATE INDEX IF NOT EXISTS record_languages_language ON record_languages (language, pmid);
+CREATE INDEX IF NOT EXISTS record_languages_pmid ON record_languages (pmid);
+CREATE INDEX IF NOT EXISTS record_keywords_pmid ON record_keywords (pmid);
+CREATE INDEX IF NOT EXISTS records_pub_date ON records (pub_date);
+CREATE INDEX IF NOT EXISTS records_epub_date ON records (epub_date);
+CREATE VIRTUAL TABLE IF NOT EXISTS records_fts USING fts5 (
+    title, abstract, mesh, keywords, journal,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+
+@dataclass
+class Term:
+    """A single tagged search term, e.g. "extracellular vesicles"[MeSH Terms]"""
+
+    text: str
+    field: str
+
+
+@dataclass
+class BoolOp:
+    """A boolean operator applied left to right, the way PubMed does"""
+
+    op: str  # AND, OR, NOT
+    left: "Node"
+    right: "Node"
+
+
+Node = Union[Term, BoolOp]
+
+
+TOKEN_PATTERN = re.compile(
+    r"""
+    \s*(?:
+        (?P<lparen>\()
+      | (?P<rparen>\))
+      | (?P<quoted>"[^"]*")(?:\s*\[(?P<qtag>[^\]]+)\])?
+      | (?P<word>[^\s()\[\]"]+)(?:\s*\[(?P<wtag>[^\]]+)\])?
+    )
+    """,
+    re.VERBOSE,
+)
+
+
+def tokenize_query(query: str) -> list[tuple[str, str, Optional[str]]]:
+    """
+    Splits a PubMed query into (kind, text, tag) tokens
+
+    Params:
+        query: a PubMed search string
+
+    Returns:
+        tokens, kind is one of 'lparen', 'rparen', 'op' or 'term'
+    """
+    tokens: list[tuple[str, str, Optional[str]]] = []
+    position = 0
+    query = query.rstrip()
+
+    while position < len(query):
+        match = TOKEN_PATTERN.match(query, position)
+        if not match or match.end() == position:
+            raise ValueError(f"Cannot parse query near: {query[position:]!r}")
+        position = match.end()
+
+        if match.group("lparen"):
+            tokens.append(("lparen", "(", None))
+        elif match.group("rparen"):
+            tokens.append(("rparen", ")", None))
+        elif match.group("quoted"):
+            tokens.append(("term", match.group("quoted")[1:-1], match.group("qtag")))
+        else:
+            word, tag = match.group("word"), match.group("wtag")
+            if tag is None and word.upper() in ("AND", "OR", "NOT"):
+                tokens.append(("op", word.upper(), None))
+            else:
+                tokens.append(("term", word, tag))
+
+    return tokens
+
+
+def parse_query(query: str) -> Node:
+    """
+    Parses the subset of PubMed query syntax we use: quoted or bare terms
+    tagged with [MeSH Terms], [All Fields], [Language], [Title/Abstract] or
+    [Date - Publication] (as start:end ranges), combined with AND, OR, NOT
+    and parentheses. Like PubMed, operators are applied left to right with no
+    precedence, and untagged terms search all fields.
+
+    Params:
+        query: a PubMed search string
+
+    Returns:
+        the root of the parsed query tree
+    """
+    tokens = tokenize_query(query)
+    position = 0
+
+    def parse_group() -> Node:
+        nonlocal position
+        node = parse_operand()
+        while position < len(tokens) and tokens[position][0] != "rparen":
+            kind, text, _ = tokens[position]
+            if kind == "op":
+                position += 1
+                op = text
+            else:
+                # adjacent terms are implicitly ANDed
+                op = "AND"
+            node = BoolOp(op, node, parse_operand())
+        return node
+
+    def parse_operand() -> Node:
+        nonlocal position
+        if position >= len(tokens):
+            raise ValueError("Unexpected end of query")
+        kind, text, tag = tokens[position]
+        position += 1
+
+        if kind == "lparen":
+            node = parse_group()
+            if position >= len(tokens) or tokens[position][0] != "rparen":
+                raise ValueError("Unbalanced parentheses in query")
+            position += 1
+            return node
+        if kind == "term":
+            field = FIELD_ALIASES.get((tag or "all fields").strip().lower())
+            if field is None:
+                raise ValueError(f"Unsupported search field: [{tag}]")
+            return Term(text, field)
+        raise ValueError(f"Unexpected {text!r} in query")
+
+    node = parse_group()
+    if position != len(tokens):
+        raise ValueError("Unbalanced parentheses in query")
+    return node
+
+
+def compile_query(node: Node) -> tuple[str, list]:
+    """
+    Compiles a parsed query into a SQL boolean expression over the records
+    table, aliased as r.
+
+    MeSH terms are matched exactly (case-insensitive) against the descriptors
+    on each record. Unlike PubMed we have no MeSH tree here, so narrower terms
+    are not exploded in, and [All Fields] is a phrase search over the text
+    fields rather than PubMed's automatic term mapping.
+
+    Params:
+        node: the root of a parsed query tree
+
+    Returns:
+        the SQL expression and its bound parameters
+    """
+    if isinstance(node, BoolOp):
+        left_sql, left_params = compile_query(node.left)
+        right_sql, right_params = compile_query(node.right)
+        op = "AND NOT" if node.op == "NOT" else node.op
+        return f"({left_sql} {op} {right_sql})", left_params + right_params
+
+    if node.field == "mesh":
+        return (
+            "r.pmid IN (SELECT pmid FROM record_mesh WHERE term = ?)",
+            [node.text],
+        )
+    if node.field == "language":
+        language = node.text.strip().lower()
+        return (
+            "r.pmid IN (SELECT pmid FROM record_languages WHERE language = ?)",
+            [LANGUAGE_CODES.get(language, language)],
+        )
+    if node.field == "date":
+        start, _, end = node.text.partition(":")
+        start, end = _normalize_date(start, False), _normalize_date(end or start, True)
+        return (
+            "((r.pub_date BETWEEN ? AND ?) OR (r.epub_date BETWEEN ? AND ?))",
+            [start, end, start, end],
+        )
+
+    columns = {
+        "all": None,
+        "title": "title",
+        "tiab": "{title abstract}",
+        "journal": "journal",
+    }[node.field]
+    match = _fts_phrase(node.text)
+    if columns:
+        match = f"{columns} : {match}"
+    return "r.pmid IN (SELECT rowid FROM records_fts WHERE records_fts MATCH ?)", [
+        match
+    ]
+
+
+def _fts_phrase(text: str) -> str:
+    """
+    Helper method quotes a search term as an FTS5 phrase, a trailing '*'
+    becomes a prefix search like PubMed truncation
+    """
+    prefix = text.endswith("*")
+    phrase = '"' + text.rstrip("*").replace('"', '""') + '"'
+    return phrase + "*" if prefix else phrase
+
+
+def _normalize_date(date: str, end: bool) -> str:
+    """
+    Helper method pads a partial PubMed date (2018, 2018/06) so it compares
+    as a YYYY/MM/DD string, end dates pad to the end of the period
+    """
+    parts = date.strip().replace("-", "/").split("/")
+    if not parts[0].isdigit():
+        raise ValueError(f"Invalid publication date: {date!r}")
+    while len(parts) < 3:
+        parts.append("12" if end and len(parts) == 1 else ("31" if end else "01"))
+    return f"{int(parts[0]):04d}/{int(parts[1]):02d}/{int(parts[2]):02d}"
+
+
+class PubmedIndex:
+    """
+    A local SQLite index over PubMed records, with FTS5 over the text fields,
+    so query variants can be evaluated without calling the API.
+    """
+
+    def __init__(self, path: str = "output/pubmed_index.sqlite"):
+        """
+        Params:
+            path: SQLite database file, created if missing; ':memory:' works
+        """
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+
+    def __enter__(self) -> "PubmedIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def add_records(self, records: Iterable[PubmedRecord]) -> int:
+        """
+        Inserts or replaces records in the index.
+
+        Params:
+            records: the records to index
+
+        Returns:
+            the number of records written
+        """
+        count = 0
+        with self.connection:
+            for record in records:
+                self._delete(record.pmid)
+                self.connection.execute(
+                    "INSERT INTO records VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        record.pmid,
+                        record.doi,
+                        record.title,
+                        record.abstract,
+                        record.journal,
+                        record.pub_date,
+                        record.epub_date,
+                    ),
+                )
+                self.connection.executemany(
+                    "INSERT INTO record_mesh VALUES (?, ?)",
+                    [(record.pmid, term) for term in record.mesh_terms],
+                )
+                self.connection.executemany(
+                    "INSERT INTO record_languages VALUES (?, ?)",
+                    [(record.pmid, lang) for lang in record.languages],
+                )
+                self.connection.executemany(
+                    "INSERT INTO record_keywords VALUES (?, ?)",
+                    [(record.pmid, keyword) for keyword in record.keywords],
+                )
+                self.connection.execute(
+                    "INSERT INTO records_fts (rowid, title, abstract, mesh, keywords, journal) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        record.pmid,
+                        record.title,
+                        record.abstract,
+                        " ; ".join(record.mesh_terms),
+                        " ; ".join(record.keywords),
+                        record.journal,
+                    ),
+                )
+                count += 1
+        return count
+
+    def _delete(self, pmid: int) -> None:
+        for table in ("records", "record_mesh", "record_languages", "record_keywords"):
+            self.connection.execute(f"DELETE FROM {table} WHERE pmid = ?", (pmid,))
+        self.connection.execute("DELETE FROM records_fts WHERE rowid = ?", (pmid,))
+
+    def missing_pmids(self, pmids: Iterable[int]) -> list[int]:
+        """
+        Filters a list of PMIDs down to those not yet in the index, i.e. the
+        only ones that still need a network fetch.
+
+        Params:
+            pmids: PMIDs returned by a remote eSearch
+
+        Returns:
+            the PMIDs that are not indexed, in input order
+        """
+        pmids = list(pmids)
+        known: set[int] = set()
+        # stay below SQLite's bound parameter limit
+        for start in range(0, len(pmids), 900):
+            batch = pmids[start : start + 900]
+            placeholders = ",".join("?" * len(batch))
+            known.update(
+                row[0]
+                for row in self.connection.execute(
+                    f"SELECT pmid FROM records WHERE pmid IN ({placeholders})", batch
+                )
+            )
+        return [pmid for pmid in pmids if pmid not in known]
+
+    def search(self, query: str) -> list[int]:
+        """
+        Evaluates a PubMed query against the local records.
+
+        Params:
+            query: a PubMed search string, see parse_query for the syntax
+
+        Returns:
+            matching PMIDs in ascending order
+        """
+        where, params = compile_query(parse_query(query))
+        rows = self.connection.execute(
+            f"SELECT r.pmid FROM records r WHERE {where} ORDER BY r.pmid", params
+        )
+        return [row[0] for row in rows]
+
+    def count(self, query: str) -> int:
+        """
+        Counts the local records matching a PubMed query.
+
+        Params:
+            query: a PubMed search string
+
+        Returns:
+            the number of matching records
+        """
+        where, params = compile_query(parse_query(query))
+        return self.connection.execute(
+            f"SELECT COUNT(*) FROM records r WHERE {where}", params
+        ).fetchone()[0]
+
+    def records(self, pmids: Optional[Iterable[int]] = None) -> Iterator[PubmedRecord]:
+        """
+        Reads records back out of the index.
+
+        Params:
+            pmids: the records to read, or None for every record
+
+        Returns:
+            an iterator of PubmedRecord, ordered by PMID
+        """
+        if pmids is None:
+            rows = self.connection.execute("SELECT * FROM records ORDER BY pmid")
+        else:
+            wanted = sorted(set(pmids))
+            rows = (
+                row
+                for start in range(0, len(wanted), 900)
+                for row in self.connection.execute(
+                    "SELECT * FROM records WHERE pmid IN (%s) ORDER BY pmid"
+                    % ",".join("?" * len(wanted[start : start + 900])),
+                    wanted[start : start + 900],
+                )
+            )
+
+        for pmid, doi, title, abstract, journal, pub_date, epub_date in rows:
+            yield PubmedRecord(
+                pmid=pmid,
+                doi=doi,
+                title=title,
+                abstract=abstract,
+                journal=journal,
+                languages=self._values("record_languages", "language", pmid),
+                mesh_terms=self._values("record_mesh", "term", pmid),
+                keywords=self._values("record_keywords", "keyword", pmid),
+                pub_date=pub_date,
+                epub_date=epub_date,
+            )
+
+    def _values(self, table: str, column: str, pmid: int) -> list[str]:
+        return [
+            row[0]
+            for row in self.connection.execute(
+                f"SELECT {column} FROM {table} WHERE pmid = ? ORDER BY rowid", (pmid,)
+            )
+        ]
@@ -0,0 +1,294 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import matplotlib
+import matplotlib.colors
+import matplotlib.image
+import numpy as np
+
+
+@dataclass
+class Canvas:
+    """
+    A pixel grid over a region of layout coordinates, into which points and
+    lines are accumulated as counts per pixel rather than drawn one artist
+    at a time, datashader style. Row 0 is the top of the image, so y grows
+    upwards as in a plot.
+    """
+
+    width: int = 1024
+    height: int = 1024
+    bounds: Optional[tuple[float, float, float, float]] = None
+
+    def fit(self, coords: np.ndarray, margin: float = 0.02) -> "Canvas":
+        """
+        Params:
+            coords: (n, 2) coordinates that should all be in view
+            margin: empty border, as a share of the extent
+
+        Returns:
+            a Canvas of the same size whose bounds (x_min, x_max, y_min,
+            y_max) cover coords at the canvas's aspect ratio
+        """
+        if not len(coords):
+            return Canvas(self.width, self.height, (0.0, 1.0, 0.0, 1.0))
+        low, high = coords.min(axis=0), coords.max(axis=0)
+        center = (low + high) / 2
+        span = np.maximum(high - low, 1e-12) * (1 + 2 * margin)
+        # widen the narrow side so a unit is as long in x as in y
+        scale = max(span[0] / self.width, span[1] / self.height)
+        half = np.array([self.width, self.height]) * scale / 2
+        return Canvas(
+            self.width,
+            self.height,
+            (
+                float(center[0] - half[0]),
+                float(center[0] + half[0]),
+                float(center[1] - half[1]),
+                float(center[1] + half[1]),
+            ),
+        )
+
+    def points(
+        self, coords: np.ndarray, weights: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Counts points per pixel, points outside the bounds are dropped.
+
+        Params:
+            coords: (n, 2) coordinates
+            weights: amount each point adds, 1 by default
+
+        Returns:
+            (height, width) accumulation buffer
+        """
+        col, row = self._pixels(coords)
+        inside = (col >= 0) & (col < self.width) & (row >= 0) & (row < self.height)
+        flat = row[inside].astype(np.int64) * self.width + col[inside].astype(np.int64)
+        weights = None if weights is None else np.asarray(weights)[inside]
+        counts = np.bincount(flat, weights, self.width * self.height)
+        return counts.reshape(self.height, self.width)
+
+    def lines(
+        self,
+        coords: np.ndarray,
+        src: np.ndarray,
+        dst: np.ndarray,
+        weights: Optional[np.ndarray] = None,
+        batch: int = 1 << 20,
+    ) -> np.ndarray:
+        """
+        Counts line segments per pixel: every segment is clipped to the
+        bounds and sampled once per pixel step along its longer axis (a DDA),
+        all segments of a batch at once, so a pixel gets one count per line
+        through it. Memory stays at the buffer plus batch samples however
+        many edges there are.
+
+        Params:
+            coords: (n, 2) coordinates of the nodes
+            src: source node of each edge
+            dst: target node of each edge
+            weights: amount each line adds, 1 by default
+            batch: pixel samples drawn at a time
+
+        Returns:
+            (height, width) accumulation buffer
+        """
+        col, row = self._pixels(coords)
+        x0, y0 = col[src], row[src]
+        dx, dy = col[dst] - x0, row[dst] - y0
+
+        # Liang-Barsky clipping of every segment to the canvas, samples on
+        # the far sides are clamped into the last pixel below
+        right, top = float(self.width), float(self.height)
+        start = np.zeros(len(x0))
+        end = np.ones(len(x0))
+        visible = np.ones(len(x0), dtype=bool)
+        for p, q in ((-dx, x0), (dx, right - x0), (-dy, y0), (dy, top - y0)):
+            parallel = p == 0
+            visible &= ~(parallel & (q < 0))
+            ratio = np.divide(q, p, out=np.zeros_like(q), where=~parallel)
+            start = np.where(p < 0, np.maximum(start, ratio), start)
+            end = np.where(p > 0, np.minimum(end, ratio), end)
+        visible &= start <= end
+
+        x0, y0 = x0 + start * dx, y0 + start * dy
+        dx, dy = dx * (end - start), dy * (end - start)
+        x0, y0, dx, dy = x0[visible], y0[visible], dx[visible], dy[visible]
+        weights = None if weights is None else np.asarray(weights)[visible]
+
+        # one sample per pixel along the longer axis, each edge's samples
+        # are its start plus multiples of its increment
+        steps = np.ceil(np.maximum(np.abs(dx), np.abs(dy))).astype(np.int64) + 1
+        # float32 samples are exact to well under a pixel and half the traffic
+        x0, y0 = x0.astype(np.float32), y0.astype(np.float32)
+        x_step = (dx / np.maximum(steps - 1, 1)).astype(np.float32)
+        y_step = (dy / np.maximum(steps - 1, 1)).astype(np.float32)
+        total = np.cumsum(steps)
+        counts = np.zeros(self.width * self.height)
+
+        # cut the edges into batches of about batch samples
+        first = 0
+        while first < len(steps):
+            done = total[first - 1] if first else 0
+            last = int(np.searchsorted(total, done + batch, side="right"))
+            part = slice(first, max(last, first + 1))
+            n = steps[part]
+            offset = np.arange(int(n.sum()), dtype=np.float32)
+            offset -= np.repeat((np.cumsum(n) - n).astype(np.float32), n)
+
+            xs = (np.repeat(x0[part], n) + offset * np.repeat(x_step[part], n)).astype(
+                np.int64
+            )
+            ys = (np.repeat(y0[part], n) + offset * np.repeat(y_step[part], n)).astype(
+                np.int64
+            )
+            # float32 rounding can put a clipped end a hair outside the
+            # canvas, it belongs to the edge pixel rather than the next row
+            np.clip(xs, 0, self.width - 1, out=xs)
+            np.clip(ys, 0, self.height - 1, out=ys)
+            xs += ys * self.width
+            w = None if weights is None else np.repeat(weights[part], n)
+            counts += np.bincount(xs, w, len(counts))
+            first = part.stop
+        return counts.reshape(self.height, self.width)
+
+    def _pixels(self, coords: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Helper method maps coordinates to fractional (column, row) pixel
+        positions, rows counted from the top
+        """
+        x_min, x_max, y_min, y_max = self.bounds or self.fit(coords).bounds
+        coords = np.asarray(coords, dtype=np.float64)
+        col = (coords[:, 0] - x_min) * (self.width / (x_max - x_min))
+        row = (y_max - coords[:, 1]) * (self.height / (y_max - y_min))
+        return col, row
+
+
+def shade(
+    counts: np.ndarray,
+    cmap: str = "viridis",
+    how: str = "eq_hist",
+    min_alpha: int = 40,
+    span: tuple[float, float] = (0.3, 1.0),
+) -> np.ndarray:
+    """
+    Colors an accumulation buffer. Empty pixels are transparent and the rest
+    are scaled to [0, 1] and looked up in the span of a colormap, with
+    opacity rising from min_alpha. "linear" scales by the maximum, "log" by log(1 + count),
+    and "eq_hist" by the rank of the count among all nonzero counts, which
+    shows structure at every density instead of a few saturated hubs.
+
+    Params:
+        counts: (height, width) accumulation buffer
+        cmap: matplotlib colormap name
+        how: "eq_hist", "log" or "linear"
+        min_alpha: opacity of the lowest nonzero count, 0-255
+        span: the part of the colormap used, the default skips the pale end
+            that would vanish on white
+
+    Returns:
+        (height, width, 4) RGBA uint8 image
+    """
+    filled = counts > 0
+    values = counts[filled]
+    level = np.zeros(len(values))
+    if len(values):
+        if how == "eq_hist":
+            distinct, rank, occurrences = np.unique(
+                values, return_inverse=True, return_counts=True
+            )
+            cdf = np.cumsum(occurrences) / len(values)
+            low = cdf[0]
+            level = (cdf[rank] - low) / (1 - low) if low < 1 else np.ones(len(values))
+        elif how == "log":
+            top = np.log1p(values.max())
+            level = np.log1p(values) / top if top > 0 else np.ones(len(values))
+        elif how == "linear":
+            level = values / values.max()
+        else:
+            raise ValueError(
+                f"Unknown shading {how!r}, expected eq_hist, log or linear"
+            )
+
+    lut = (matplotlib.colormaps[cmap](np.linspace(*span, 256)) * 255).astype(np.uint8)
+    image = np.zeros(counts.shape + (4,), dtype=np.uint8)
+    image[filled] = lut[(level * 255).astype(np.int64)]
+    image[filled, 3] = (min_alpha + level * (255 - min_alpha)).astype(np.uint8)
+    return image
+
+
+def stack(*images: np.ndarray) -> np.ndarray:
+    """
+    Composites RGBA images, each drawn over the ones before it.
+
+    Params:
+        images: (height, width, 4) RGBA uint8 images, bottom first
+
+    Returns:
+        the composite
+    """
+    color = np.zeros(images[0].shape[:2] + (3,), dtype=np.float32)
+    alpha = np.zeros(images[0].shape[:2] + (1,), dtype=np.float32)
+    for image in images:
+        top_alpha = image[..., 3:].astype(np.float32) / 255
+        color = image[..., :3].astype(np.float32) / 255 * top_alpha + color * (
+            1 - top_alpha
+        )
+        alpha = top_alpha + alpha * (1 - top_alpha)
+    # back from premultiplied color
+    color = np.divide(color, alpha, out=np.zeros_like(color), where=alpha > 0)
+    return (np.concatenate([color, alpha], axis=2) * 255).round().astype(np.uint8)
+
+
+def on_background(image: np.ndarray, color: str = "white") -> np.ndarray:
+    """
+    Params:
+        image: RGBA uint8 image
+        color: any matplotlib color
+
+    Returns:
+        the image flattened onto an opaque background
+    """
+    rgba = np.array(matplotlib.colors.to_rgba(color)) * 255
+    background = np.broadcast_to(rgba.astype(np.uint8), image.shape)
+    return stack(background, image)
+
+
+def render_graph(
+    coords: np.ndarray,
+    src: np.ndarray,
+    dst: np.ndarray,
+    path: str,
+    width: int = 2048,
+    height: int = 2048,
+    how: str = "eq_hist",
+    edge_cmap: str = "Blues",
+    node_cmap: str = "Reds",
+    background: str = "white",
+) -> np.ndarray:
+    """
+    Renders a laid out graph as a density image and writes it as a PNG,
+    edges underneath and nodes on top.
+
+    Params:
+        coords: (n, 2) node coordinates, e.g. from layout.force_layout
+        src: source node of each edge
+        dst: target node of each edge
+        path: output PNG file
+        width: image width in pixels
+        height: image height in pixels
+        how: shading, see shade
+        edge_cmap: colormap of the edge densities
+        node_cmap: colormap of the node densities
+        background: background color
+
+    Returns:
+        the (height, width, 4) RGBA image
+    """
+    canvas = Canvas(width, height).fit(coords)
+    edges = shade(canvas.lines(coords, src, dst), edge_cmap, how)
+    nodes = shade(canvas.points(coords), node_cmap, how, min_alpha=120)
+    image = on_background(stack(edges, nodes), background)
+    matplotlib.image.imsave(path, image)
+    return image
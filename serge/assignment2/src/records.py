@@ -0,0 +1,234 @@
+import csv
+import os
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, Optional
+
+
+MONTHS = {
+    "jan": 1,
+    "feb": 2,
+    "mar": 3,
+    "apr": 4,
+    "may": 5,
+    "jun": 6,
+    "jul": 7,
+    "aug": 8,
+    "sep": 9,
+    "oct": 10,
+    "nov": 11,
+    "dec": 12,
+}
+
+
+@dataclass
+class PubmedRecord:
+    """
+    The fields of a PubMed article we keep locally, enough to re-evaluate
+    our search term without going back to the API.
+    """
+
+    pmid: int
+    doi: Optional[str] = None
+    title: str = ""
+    abstract: str = ""
+    journal: str = ""
+    languages: list[str] = field(default_factory=list)
+    mesh_terms: list[str] = field(default_factory=list)
+    keywords: list[str] = field(default_factory=list)
+    pub_date: Optional[str] = None  # YYYY/MM/DD, journal issue date
+    epub_date: Optional[str] = None  # YYYY/MM/DD, electronic publication date
+
+    @property
+    def year(self) -> Optional[int]:
+        date = self.pub_date or self.epub_date
+        return int(date[:4]) if date else None
+
+
+def parse_records_from_tree(tree: ET.Element) -> list[PubmedRecord]:
+    """
+    Parses full article records from an eFetch XML element tree.
+
+    Params:
+        tree: an XML element tree of <PubmedArticle> elements
+
+    Returns:
+        a list of PubmedRecord, one per article with a PMID
+    """
+    records: list[PubmedRecord] = []
+
+    for article in tree.iter("PubmedArticle"):
+        pmid = article.findtext("MedlineCitation/PMID")
+        if not pmid:
+            continue
+
+        doi = None
+        for article_id in article.findall("PubmedData/ArticleIdList/ArticleId"):
+            if article_id.attrib.get("IdType") == "doi":
+                doi = article_id.text
+                break
+
+        info = article.find("MedlineCitation/Article")
+        if info is None:
+            records.append(PubmedRecord(pmid=int(pmid), doi=doi))
+            continue
+
+        abstract = " ".join(
+            _text(part) for part in info.findall("Abstract/AbstractText")
+        )
+
+        records.append(
+            PubmedRecord(
+                pmid=int(pmid),
+                doi=doi,
+                title=_text(info.find("ArticleTitle")),
+                abstract=abstract,
+                journal=info.findtext("Journal/Title") or "",
+                languages=[lang.text for lang in info.findall("Language") if lang.text],
+                mesh_terms=[
+                    mesh.text
+                    for mesh in article.findall(
+                        "MedlineCitation/MeshHeadingList/MeshHeading/DescriptorName"
+                    )
+                    if mesh.text
+                ],
+                keywords=[
+                    _text(keyword)
+                    for keyword in article.findall(
+                        "MedlineCitation/KeywordList/Keyword"
+                    )
+                ],
+                pub_date=_parse_date(info.find("Journal/JournalIssue/PubDate")),
+                epub_date=_parse_date(info.find("ArticleDate")),
+            )
+        )
+
+    return records
+
+
+def _text(element: Optional[ET.Element]) -> str:
+    """
+    Helper method flattens an element's text, titles and abstracts may
+    contain inline markup such as <i> or <sup>
+    """
+    if element is None:
+        return ""
+    return "".join(element.itertext()).strip()
+
+
+def _parse_date(element: Optional[ET.Element]) -> Optional[str]:
+    """
+    Helper method normalizes a PubMed date element to YYYY/MM/DD, missing
+    months and days default to 01 the same way PubMed indexes them
+
+    Params:
+        element: a <PubDate> or <ArticleDate> element
+    """
+    if element is None:
+        return None
+
+    year = element.findtext("Year")
+    month = element.findtext("Month") or "1"
+    day = element.findtext("Day") or "1"
+
+    # e.g. <MedlineDate>2019 Nov-Dec</MedlineDate>
+    if year is None:
+        medline_date = (element.findtext("MedlineDate") or "").split()
+        if not medline_date or not medline_date[0][:4].isdigit():
+            return None
+        year = medline_date[0][:4]
+        month = medline_date[1][:3] if len(medline_date) > 1 else "1"
+        day = "1"
+
+    if not month.isdigit():
+        month = str(MONTHS.get(month[:3].lower(), 1))
+    if not day.isdigit():
+        day = "1"
+
+    return f"{int(year):04d}/{int(month):02d}/{int(day):02d}"
+
+
+RECORD_FIELDS = [
+    "pmid",
+    "doi",
+    "title",
+    "abstract",
+    "journal",
+    "languages",
+    "mesh_terms",
+    "keywords",
+    "pub_date",
+    "epub_date",
+]
+LIST_SEPARATOR = "; "
+
+
+def write_records_to_csv(records: Iterable[PubmedRecord], filepath: str) -> int:
+    """
+    Writes records to a CSV file, list fields are joined with '; '. The file
+    is written under a temporary name and moved into place, so readers never
+    see a partial file.
+
+    Params:
+        records: the records to write
+        filepath: destination CSV file
+
+    Returns:
+        the number of records written
+    """
+    os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+    tmp_path = f"{filepath}.tmp.{os.getpid()}"
+    count = 0
+
+    with open(tmp_path, mode="w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(RECORD_FIELDS)
+        for record in records:
+            writer.writerow(
+                [
+                    record.pmid,
+                    record.doi or "",
+                    record.title,
+                    record.abstract,
+                    record.journal,
+                    LIST_SEPARATOR.join(record.languages),
+                    LIST_SEPARATOR.join(record.mesh_terms),
+                    LIST_SEPARATOR.join(record.keywords),
+                    record.pub_date or "",
+                    record.epub_date or "",
+                ]
+            )
+            count += 1
+
+    os.replace(tmp_path, filepath)
+    return count
+
+
+def read_records_from_csv(filepath: str) -> Iterator[PubmedRecord]:
+    """
+    Reads records back from a CSV written by write_records_to_csv.
+
+    Params:
+        filepath: the CSV file to read
+
+    Returns:
+        an iterator of PubmedRecord
+    """
+    with open(filepath, newline="", encoding="utf-8") as file:
+        for row in csv.DictReader(file):
+            yield PubmedRecord(
+                pmid=int(row["pmid"]),
+                doi=row["doi"] or None,
+                title=row["title"],
+                abstract=row["abstract"],
+                journal=row["journal"],
+                languages=_split(row["languages"]),
+                mesh_terms=_split(row["mesh_terms"]),
+                keywords=_split(row["keywords"]),
+                pub_date=row["pub_date"] or None,
+                epub_date=row["epub_date"] or None,
+            )
+
+
+def _split(value: str) -> list[str]:
+    return [item for item in value.split(LIST_SEPARATOR) if item]
@@ -0,0 +1,351 @@
+from collections import deque
+from typing import Callable, Optional
+
+import numpy as np
+
+from csr_graph import CSRGraph
+
+
+def neighbors(graph: CSRGraph, nodes: np.ndarray) -> np.ndarray:
+    """
+    Neighbors of a set of nodes following edges either way, which is how the
+    samplers explore a directed graph: a paper leads to what it cites and
+    to what cites it.
+
+    Params:
+        graph: the graph
+        nodes: node indices
+
+    Returns:
+        neighbor indices, with repeats
+    """
+    nodes = np.asarray(nodes, dtype=np.int64)
+    _, out = graph.out_edges(nodes)
+    if not graph.directed:
+        return out
+    starts = np.asarray(graph.in_indptr[nodes])
+    counts = np.asarray(graph.in_indptr[nodes + 1]) - starts
+    offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+    into = np.asarray(graph.in_indices[offsets + np.arange(int(counts.sum()))])
+    return np.concatenate([out, into.astype(np.int64)])
+
+
+def uniform_nodes(graph: CSRGraph, size: int, seed: Optional[int] = None) -> np.ndarray:
+    """
+    Nodes drawn uniformly without replacement. Unbiased for node statistics
+    but the induced subgraph of a sparse graph is mostly isolated nodes.
+
+    Params:
+        graph: the graph
+        size: nodes to sample
+        seed: random seed
+
+    Returns:
+        sorted node indices
+    """
+    rng = np.random.default_rng(seed)
+    size = min(size, graph.num_nodes)
+    return np.sort(rng.choice(graph.num_nodes, size, replace=False))
+
+
+def induced_edges(graph: CSRGraph, size: int, seed: Optional[int] = None) -> np.ndarray:
+    """
+    Induced edge sampling: edges drawn uniformly, their endpoints kept until
+    size nodes are reached, and the subgraph induced on them. Picks nodes in
+    proportion to degree and keeps far more edges than node sampling. Edges
+    can only reach nodes with a neighbor, when size asks for more the rest
+    are isolated nodes drawn uniformly.
+
+    Params:
+        graph: the graph
+        size: nodes to sample
+        seed: random seed
+
+    Returns:
+        sorted node indices
+    """
+    rng = np.random.default_rng(seed)
+    size = min(size, graph.num_nodes)
+    stored = len(graph.indices)
+    if stored == 0:
+        return uniform_nodes(graph, size, seed)
+
+    degree = graph.out_degree() + (graph.in_degree() if graph.directed else 0)
+    isolated = np.flatnonzero(degree == 0)
+    reachable = min(size, graph.num_nodes - len(isolated))
+
+    chosen = np.empty(0, dtype=np.int64)
+    draws = max(size, 16)
+    while len(chosen) < reachable:
+        positions = rng.integers(0, stored, draws)
+        src = np.searchsorted(graph.indptr, positions, side="right") - 1
+        dst = np.asarray(graph.indices[positions], dtype=np.int64)
+
+        # endpoints in draw order, first appearances only
+        endpoints = np.stack([src, dst], axis=1).ravel()
+        endpoints = endpoints[np.sort(np.unique(endpoints, return_index=True)[1])]
+        new = endpoints[~np.isin(endpoints, chosen)]
+        chosen = np.concatenate([chosen, new[: reachable - len(chosen)]])
+        draws *= 2
+
+    if len(chosen) < size:
+        extra = rng.choice(isolated, size - len(chosen), replace=False)
+        chosen = np.concatenate([chosen, extra])
+    return np.sort(chosen)
+
+
+def random_walk(
+    graph: CSRGraph,
+    size: int,
+    seed: Optional[int] = None,
+    restart: float = 0.15,
+    start: Optional[int] = None,
+    patience: int = 100,
+) -> np.ndarray:
+    """
+    Random walk with restart: from a start node, step to a random neighbor
+    and jump back to the start with probability restart, until size distinct
+    nodes are visited. The sample is connected and centered on the start.
+    When the walk stops finding new nodes, as it does in a small component,
+    it moves on to a new random start.
+
+    Params:
+        graph: the graph
+        size: nodes to sample
+        seed: random seed
+        restart: probability of returning to the start at each step
+        start: start node index, random by default
+        patience: steps without a new node before moving on
+
+    Returns:
+        sorted node indices
+    """
+    rng = np.random.default_rng(seed)
+    size = min(size, graph.num_nodes)
+    if size == 0:
+        return np.empty(0, dtype=np.int64)
+
+    start = int(rng.integers(graph.num_nodes)) if start is None else start
+    visited = {start}
+    current = start
+    stalled = 0
+
+    while len(visited) < size:
+        around = neighbors(graph, [current])
+        if rng.random() < restart or not len(around):
+            current = start
+        else:
+            current = int(around[rng.integers(len(around))])
+
+        if current in visited:
+            stalled += 1
+        else:
+            visited.add(current)
+            stalled = 0
+        if stalled > patience:
+            start = current = int(rng.integers(graph.num_nodes))
+            visited.add(start)
+            stalled = 0
+
+    return np.sort(np.fromiter(visited, dtype=np.int64, count=len(visited)))
+
+
+def forest_fire(
+    graph: CSRGraph,
+    size: int,
+    seed: Optional[int] = None,
+    burn: float = 0.7,
+) -> np.ndarray:
+    """
+    Forest fire sampling (Leskovec and Faloutsos): a fire starts at a random
+    node, every burning node ignites a geometrically distributed number of
+    its unburnt neighbors, mean burn / (1 - burn), and a new fire starts when
+    one dies out. Preserves degree and clustering structure well.
+
+    Params:
+        graph: the graph
+        size: nodes to sample
+        seed: random seed
+        burn: forward burning probability
+
+    Returns:
+        sorted node indices
+    """
+    rng = np.random.default_rng(seed)
+    size = min(size, graph.num_nodes)
+    burnt: set[int] = set()
+    queue: deque[int] = deque()
+
+    while len(burnt) < size:
+        if not queue:
+            ignition = int(rng.integers(graph.num_nodes))
+            if ignition in burnt:
+                continue
+            burnt.add(ignition)
+            queue.append(ignition)
+            continue
+
+        node = queue.popleft()
+        around = np.unique(neighbors(graph, [node]))
+        unburnt = [int(v) for v in around if v not in burnt]
+        spread = min(rng.geometric(1 - burn) - 1, len(unburnt), size - len(burnt))
+        for v in rng.choice(unburnt, spread, replace=False) if spread else ():
+            burnt.add(int(v))
+            queue.append(int(v))
+
+    return np.sort(np.fromiter(burnt, dtype=np.int64, count=len(burnt)))
+
+
+def snowball(
+    graph: CSRGraph,
+    size: int,
+    seed: Optional[int] = None,
+    start: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Snowball (breadth first) sampling: whole neighborhoods of a start node,
+    level by level, with the last level cut down at random to fit size.
+    Gives the densest connected sample around one place in the graph.
+
+    Params:
+        graph: the graph
+        size: nodes to sample
+        seed: random seed
+        start: start node index, random by default
+
+    Returns:
+        sorted node indices
+    """
+    rng = np.random.default_rng(seed)
+    size = min(size, graph.num_nodes)
+    if size == 0:
+        return np.empty(0, dtype=np.int64)
+
+    start = int(rng.integers(graph.num_nodes)) if start is None else start
+    visited = np.array([start], dtype=np.int64)
+    frontier = visited
+
+    while len(visited) < size:
+        reached = np.unique(neighbors(graph, frontier))
+        new = reached[~np.isin(reached, visited, assume_unique=True)]
+        if not len(new):
+            # this component is used up, continue from a fresh node
+            new = np.setdiff1d(rng.integers(graph.num_nodes, size=16), visited)[:1]
+            if not len(new):
+                continue
+        if len(new) > size - len(visited):
+            new = np.sort(rng.choice(new, size - len(visited), replace=False))
+        visited = np.union1d(visited, new)
+        frontier = new
+
+    return visited
+
+
+def top_degree_egos(
+    graph: CSRGraph,
+    size: int,
+    seed: Optional[int] = None,
+    centers: int = 5,
+) -> np.ndarray:
+    """
+    The ego networks of the highest degree nodes: the centers and their
+    neighbors, with each center's share of neighbors sampled when they don't
+    all fit. Shows the hubs, not a representative sample. Ranking the
+    degrees reads every row pointer once. When the ego networks hold fewer
+    than size nodes the sample is topped up with the next highest degree
+    nodes.
+
+    Params:
+        graph: the graph
+        size: nodes to sample
+        seed: random seed
+        centers: number of hubs
+
+    Returns:
+        sorted node indices
+    """
+    rng = np.random.default_rng(seed)
+    size = min(size, graph.num_nodes)
+    centers = min(centers, size)
+    if centers == 0:
+        return np.empty(0, dtype=np.int64)
+
+    degree = graph.out_degree() + (graph.in_degree() if graph.directed else 0)
+    hubs = np.argpartition(-degree, centers - 1)[:centers]
+    hubs = hubs[np.argsort(-degree[hubs], kind="stable")]
+
+    chosen = np.sort(hubs.astype(np.int64))
+    share = (size - centers) // centers
+    for hub in hubs:
+        around = np.setdiff1d(neighbors(graph, [hub]), chosen)
+        room = min(size - len(chosen), share if hub != hubs[-1] else size)
+        if len(around) > room:
+            around = rng.choice(around, room, replace=False)
+        chosen = np.union1d(chosen, around)
+
+    if len(chosen) < size:
+        ranked = np.argsort(-degree, kind="stable")
+        ranked = ranked[~np.isin(ranked, chosen)]
+        chosen = np.union1d(chosen, ranked[: size - len(chosen)])
+    return chosen
+
+
+SAMPLERS: dict[str, Callable[..., np.ndarray]] = {
+    "uniform": uniform_nodes,
+    "induced_edge": induced_edges,
+    "random_walk": random_walk,
+    "forest_fire": forest_fire,
+    "snowball": snowball,
+    "top_degree_ego": top_degree_egos,
+}
+
+
+def sample_nodes(
+    graph: CSRGraph,
+    method: str,
+    size: int,
+    seed: Optional[int] = None,
+    **options,
+) -> np.ndarray:
+    """
+    Samples nodes with one of the SAMPLERS.
+
+    Params:
+        graph: the graph
+        method: a key of SAMPLERS
+        size: nodes to sample
+        seed: random seed, the same seed gives the same sample
+        options: extra arguments of the sampler
+
+    Returns:
+        sorted node indices
+    """
+    if method not in SAMPLERS:
+        raise ValueError(
+            f"Unknown sampler {method!r}, expected one of {list(SAMPLERS)}"
+        )
+    return SAMPLERS[method](graph, size, seed, **options)
+
+
+def sample_subgraph(
+    graph: CSRGraph,
+    method: str,
+    size: int,
+    seed: Optional[int] = None,
+    **options,
+) -> CSRGraph:
+    """
+    Samples nodes and returns the compact subgraph they induce, with the
+    original node ids carried over.
+
+    Params:
+        graph: the graph
+        method: a key of SAMPLERS
+        size: nodes to sample
+        seed: random seed
+        options: extra arguments of the sampler
+
+    Returns:
+        the sampled CSRGraph
+    """
+    return graph.subgraph(sample_nodes(graph, method, size, seed, **options))
@@ -0,0 +1,253 @@
+import argparse
+import logging
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from degree_stats import DegreeSummary, summarize_degrees
+from node_map import NodeMap
+
+
+class UnionFind:
+    def __init__(self, size: int = 0) -> None:
+        """
+        Disjoint sets over node indices 0..size-1, stored as parent and rank
+        arrays that grow on demand. Unions are applied a whole batch of
+        edges at a time: every round finds the roots of all pending edges,
+        hooks the lower ranked root of each under the other and retries the
+        edges whose roots may still differ.
+
+        Params:
+            size: initial number of nodes
+        """
+        self.size = 0
+        self.parent = np.empty(0, dtype=np.int64)
+        self.rank = np.empty(0, dtype=np.int8)
+        self.grow(size)
+
+    def grow(self, size: int) -> None:
+        """
+        Adds singleton sets until there are size nodes, reallocating with
+        doubling so a stream of small growths stays linear.
+
+        Params:
+            size: the new number of nodes
+        """
+        if size <= self.size:
+            return
+        if size > len(self.parent):
+            capacity = max(size, 2 * len(self.parent))
+            parent = np.empty(capacity, dtype=np.int64)
+            parent[: self.size] = self.parent[: self.size]
+            rank = np.zeros(capacity, dtype=np.int8)
+            rank[: self.size] = self.rank[: self.size]
+            self.parent, self.rank = parent, rank
+        self.parent[self.size : size] = np.arange(self.size, size)
+        self.rank[self.size : size] = 0
+        self.size = size
+
+    def find(self, nodes: np.ndarray) -> np.ndarray:
+        """
+        Finds the root of every node and points each queried node straight
+        at its root (path compression).
+
+        Params:
+            nodes: node indices
+
+        Returns:
+            the root of each node
+        """
+        parent = self.parent
+        roots = parent[nodes]
+        while True:
+            above = parent[roots]
+            moving = above != roots
+            if not moving.any():
+                break
+            roots = np.where(moving, above, roots)
+        parent[nodes] = roots
+        return roots
+
+    def union(self, a: np.ndarray, b: np.ndarray) -> None:
+        """
+        Merges the sets of a[i] and b[i] for every i, by rank.
+
+        Params:
+            a: node indices
+            b: node indices, same length as a
+        """
+        while len(a):
+            root_a, root_b = self.find(a), self.find(b)
+            differ = root_a != root_b
+            a, b = a[differ], b[differ]
+            root_a, root_b = root_a[differ], root_b[differ]
+            if not len(a):
+                break
+
+            # order roots by (rank, index) so every hook goes strictly up and
+            # roots hooked in the same round can't form a cycle
+            rank_a, rank_b = self.rank[root_a], self.rank[root_b]
+            a_lower = (rank_a < rank_b) | ((rank_a == rank_b) & (root_a < root_b))
+            child = np.where(a_lower, root_a, root_b)
+            new_root = np.where(a_lower, root_b, root_a)
+            self.parent[child] = new_root
+
+            # where a root won several hooks, only the last write stuck
+            winner = self.parent[child]
+            equal = self.rank[winner] == self.rank[child]
+            np.maximum.at(self.rank, winner[equal], self.rank[child[equal]] + 1)
+
+    def roots(self) -> np.ndarray:
+        """
+        Returns:
+            the root of every node
+        """
+        return self.find(np.arange(self.size))
+
+
+@dataclass
+class StreamingStats:
+    """
+    Statistics gathered in one pass over an edge file. Components are weakly
+    connected, ids[i] is the original id of node index i.
+    """
+
+    summary: DegreeSummary
+    num_components: int
+    largest_component: int
+    component_sizes: np.ndarray
+    ids: np.ndarray
+
+    def rows(self) -> list[tuple[str, object]]:
+        return self.summary.rows() + [
+            ("Connected Components", self.num_components),
+            ("Largest Component", self.largest_component),
+        ]
+
+
+def stream_edge_stats(
+    path: str,
+    source: str = "citing_iid",
+    target: str = "cited_iid",
+    node_map: Optional[NodeMap] = None,
+    chunksize: int = 1 << 22,
+    directed: bool = True,
+) -> StreamingStats:
+    """
+    Reads an edge CSV once, in chunks, keeping only per-node arrays: degree
+    counts and a union-find for the weakly connected components. Memory
+    grows with the number of nodes, never with the number of edges.
+    Duplicate edges are counted each time they appear.
+
+    Params:
+        path: CSV file with one edge per row
+        source: column holding the citing node id
+        target: column holding the cited node id
+        node_map: every node of the graph, so nodes without edges count as
+            isolates, otherwise nodes are the ids seen in the file
+        chunksize: rows per chunk
+        directed: report in- and out-degrees separately
+
+    Returns:
+        the StreamingStats
+    """
+    known = pd.Index([], dtype=np.int64)
+    size = 0 if node_map is None else len(node_map)
+    out_degree = np.zeros(size, dtype=np.int64)
+    in_degree = np.zeros(size, dtype=np.int64)
+    components = UnionFind(size)
+    num_edges = loops = 0
+
+    chunks = pd.read_csv(
+        path, usecols=[source, target], dtype=np.int64, chunksize=chunksize
+    )
+    for chunk in chunks:
+        src_ids = chunk[source].to_numpy()
+        dst_ids = chunk[target].to_numpy()
+
+        if node_map is not None:
+            src = node_map.lookup(src_ids, strict=True)
+            dst = node_map.lookup(dst_ids, strict=True)
+        else:
+            # number new ids in order of first appearance, so indices handed
+            # out earlier never move
+            ids = np.concatenate([src_ids, dst_ids])
+            index = known.get_indexer(ids)
+            new = pd.unique(ids[index < 0])
+            if len(new):
+                known = known.append(pd.Index(new))
+                index = known.get_indexer(ids)
+            src, dst = index[: len(src_ids)], index[len(src_ids) :]
+            size = len(known)
+
+        if size > len(out_degree):
+            out_degree = _grow(out_degree, size)
+            in_degree = _grow(in_degree, size)
+        components.grow(size)
+
+        out_degree[:size] += np.bincount(src, minlength=size)
+        in_degree[:size] += np.bincount(dst, minlength=size)
+        components.union(src, dst)
+        num_edges += len(src)
+        loops += int(np.count_nonzero(src == dst))
+        logging.info(f"Streamed {num_edges} edges, {size} nodes so far.")
+
+    out_degree, in_degree = out_degree[:size], in_degree[:size]
+    degree = out_degree + in_degree
+    if not directed:
+        out_degree = in_degree = degree
+    summary = summarize_degrees(
+        num_edges, loops, directed, in_degree, out_degree, degree, size
+    )
+
+    component_sizes = np.bincount(components.roots(), minlength=size)
+    component_sizes = np.sort(component_sizes[component_sizes > 0])[::-1]
+    ids = node_map.ids if node_map is not None else known.to_numpy()
+
+    return StreamingStats(
+        summary,
+        len(component_sizes),
+        int(component_sizes[0]) if len(component_sizes) else 0,
+        component_sizes,
+        ids,
+    )
+
+
+def _grow(array: np.ndarray, size: int) -> np.ndarray:
+    """
+    Helper method extends a counter array with zeros, at least doubling it
+    """
+    grown = np.zeros(max(size, 2 * len(array)), dtype=array.dtype)
+    grown[: len(array)] = array
+    return grown
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Degree and connectivity statistics of an edge CSV, "
+        "streamed in one pass."
+    )
+    parser.add_argument("path")
+    parser.add_argument("--source", default="citing_iid")
+    parser.add_argument("--target", default="cited_iid")
+    parser.add_argument("--nodes", help="saved NodeMap of every node, see node_map")
+    parser.add_argument("--chunksize", type=int, default=1 << 22)
+    args = parser.parse_args()
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(levelname)s:%(message)s"
+    )
+
+    node_map = NodeMap.load(args.nodes) if args.nodes else None
+    stats = stream_edge_stats(
+        args.path, args.source, args.target, node_map, args.chunksize
+    )
+    for name, value in stats.rows():
+        print(
+            f"{name}: {value:.4f}" if isinstance(value, float) else f"{name}: {value}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+import os
+import sys
+
+import networkit as nk
+import networkx as nx
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from betweenness import betweenness  # noqa: E402
+
+
+def small_graph() -> nk.Graph:
+    return nk.nxadapter.nx2nk(nx.connected_watts_strogatz_graph(120, 4, 0.2, seed=1))
+
+
+def test_adaptive_and_topk_match_exact_within_epsilon():
+    nk.engineering.setSeed(7, False)
+    graph = small_graph()
+    exact = betweenness(graph, "exact").scores
+
+    adaptive = betweenness(graph, "adaptive", epsilon=0.01, delta=0.05)
+    assert np.abs(adaptive.scores - exact).max() <= adaptive.epsilon
+
+    topk = betweenness(graph, "topk", epsilon=0.01, delta=0.05, k=5)
+    ranked = topk.ranking
+    assert np.abs(topk.scores[ranked] - exact[ranked]).max() <= topk.epsilon
+
+
+def test_sample_agrees_with_adaptive_scale():
+    nk.engineering.setSeed(7, False)
+    graph = small_graph()
+    sample = betweenness(graph, "sample", samples=120).scores
+    adaptive = betweenness(graph, "adaptive", epsilon=0.01, delta=0.05).scores
+    top = np.argsort(-sample)[:5]
+    assert np.allclose(adaptive[top] / sample[top], 1, atol=0.25)
@@ -0,0 +1,24 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from convert import convert  # noqa: E402
+from csr_graph import CSRGraph  # noqa: E402
+from graph_io import read_metis, write_text_edges  # noqa: E402
+
+
+def test_empty_edge_list_converts(tmp_path):
+    source = str(tmp_path / "empty.tsv")
+    write_text_edges(CSRGraph.from_edges([], [], 0, True), source)
+    assert os.path.getsize(source) == 0
+
+    metis = str(tmp_path / "empty.metis")
+    convert(source, metis)
+    with open(metis) as file:
+        assert file.readline().split() == ["0", "0"]
+    assert read_metis(metis).num_edges == 0
+
+    edges = str(tmp_path / "empty.edges")
+    convert(source, edges)
+    assert os.path.getsize(edges) == 0
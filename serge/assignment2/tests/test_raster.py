@@ -0,0 +1,54 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from raster import Canvas  # noqa: E402
+
+
+def test_lines_crossing_every_side_stay_on_their_pixels():
+    canvas = Canvas(64, 64, (0.0, 1.0, 0.0, 1.0))
+    # vertical, horizontal and diagonal segments ending on or crossing
+    # the left, right, top and bottom sides
+    coords = np.array(
+        [
+            [0.3, 0.0],
+            [0.3, 1.0],
+            [-0.5, 0.5],
+            [1.5, 0.5],
+            [0.5, -0.5],
+            [0.5, 1.5],
+            [-0.2, -0.2],
+            [1.2, 1.2],
+            [0.0, 0.0],
+            [1.0, 0.0],
+        ]
+    )
+    src = np.array([0, 2, 4, 6, 8])
+    dst = np.array([1, 3, 5, 7, 9])
+    counts = canvas.lines(coords, src, dst)
+    assert counts.shape == (64, 64)
+
+    # the vertical line at x = 0.3 covers one column, top to bottom
+    column = int(0.3 * 64)
+    single = canvas.lines(coords, src[:1], dst[:1])
+    assert np.all(single[:, column] >= 1)
+    assert single.sum() == single[:, column].sum()
+
+    # the horizontal line along the bottom lights only the bottom row and
+    # never wraps into the first column of another row
+    bottom = canvas.lines(coords, src[4:], dst[4:])
+    assert np.all(bottom[-1] >= 1)
+    assert bottom.sum() == bottom[-1].sum()
+
+
+def test_random_segments_stay_inside():
+    rng = np.random.default_rng(0)
+    canvas = Canvas(64, 64, (0.0, 1.0, 0.0, 1.0))
+    coords = rng.uniform(-0.5, 1.5, (4000, 2))
+    src, dst = np.arange(0, 4000, 2), np.arange(1, 4000, 2)
+    counts = canvas.lines(coords, src, dst)
+    assert counts.shape == (64, 64)
+    assert counts.sum() > 0